@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark del planificador de llamadas a la IA
+Simula el pipeline de 3 fases de enrich_db_with_ai.py contra un modelo local
+con latencia fija y compara el esquema anterior (semáforo de 2 ejercicios,
+fases 2 y 3 en serie, 1 s de pausa por ejercicio) con AIScheduler.
+
+Las latencias se escalan con --scale para que la corrida dure segundos.
+
+Uso:
+python benchmarks/bench_ai_scheduler.py [--exercises 40] [--latency 4.0] [--scale 0.01]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.ai_scheduler import AIScheduler
+
+
+class FakeModel:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(self.latency)
+        return prompt
+
+
+async def legacy_run(model: FakeModel, n: int, pause: float) -> float:
+    """Esquema anterior: semáforo por ejercicio y fases en serie"""
+    semaphore = asyncio.Semaphore(2)
+
+    async def pipeline(i):
+        async with semaphore:
+            for fase in range(3):
+                await model.generate_content_async(f"{i}-{fase}")
+
+    inicio = time.perf_counter()
+    for future in asyncio.as_completed([pipeline(i) for i in range(n)]):
+        await future
+        await asyncio.sleep(pause)
+    return time.perf_counter() - inicio
+
+
+async def scheduled_run(model: FakeModel, n: int, rpm: float) -> float:
+    """Planificador: fases 2 y 3 en paralelo y concurrencia adaptativa"""
+    scheduler = AIScheduler(requests_per_minute=rpm, tokens_per_minute=10**9,
+                            initial_concurrency=2, max_concurrency=8)
+
+    async def pipeline(i):
+        await scheduler.call(model.generate_content_async, f"{i}-1")
+        await asyncio.gather(scheduler.call(model.generate_content_async, f"{i}-2"),
+                             scheduler.call(model.generate_content_async, f"{i}-3"))
+
+    inicio = time.perf_counter()
+    for future in asyncio.as_completed([pipeline(i) for i in range(n)]):
+        await future
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--exercises", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=4.0, help="segundos por llamada al modelo")
+    parser.add_argument("--rpm", type=float, default=60, help="cuota de solicitudes por minuto")
+    parser.add_argument("--scale", type=float, default=0.01, help="factor de escala del tiempo")
+    args = parser.parse_args()
+
+    model = FakeModel(args.latency * args.scale)
+    # El token bucket trabaja en tiempo real: la cuota se escala al revés
+    rpm = args.rpm / args.scale
+
+    anterior = asyncio.run(legacy_run(model, args.exercises, 1.0 * args.scale))
+    nuevo = asyncio.run(scheduled_run(model, args.exercises, rpm))
+
+    print(f"{args.exercises} ejercicios, {args.latency:.1f}s por llamada, {args.rpm:.0f} RPM")
+    print(f"  anterior:     {anterior / args.scale:8.1f} s")
+    print(f"  planificador: {nuevo / args.scale:8.1f} s  ({anterior / nuevo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark del pool de conexiones de DatabaseManager
+Compara ops/seg del esquema anterior (una conexión por operación) contra el pool.
+
+Uso:
+python benchmarks/bench_db_pool.py [--ops 2000]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager
+
+
+def _sample_exercise(i: int) -> dict:
+    return {
+        'titulo': f"Ejercicio de prueba {i}",
+        'unidad_tematica': "Sistemas Continuos",
+        'nivel_dificultad': "Intermedio",
+        'modalidad': "Teórico",
+        'enunciado': f"Calcule la convolución del caso {i}.",
+        'subtemas': ["Convolución", "LTI"],
+        'palabras_clave': ["convolución", "impulso"],
+    }
+
+
+def legacy_insert(db_path: str, data: dict) -> int:
+    """Reproduce el comportamiento anterior: connect + commit + close por operación"""
+    conn = sqlite3.connect(db_path)
+    data = {k: json.dumps(v, ensure_ascii=False) if isinstance(v, list) else v for k, v in data.items()}
+    fields = ','.join(data.keys())
+    placeholders = ','.join('?' for _ in data)
+    cursor = conn.execute(f"INSERT INTO ejercicios ({fields}) VALUES ({placeholders})", list(data.values()))
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def legacy_select(db_path: str, ejercicio_id: int):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT * FROM ejercicios WHERE id = ?", (ejercicio_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def legacy_update_estado(db_path: str, ejercicio_id: int):
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE ejercicios SET estado_ia = ? WHERE id = ?", ('COMPLETADO', ejercicio_id))
+    conn.commit()
+    conn.close()
+
+
+def _rate(n: int, start: float) -> float:
+    return n / max(time.perf_counter() - start, 1e-9)
+
+
+def run(ops: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+
+        # --- Esquema anterior (journal por defecto, una conexión por operación) ---
+        legacy_path = os.path.join(tmp, "legacy.db")
+        DatabaseManager(legacy_path).pool.close_all()
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+
+        start = time.perf_counter()
+        ids = [legacy_insert(legacy_path, _sample_exercise(i)) for i in range(ops)]
+        results['insert'] = [_rate(ops, start)]
+        start = time.perf_counter()
+        for ejercicio_id in ids:
+            legacy_select(legacy_path, ejercicio_id)
+        results['select_by_id'] = [_rate(ops, start)]
+        start = time.perf_counter()
+        for ejercicio_id in ids:
+            legacy_update_estado(legacy_path, ejercicio_id)
+        results['update_estado_ia'] = [_rate(ops, start)]
+
+        # --- Pool de conexiones ---
+        db = DatabaseManager(os.path.join(tmp, "pool.db"))
+        start = time.perf_counter()
+        ids = [db.agregar_ejercicio(_sample_exercise(i)) for i in range(ops)]
+        results['insert'].append(_rate(ops, start))
+        start = time.perf_counter()
+        for ejercicio_id in ids:
+            db.obtener_ejercicio_por_id(ejercicio_id)
+        results['select_by_id'].append(_rate(ops, start))
+        start = time.perf_counter()
+        for ejercicio_id in ids:
+            db.actualizar_estado_ia(ejercicio_id, 'COMPLETADO')
+        results['update_estado_ia'].append(_rate(ops, start))
+        db.pool.close_all()
+
+    print(f"{'operación':<20}{'anterior (ops/s)':>20}{'pool (ops/s)':>18}{'speedup':>10}")
+    for name, (legacy, pooled) in results.items():
+        print(f"{name:<20}{legacy:>20.0f}{pooled:>18.0f}{pooled / legacy:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=2000)
+    run(parser.parse_args().ops)
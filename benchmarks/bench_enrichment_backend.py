@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark de AIEnricher contra el modelo local simulado
+Corre el enriquecimiento completo (fases, lotes, planificador y escritor) sobre
+una base de datos temporal con FakeBackend, para cada nivel de concurrencia
+pedido, y reporta throughput y latencias p50/p95/p99 por llamada y por
+ejercicio. Los errores 503 y 429 simulados se deciden con una semilla fija.
+
+Uso:
+python benchmarks/bench_enrichment_backend.py [--exercises 200] [--concurrency 2,4,8]
+    [--latency 0.2] [--jitter 0.1] [--error-rate 0.02] [--rate-limit-rate 0.02]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import enrich_db_with_ai as enrich
+from database.db_manager import DatabaseManager
+from utils.ai_backends import FakeBackend, ModelBackend
+from utils.ai_scheduler import AIScheduler
+
+
+def percentile(values, q: float) -> float:
+    """Percentil por rango más cercano (q entre 0 y 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+class TimedBackend(ModelBackend):
+    """Mide la latencia de cada llamada vista por el enriquecedor (sin las esperas de cuota)"""
+
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+        self.model_name = backend.model_name
+        self.latencies = []
+
+    def generate(self, prompt):
+        return self.backend.generate(prompt)
+
+    def generate_multimodal(self, parts):
+        return self.backend.generate_multimodal(parts)
+
+    async def generate_async(self, prompt):
+        inicio = time.perf_counter()
+        try:
+            return await self.backend.generate_async(prompt)
+        finally:
+            self.latencies.append(time.perf_counter() - inicio)
+
+
+def run_level(args, concurrency: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / "ejercicios.db"))
+        for i in range(args.exercises):
+            db.agregar_ejercicio({'titulo': f"Ejercicio {i}", 'unidad_tematica': "Transformada Z",
+                                  'enunciado': f"Calcule la transformada Z de x[n] = {i} a^n u[n]"})
+        exercises = [enrich.prepare_exercise(row) for row in db.obtener_ejercicios()]
+
+        backend = TimedBackend(FakeBackend(
+            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, seed=args.seed,
+            responder=enrich.simulated_response))
+        scheduler = AIScheduler(requests_per_minute=args.rpm, tokens_per_minute=10**9,
+                                initial_concurrency=concurrency, max_concurrency=concurrency,
+                                base_delay=args.retry_after, max_delay=args.retry_after * 8,
+                                rng=random.Random(args.seed))
+        enricher = enrich.AIEnricher(backend, db, scheduler=scheduler, batch_size=args.batch_size,
+                                     batch_max_wait=args.latency)
+
+        # Latencia por ejercicio: desde que empieza el pipeline hasta su resultado final
+        exercise_latencies = []
+        pipeline = enricher._run_analysis_pipeline_with_retries
+
+        async def timed_pipeline(exercise, phases):
+            inicio = time.perf_counter()
+            try:
+                return await pipeline(exercise, phases)
+            finally:
+                exercise_latencies.append(time.perf_counter() - inicio)
+
+        enricher._run_analysis_pipeline_with_retries = timed_pipeline
+
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            asyncio.run(enricher.enrich_exercises(exercises))
+        elapsed = time.perf_counter() - inicio
+
+        completados = db.obtener_estadisticas()['por_estado_ia'].get('COMPLETADO', 0)
+        db.pool.close_all()
+
+    stats = scheduler.stats()
+    return {
+        'concurrency': concurrency,
+        'elapsed': elapsed,
+        'completed': completados,
+        'calls': stats['calls'],
+        'retries': stats['retries'],
+        'rate_limited': stats['rate_limited'],
+        'call_latencies': backend.latencies,
+        'exercise_latencies': exercise_latencies,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exercises", type=int, default=200)
+    parser.add_argument("--concurrency", default="2,4,8", help="niveles de concurrencia separados por coma")
+    parser.add_argument("--latency", type=float, default=0.2, help="segundos por llamada al modelo")
+    parser.add_argument("--jitter", type=float, default=0.1, help="variación uniforme de la latencia (±s)")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="probabilidad de un 503 por llamada")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02, help="probabilidad de un 429 por llamada")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="espera sugerida en los 429 (s)")
+    parser.add_argument("--rpm", type=float, default=60_000, help="cuota de solicitudes por minuto")
+    parser.add_argument("--batch-size", type=int, default=enrich.BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.exercises} ejercicios, {args.latency:.2f}±{args.jitter:.2f}s por llamada, "
+          f"{args.error_rate:.0%} errores 503, {args.rate_limit_rate:.0%} respuestas 429, lotes de {args.batch_size}")
+    print(f"{'conc':>5} {'tiempo':>8} {'ej/s':>7} {'llam/s':>7} {'ok':>5} {'reint':>6} {'429':>5}"
+          f" | {'llamada p50/p95/p99 (ms)':>26} | {'ejercicio p50/p95/p99 (s)':>26}")
+    for concurrency in (int(c) for c in args.concurrency.split(',')):
+        r = run_level(args, concurrency)
+        llamada = '/'.join(f"{percentile(r['call_latencies'], q) * 1000:.0f}" for q in (50, 95, 99))
+        ejercicio = '/'.join(f"{percentile(r['exercise_latencies'], q):.2f}" for q in (50, 95, 99))
+        print(f"{r['concurrency']:>5} {r['elapsed']:>7.2f}s {r['completed'] / r['elapsed']:>7.1f} "
+              f"{r['calls'] / r['elapsed']:>7.1f} {r['completed']:>5} {r['retries']:>6} {r['rate_limited']:>5}"
+              f" | {llamada:>26} | {ejercicio:>26}")
+
+
+if __name__ == "__main__":
+    main()
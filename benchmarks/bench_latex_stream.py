@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parser LaTeX por flujo
+Genera una guía sintética (50 MB por defecto) y compara parse_file, que carga
+el archivo completo, contra parse_stream, que lo lee por líneas. Mide tiempo
+y pico de memoria asignada (tracemalloc, en una segunda pasada).
+
+Uso:
+python benchmarks/bench_latex_stream.py [--size-mb 50]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.latex_parser import LaTeXParser
+
+TEMAS = ["Convolución", "Transformada de Fourier", "Transformada de Laplace", "Transformada Z", "Muestreo"]
+
+
+def _seccion(n: int) -> str:
+    items = []
+    for i in range(20):
+        items.append(
+            f"\\item Calcule la convolución $y(t) = x(t) * h(t)$ para la señal {n}.{i}. % nota interna\n"
+            "\\begin{enumerate}\n\\item Grafique $x(t)$.\n\\item Determine si el sistema es lineal.\n\\end{enumerate}\n"
+            "\\begin{figure}\\includegraphics[width=0.5\\textwidth]{fig/ej.png}\\end{figure}\n"
+            "\\ifanswers{\\color{red}\\textbf{Solución:} Se obtiene $y(t) = e^{-t}u(t)$.}\\fi\n"
+        )
+    return f"\\section*{{{TEMAS[n % len(TEMAS)]}}}\n\\begin{{enumerate}}\n{''.join(items)}\\end{{enumerate}}\n"
+
+
+def write_guide(path: str, size_mb: float) -> int:
+    """Escribe la guía sintética y devuelve la cantidad de secciones"""
+    objetivo = size_mb * 1024 * 1024
+    escritos = secciones = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\\documentclass{article}\n\\begin{document}\n\\section*{Instrucciones generales}\nResponda todo.\n")
+        while escritos < objetivo:
+            escritos += f.write(_seccion(secciones))
+            secciones += 1
+        f.write("\\end{document}\n")
+    return secciones
+
+
+def parse_whole(parser: LaTeXParser, path: str) -> int:
+    with open(path, encoding='utf-8') as f:
+        return len(parser.parse_file(f.read()))
+
+
+def parse_streaming(parser: LaTeXParser, path: str) -> int:
+    with open(path, encoding='utf-8') as f:
+        # Se cuentan sin guardarlos, como un consumidor que inserta a medida que llegan
+        return sum(1 for _ in parser.parse_stream(f))
+
+
+def _measure(label: str, func, parser: LaTeXParser, path: str):
+    start = time.perf_counter()
+    count = func(parser, path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(parser, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16}{count:>10}{elapsed:>12.2f} s{peak / 1e6:>14.2f} MB")
+
+
+def run(size_mb: float):
+    # Los logs INFO por ejercicio dominarían el tiempo medido
+    logging.disable(logging.INFO)
+    parser = LaTeXParser()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "guia_grande.tex")
+        secciones = write_guide(path, size_mb)
+        print(f"Guía sintética: {os.path.getsize(path) / 1e6:.1f} MB, {secciones} secciones")
+        print(f"{'':<16}{'ejercicios':>10}{'tiempo':>14}{'pico memoria':>17}")
+        _measure("parse_file", parse_whole, parser, path)
+        _measure("parse_stream", parse_streaming, parser, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=50)
+    run(parser.parse_args().size_mb)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de EjercicioRow (decodificación JSON diferida)
+Compara la decodificación ansiosa anterior (dict + json.loads de 12 columnas)
+contra EjercicioRow en una biblioteca sintética, midiendo CPU y memoria asignada.
+
+Uso:
+python benchmarks/bench_row_proxy.py [--rows 5000]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager, JSON_LIST_FIELDS
+
+
+def _sample_exercise(i: int) -> dict:
+    data = {
+        'titulo': f"Ejercicio {i}",
+        'unidad_tematica': "Transformada de Fourier",
+        'enunciado': "Determine la transformada de Fourier de la señal. " * 5,
+    }
+    for field in JSON_LIST_FIELDS:
+        data[field] = [f"{field} {j}" for j in range(4)]
+    return data
+
+
+def eager_rows(db_path: str):
+    """Comportamiento anterior: dict(row) y json.loads de todas las listas"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    ejercicios = []
+    for row in conn.execute("SELECT * FROM ejercicios ORDER BY fecha_creacion DESC"):
+        ejercicio = dict(row)
+        for field in JSON_LIST_FIELDS:
+            if ejercicio.get(field):
+                try:
+                    ejercicio[field] = json.loads(ejercicio[field])
+                except:
+                    ejercicio[field] = []
+        ejercicios.append(ejercicio)
+    conn.close()
+    return ejercicios
+
+
+def _measure(label: str, load, touch):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = load()
+    for row in rows:
+        touch(row)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<38}{elapsed * 1000:>10.1f} ms{peak / 1e6:>12.1f} MB")
+    return elapsed, peak
+
+
+def run(rows: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = DatabaseManager(db_path)
+        db.batch_import_exercises([_sample_exercise(i) for i in range(rows)])
+
+        # Vista típica de listado: título y una lista (palabras_clave)
+        def touch(row):
+            row.get('titulo')
+            row.get('palabras_clave')
+
+        print(f"{rows} filas, leyendo titulo + palabras_clave de cada una")
+        print(f"{'':<38}{'tiempo':>13}{'pico memoria':>15}")
+        eager_t, eager_m = _measure("dict + json.loads ansioso (anterior)", lambda: eager_rows(db_path), touch)
+        lazy_t, lazy_m = _measure("EjercicioRow diferido", db.obtener_ejercicios, touch)
+        print(f"speedup CPU: {eager_t / lazy_t:.1f}x   memoria: {eager_m / lazy_m:.1f}x menos")
+        db.pool.close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    run(parser.parse_args().rows)
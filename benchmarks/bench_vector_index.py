@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice vectorial de búsqueda semántica
+Crea un banco sintético (20.000 ejercicios por defecto), construye el índice
+completo, mide consultas individuales y en lote, y el costo de agregar un
+ejercicio nuevo de forma incremental.
+
+Uso:
+python benchmarks/bench_vector_index.py [--n 20000] [--queries 64]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager
+from database.vector_index import VectorIndex
+
+TEMAS = ["convolución de señales discretas", "transformada de Fourier de pulsos",
+         "transformada Z y región de convergencia", "series de Fourier periódicas",
+         "muestreo y aliasing", "sistemas LTI y respuesta al impulso",
+         "filtros digitales FIR e IIR", "transformada de Laplace y estabilidad"]
+PALABRAS = ("calcule determine grafique señal sistema entrada salida respuesta frecuencia "
+            "amplitud fase energía potencia periodo").split()
+
+
+def _banco(n: int):
+    rnd = random.Random(42)
+    banco = []
+    for i in range(n):
+        tema = rnd.choice(TEMAS)
+        banco.append({'titulo': f"Ejercicio {i}", 'unidad_tematica': tema,
+                      'enunciado': f"{' '.join(rnd.choices(PALABRAS, k=30))} sobre {tema}, caso {i}.",
+                      'subtemas': [tema], 'palabras_clave': tema.split()[:3]})
+    return banco
+
+
+def run(n: int, queries: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / "ejercicios.db"))
+        db.batch_import_exercises(_banco(n))
+
+        start = time.perf_counter()
+        index = VectorIndex(db)
+        index.sync()
+        print(f"Construcción de {n} vectores: {time.perf_counter() - start:.2f} s "
+              f"({index.stats()['bytes'] / 1e6:.1f} MB en disco)")
+
+        textos = [f"{random.choice(TEMAS)} con {random.choice(PALABRAS)}" for _ in range(queries)]
+        tiempos = []
+        for texto in textos:
+            start = time.perf_counter()
+            index.search(texto, k=10)
+            tiempos.append(time.perf_counter() - start)
+        print(f"Consulta individual top-10: mediana {statistics.median(tiempos) * 1e3:.1f} ms")
+
+        start = time.perf_counter()
+        index.search_batch(textos, k=10)
+        print(f"Lote de {queries} consultas: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+        db.agregar_ejercicio({'titulo': 'Nuevo', 'unidad_tematica': 'Estabilidad',
+                              'enunciado': "Analice la estabilidad BIBO a partir de los polos."})
+        start = time.perf_counter()
+        index.sync()
+        print(f"Agregar 1 ejercicio (sync incremental): {(time.perf_counter() - start) * 1e3:.1f} ms")
+        db.pool.close_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=64)
+    args = parser.parse_args()
+    run(args.n, args.queries)
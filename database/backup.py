@@ -0,0 +1,147 @@
+"""
+Backups en línea de la base de datos con la API de backup de SQLite
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+``sqlite3.Connection.backup`` copia la base por pasos de ``pages`` páginas
+desde una conexión propia: el resultado es consistente aunque la app siga
+escribiendo (si otra conexión modifica la base, SQLite reinicia la copia) y
+las escrituras solo esperan lo que dura un paso. La copia se escribe en un
+archivo ``.partial`` y se renombra al terminar, así nunca queda un backup a
+medias con el nombre final.
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from database.connection_pool import ConnectionPool
+from database.migrations import migrate, rotate_vector_token
+
+BACKUP_STEP_PAGES = 1024  # 4 MB por paso con páginas de 4 KB
+COMPRESSED_SUFFIX = '.gz'
+
+# (páginas copiadas, páginas totales)
+ProgressCallback = Callable[[int, int], None]
+
+
+def online_backup(db_path: str, dest_path: str, compress: bool = False, pages: int = BACKUP_STEP_PAGES,
+                  progress: Optional[ProgressCallback] = None) -> str:
+    """Copia consistente de ``db_path`` en ``dest_path`` (con ``.gz`` si ``compress``).
+
+    Devuelve la ruta final del backup.
+    """
+    if compress and not dest_path.endswith(COMPRESSED_SUFFIX):
+        dest_path += COMPRESSED_SUFFIX
+    partial = f"{dest_path}.partial"
+    raw = f"{partial}.db" if compress else partial
+
+    def _on_step(_status, remaining, total):
+        progress(total - remaining, total)
+
+    try:
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(raw)
+        try:
+            source.backup(target, pages=pages, progress=_on_step if progress else None)
+        finally:
+            target.close()
+            source.close()
+        if compress:
+            with open(raw, 'rb') as f_in, gzip.open(partial, 'wb', compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+            os.remove(raw)
+        os.replace(partial, dest_path)
+    except BaseException:
+        for path in {raw, partial}:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return dest_path
+
+
+def restore_backup(pool: ConnectionPool, backup_path: str):
+    """Reemplaza el contenido de la base del pool por el de un backup (``.db`` o ``.db.gz``).
+
+    El backup se verifica antes de tocar la base y se copia en un solo paso de
+    la API de backup: las demás conexiones ven la base anterior o la
+    restaurada completa, nunca una mezcla. Luego se aplican las migraciones
+    pendientes (backups de versiones anteriores) y se invalida el índice vectorial.
+    """
+    if not os.path.exists(backup_path):
+        raise FileNotFoundError(f"Archivo de backup no encontrado: {backup_path}")
+
+    source_path = backup_path
+    if backup_path.endswith(COMPRESSED_SUFFIX):
+        source_path = f"{pool.db_path}.restore"
+        with gzip.open(backup_path, 'rb') as f_in, open(source_path, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+    try:
+        source = sqlite3.connect(source_path)
+        try:
+            check = source.execute("PRAGMA quick_check").fetchone()[0]
+            if check != 'ok':
+                raise sqlite3.DatabaseError(f"El backup está dañado: {check}")
+            with pool.connection() as conn:
+                source.backup(conn)
+        finally:
+            source.close()
+    finally:
+        if source_path != backup_path and os.path.exists(source_path):
+            os.remove(source_path)
+
+    with pool.transaction() as conn:
+        migrate(conn)
+        rotate_vector_token(conn)
+
+
+class BackupJob:
+    """Backup en línea en un hilo aparte; la UI consulta ``fraction`` y ``done``"""
+
+    def __init__(self, db_path: str, dest_path: str, compress: bool = False, pages: int = BACKUP_STEP_PAGES):
+        self.db_path = db_path
+        self.dest_path = dest_path
+        self.compress = compress
+        self.pages = pages
+        self.copied = 0
+        self.total = 0
+        self.path: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+
+    def start(self) -> 'BackupJob':
+        self.started_at = time.time()
+        self._thread.start()
+        return self
+
+    def _on_progress(self, copied: int, total: int):
+        self.copied, self.total = copied, total
+
+    def _run(self):
+        try:
+            self.path = online_backup(self.db_path, self.dest_path, self.compress, self.pages, self._on_progress)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def fraction(self) -> float:
+        """Avance de la copia entre 0 y 1 (la compresión ocurre al final)"""
+        if self.done:
+            return 1.0
+        return self.copied / self.total if self.total else 0.0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que termine; devuelve ``done``"""
+        self._thread.join(timeout)
+        return self.done
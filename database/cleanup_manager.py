@@ -3,101 +3,78 @@ Database Cleanup Manager - Funciones para limpiar y resetear la BD
 Sistema de Gestión de Ejercicios - Señales y Sistemas
 """
 
-import sqlite3
 import os
-import shutil
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 import streamlit as st
 
+from database.backup import COMPRESSED_SUFFIX, BackupJob, online_backup, restore_backup
+from database.connection_pool import ConnectionPool, get_pool
+from database.db_manager import DatabaseManager
+
 
 class DatabaseCleanupManager:
     """Gestor de limpieza y reset de base de datos"""
     
-    def __init__(self, db_path: str = "database/ejercicios.db"):
+    def __init__(self, db_path: str = "database/ejercicios.db", pool: Optional[ConnectionPool] = None):
         self.db_path = db_path
+        # Mismo pool que usa DatabaseManager para este archivo
+        self.pool = pool or get_pool(db_path)
         self.backup_dir = "database/backups"
         
         # Crear directorio de backups si no existe
         os.makedirs(self.backup_dir, exist_ok=True)
     
     def get_database_stats(self) -> Dict:
-        """Obtiene estadísticas actuales de la base de datos"""
+        """Obtiene estadísticas actuales de la base de datos.
+
+        Se leen de la tabla ``estadisticas`` que mantienen los triggers, sin
+        recorrer la tabla ejercicios.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Total de ejercicios
-            cursor.execute("SELECT COUNT(*) FROM ejercicios")
-            total_exercises = cursor.fetchone()[0]
-            
-            # Por unidad temática
-            cursor.execute("""
-                SELECT unidad_tematica, COUNT(*) 
-                FROM ejercicios 
-                WHERE unidad_tematica IS NOT NULL
-                GROUP BY unidad_tematica
-                ORDER BY COUNT(*) DESC
-            """)
-            by_unit = dict(cursor.fetchall())
-            
-            # Por dificultad
-            cursor.execute("""
-                SELECT nivel_dificultad, COUNT(*) 
-                FROM ejercicios 
-                WHERE nivel_dificultad IS NOT NULL
-                GROUP BY nivel_dificultad
-            """)
-            by_difficulty = dict(cursor.fetchall())
-            
-            # Ejercicios sin solución
-            cursor.execute("""
-                SELECT COUNT(*) FROM ejercicios 
-                WHERE solucion_completa IS NULL OR solucion_completa = ''
-            """)
-            no_solution = cursor.fetchone()[0]
-            
-            conn.close()
+            stats = DatabaseManager(self.db_path, pool=self.pool).obtener_estadisticas()
+            total_exercises = stats['total_ejercicios']
+            by_unit = dict(sorted(stats['por_unidad'].items(), key=lambda item: item[1], reverse=True))
             
             return {
                 'total_exercises': total_exercises,
                 'by_unit': by_unit,
-                'by_difficulty': by_difficulty,
-                'no_solution': no_solution,
+                'by_difficulty': stats['por_dificultad'],
+                'no_solution': total_exercises - stats['con_solucion'],
                 'db_size': self._get_file_size_mb(self.db_path)
             }
             
         except Exception as e:
             return {'error': str(e)}
     
-    def create_backup(self, backup_name: str = None) -> str:
-        """Crea backup de la base de datos actual"""
+    def _backup_path(self, backup_name: str = None) -> str:
         if not backup_name:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_name = f"ejercicios_backup_{timestamp}.db"
-        
-        backup_path = os.path.join(self.backup_dir, backup_name)
-        
+        return os.path.join(self.backup_dir, backup_name)
+
+    def create_backup(self, backup_name: str = None, compress: bool = False) -> str:
+        """Crea un backup consistente de la base de datos actual (API de backup de SQLite)"""
         try:
-            shutil.copy2(self.db_path, backup_path)
-            return backup_path
+            return online_backup(self.db_path, self._backup_path(backup_name), compress=compress)
         except Exception as e:
             raise Exception(f"Error creando backup: {str(e)}")
+
+    def start_backup(self, backup_name: str = None, compress: bool = False) -> BackupJob:
+        """Inicia un backup en segundo plano; la app sigue atendiendo mientras se copia"""
+        return BackupJob(self.db_path, self._backup_path(backup_name), compress=compress).start()
     
     def clear_all_exercises(self) -> bool:
         """Elimina TODOS los ejercicios de la base de datos"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Eliminar todos los ejercicios
-            cursor.execute("DELETE FROM ejercicios")
-            
-            # Resetear el contador autoincrement
-            cursor.execute("DELETE FROM sqlite_sequence WHERE name='ejercicios'")
-            
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+                
+                # Eliminar todos los ejercicios
+                cursor.execute("DELETE FROM ejercicios")
+                
+                # Resetear el contador autoincrement
+                cursor.execute("DELETE FROM sqlite_sequence WHERE name='ejercicios'")
             
             return True
             
@@ -107,18 +84,15 @@ class DatabaseCleanupManager:
     def clear_exercises_by_pattern(self, pattern_used: str) -> int:
         """Elimina ejercicios por patrón específico"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Contar ejercicios que se van a eliminar
-            cursor.execute("SELECT COUNT(*) FROM ejercicios WHERE pattern_used = ?", (pattern_used,))
-            count = cursor.fetchone()[0]
-            
-            # Eliminar ejercicios con ese patrón
-            cursor.execute("DELETE FROM ejercicios WHERE pattern_used = ?", (pattern_used,))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+                
+                # Contar ejercicios que se van a eliminar
+                cursor.execute("SELECT COUNT(*) FROM ejercicios WHERE pattern_used = ?", (pattern_used,))
+                count = cursor.fetchone()[0]
+                
+                # Eliminar ejercicios con ese patrón
+                cursor.execute("DELETE FROM ejercicios WHERE pattern_used = ?", (pattern_used,))
             
             return count
             
@@ -128,18 +102,15 @@ class DatabaseCleanupManager:
     def clear_exercises_by_source(self, source: str) -> int:
         """Elimina ejercicios por fuente específica"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Contar ejercicios que se van a eliminar
-            cursor.execute("SELECT COUNT(*) FROM ejercicios WHERE fuente LIKE ?", (f"%{source}%",))
-            count = cursor.fetchone()[0]
-            
-            # Eliminar ejercicios de esa fuente
-            cursor.execute("DELETE FROM ejercicios WHERE fuente LIKE ?", (f"%{source}%",))
-            
-            conn.commit()
-            conn.close()
+            with self.pool.transaction() as conn:
+                cursor = conn.cursor()
+                
+                # Contar ejercicios que se van a eliminar
+                cursor.execute("SELECT COUNT(*) FROM ejercicios WHERE fuente LIKE ?", (f"%{source}%",))
+                count = cursor.fetchone()[0]
+                
+                # Eliminar ejercicios de esa fuente
+                cursor.execute("DELETE FROM ejercicios WHERE fuente LIKE ?", (f"%{source}%",))
             
             return count
             
@@ -149,13 +120,17 @@ class DatabaseCleanupManager:
     def recreate_database(self) -> bool:
         """Elimina y recrea completamente la base de datos"""
         try:
-            # Eliminar archivo de BD si existe
-            if os.path.exists(self.db_path):
-                os.remove(self.db_path)
+            # Cerrar las conexiones abiertas antes de borrar el archivo
+            self.pool.close_all()
+            
+            # Eliminar archivo de BD (y los archivos auxiliares de WAL) si existen
+            for path in (self.db_path, f"{self.db_path}-wal", f"{self.db_path}-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
             
             # Crear nueva BD vacía
             from database.db_manager import DatabaseManager
-            db_manager = DatabaseManager(self.db_path)
+            db_manager = DatabaseManager(self.db_path, pool=self.pool)
             
             return True
             
@@ -165,10 +140,7 @@ class DatabaseCleanupManager:
     def restore_from_backup(self, backup_path: str) -> bool:
         """Restaura BD desde un backup"""
         try:
-            if not os.path.exists(backup_path):
-                raise Exception("Archivo de backup no encontrado")
-            
-            shutil.copy2(backup_path, self.db_path)
+            restore_backup(self.pool, backup_path)
             return True
             
         except Exception as e:
@@ -182,7 +154,7 @@ class DatabaseCleanupManager:
             return backups
         
         for filename in os.listdir(self.backup_dir):
-            if filename.endswith('.db'):
+            if filename.endswith(('.db', f".db{COMPRESSED_SUFFIX}")):
                 filepath = os.path.join(self.backup_dir, filename)
                 size_mb = self._get_file_size_mb(filepath)
                 modified = datetime.fromtimestamp(os.path.getmtime(filepath))
@@ -0,0 +1,173 @@
+"""
+Pool de conexiones SQLite compartido por los gestores de la base de datos
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class _PooledConnection(sqlite3.Connection):
+    """Conexión que recuerda a qué generación del pool pertenece"""
+    pool_generation = 0
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones SQLite reutilizables y seguras entre hilos.
+
+    Cada conexión se entrega a un solo hilo a la vez, así que pueden crearse
+    con ``check_same_thread=False`` y circular entre los hilos de Streamlit.
+    Las conexiones trabajan en modo autocommit (``isolation_level=None``);
+    las escrituras agrupadas se hacen con ``transaction()``.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 5, timeout: float = 30.0,
+                 synchronous: str = "NORMAL", cache_size_kb: int = 8192,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        # Cada conexión a ':memory:' es una base distinta; se fuerza una sola
+        self.max_size = 1 if db_path == ":memory:" else max_size
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.cache_size_kb = cache_size_kb
+        self.cached_statements = cached_statements
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=self.max_size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._generation = 0
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Abre una conexión nueva con los PRAGMA de rendimiento aplicados"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=_PooledConnection,
+        )
+        conn.pool_generation = self._generation
+        cursor = conn.cursor()
+        # WAL permite lectores concurrentes mientras otro hilo escribe.
+        # En bases en memoria el modo no aplica y SQLite lo ignora.
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={self.synchronous}")
+        cursor.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"No hay conexiones disponibles tras {self.timeout}s (max_size={self.max_size})"
+            )
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            # Una transacción que quedó abierta no debe filtrarse al siguiente uso
+            conn.rollback()
+        if conn.pool_generation != self._generation:
+            # La conexión es anterior a un close_all(): se descarta
+            conn.close()
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Presta una conexión del pool durante el bloque ``with``"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Presta una conexión dentro de una transacción explícita.
+
+        Hace COMMIT al salir del bloque o ROLLBACK si se produce una excepción.
+        ``immediate`` toma el lock de escritura al inicio para evitar
+        ``SQLITE_BUSY`` a mitad de la transacción.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    def close_all(self):
+        """Cierra todas las conexiones inactivas y reinicia el pool.
+
+        Se usa antes de borrar o reemplazar el archivo de la base de datos.
+        Las conexiones prestadas en ese momento se cierran al devolverse.
+        """
+        with self._lock:
+            self._generation += 1
+            self._created = 0
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+
+    def stats(self) -> Dict:
+        """Estado actual del pool (para diagnóstico)"""
+        return {
+            'db_path': self.db_path,
+            'max_size': self.max_size,
+            'created': self._created,
+            'idle': self._idle.qsize(),
+        }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, **kwargs) -> ConnectionPool:
+    """Devuelve el pool compartido para ``db_path``, creándolo si no existe.
+
+    Streamlit crea un ``DatabaseManager`` nuevo en cada rerun de varias páginas;
+    con este registro todas esas instancias reutilizan las mismas conexiones.
+    """
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, **kwargs)
+            _pools[key] = pool
+        return pool
@@ -3,98 +3,91 @@ DatabaseManager funcional completo para el sistema
 """
 
 import sqlite3
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Sequence
 from datetime import datetime
 import json
+import re
 from pathlib import Path
 
+from database.connection_pool import ConnectionPool, get_pool
+from database.ejercicio_row import EjercicioRow
+from database.migrations import (CONTENT_FINGERPRINT_COLUMN, FTS_COLUMNS, LATEST_VERSION, content_fingerprint,
+                                 fts_disponible, get_schema_version, migrate)
+from database.near_duplicates import DEFAULT_THRESHOLD, NearDuplicateIndex, index_rows
+
+# Campos que se guardan como listas serializadas en JSON
+JSON_LIST_FIELDS = ['subtemas', 'tipo_actividad', 'objetivos_curso', 'competencias_abet',
+                    'habilidades_especificas', 'figuras_asociadas', 'semestre_usado', 'errores_comunes', 'hints',
+                    'palabras_clave', 'conectado_con', 'versiones_alternativas']
+
+# Filtros de obtener_ejercicios/buscar (ver DatabaseManager._build_filter_conditions)
+VALUE_FILTERS = ('id', 'unidad_tematica', 'nivel_dificultad', 'modalidad', 'estado_ia')
+RANGE_FILTERS = ('tiempo_estimado', 'año_creacion', 'fecha_ultimo_uso')
+FLAG_FILTERS = {'con_imagen': 'imagen_path', 'con_solucion': 'solucion_completa', 'con_codigo': 'codigo_python'}
+
+# Ids por consulta en obtener_ejercicios_por_ids (SQLite antiguo admite 999 variables)
+SQLITE_MAX_IDS = 900
+
+# Columnas que necesitan las vistas de listado (selectores, tablas, conteos)
+SUMMARY_COLUMNS = ('id', 'titulo', 'unidad_tematica', 'nivel_dificultad', 'modalidad',
+                   'tiempo_estimado', 'estado_ia', 'fecha_creacion')
+
+
+class EjercicioResumen(NamedTuple):
+    """Fila liviana para listados: solo las columnas que se muestran"""
+    id: int
+    titulo: str
+    unidad_tematica: Optional[str]
+    nivel_dificultad: Optional[str]
+    modalidad: Optional[str]
+    tiempo_estimado: Optional[int]
+    estado_ia: Optional[str]
+    fecha_creacion: Optional[str]
+
+# Pesos BM25 por columna del índice FTS (mismo orden que FTS_COLUMNS)
+FTS_BM25_WEIGHTS = (10.0, 4.0, 1.0, 6.0, 3.0)
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "database/ejercicios.db"):
+    def __init__(self, db_path: str = "database/ejercicios.db", pool: Optional[ConnectionPool] = None):
         self.db_path = db_path
+        # Todas las instancias sobre el mismo archivo comparten el pool de conexiones
+        self.pool = pool or get_pool(db_path)
+        self._columnas_cache: Optional[List[str]] = None
+        self.duplicados = NearDuplicateIndex(self.pool)
         self.init_database()
         
     def init_database(self):
-        """Inicializa la base de datos con las tablas necesarias"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabla principal de ejercicios
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS ejercicios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            titulo TEXT NOT NULL,
-            fuente TEXT,
-            año_creacion INTEGER,
-            unidad_tematica TEXT NOT NULL,
-            subtemas TEXT,
-            nivel_dificultad TEXT,
-            tiempo_estimado INTEGER,
-            prerrequisitos TEXT,
-            tipo_actividad TEXT,
-            modalidad TEXT,
-            objetivos_curso TEXT,
-            competencias_abet TEXT,
-            habilidades_especificas TEXT,
-            enunciado TEXT NOT NULL,
-            datos_entrada TEXT,
-            solucion_completa TEXT,
-            respuesta_final TEXT,
-            codigo_python TEXT,
-            figuras_asociadas TEXT,
-            imagen_path TEXT,
-            solucion_imagen_path TEXT,
-            versiones_alternativas TEXT,
-            parametros_variables TEXT,
-            dificultad_escalable BOOLEAN DEFAULT FALSE,
-            fecha_ultimo_uso DATE,
-            semestre_usado TEXT,
-            rendimiento_estudiantes REAL,
-            comentarios_docente TEXT,
-            palabras_clave TEXT,
-            estado TEXT DEFAULT 'Listo',
-            conectado_con TEXT,
-            inspirado_en TEXT,
-            extensiones_posibles TEXT,
-            errores_comunes TEXT,
-            hints TEXT,
-            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """)
-        
-        # Para compatibilidad con bases de datos existentes, agregar la columna si no existe
-        try:
-            cursor.execute("ALTER TABLE ejercicios ADD COLUMN imagen_path TEXT;")
-        except sqlite3.OperationalError:
-            # La columna ya existe, no hay problema
-            pass
-        
-        try:
-            cursor.execute("ALTER TABLE ejercicios ADD COLUMN solucion_imagen_path TEXT;")
-        except sqlite3.OperationalError:
-            # La columna ya existe, no hay problema
-            pass
-        
-        try:
-            cursor.execute("ALTER TABLE ejercicios ADD COLUMN estado_ia TEXT DEFAULT 'PENDIENTE';")
-        except sqlite3.OperationalError:
-            # La columna ya existe, no hay problema
-            pass
-
-        conn.commit()
-        conn.close()
+        """Inicializa la base de datos aplicando las migraciones pendientes"""
+        # Lectura barata de PRAGMA user_version: si el esquema está al día no se ejecuta DDL
+        with self.pool.connection() as conn:
+            if get_schema_version(conn) >= LATEST_VERSION:
+                return
+        with self.pool.transaction() as conn:
+            migrate(conn)
     
-    def agregar_ejercicio(self, ejercicio_data: Dict) -> int:
-        """Agrega un nuevo ejercicio a la base de datos"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Convertir listas a JSON strings para almacenamiento
-        for field in ['subtemas', 'tipo_actividad', 'objetivos_curso', 'competencias_abet', 
-                     'habilidades_especificas', 'figuras_asociadas', 'semestre_usado', 'errores_comunes', 'hints',
-                     'palabras_clave', 'conectado_con', 'versiones_alternativas']:
+    @staticmethod
+    def _encode_json_fields(ejercicio_data: Dict):
+        """Convierte listas a JSON strings para almacenamiento"""
+        for field in JSON_LIST_FIELDS:
             if field in ejercicio_data and isinstance(ejercicio_data[field], list):
                 ejercicio_data[field] = json.dumps(ejercicio_data[field], ensure_ascii=False)
+
+    @staticmethod
+    def _add_content_fingerprint(ejercicio_data: Dict):
+        """Agrega la huella del contenido importado a un ejercicio nuevo"""
+        if 'enunciado' in ejercicio_data and not ejercicio_data.get(CONTENT_FINGERPRINT_COLUMN):
+            ejercicio_data[CONTENT_FINGERPRINT_COLUMN] = content_fingerprint(
+                ejercicio_data['enunciado'], ejercicio_data.get('solucion_completa'))
+
+    @staticmethod
+    def _rows_from_cursor(cursor: sqlite3.Cursor) -> List[EjercicioRow]:
+        """Filas tipo dict que decodifican las listas JSON de forma diferida"""
+        return EjercicioRow.from_cursor(cursor, JSON_LIST_FIELDS)
+
+    def agregar_ejercicio(self, ejercicio_data: Dict) -> int:
+        """Agrega un nuevo ejercicio a la base de datos"""
+        self._encode_json_fields(ejercicio_data)
+        self._add_content_fingerprint(ejercicio_data)
         
         # Preparar campos y valores
         fields = list(ejercicio_data.keys())
@@ -102,126 +95,322 @@ class DatabaseManager:
         placeholders = ','.join(['?' for _ in fields])
         fields_str = ','.join(fields)
         
-        cursor.execute(f"INSERT INTO ejercicios ({fields_str}) VALUES ({placeholders})", values)
-        
-        ejercicio_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(f"INSERT INTO ejercicios ({fields_str}) VALUES ({placeholders})", values)
+            ejercicio_id = cursor.lastrowid
+            index_rows(conn, [(ejercicio_id, ejercicio_data.get('enunciado'))])
         
         return ejercicio_id
     
-    def obtener_ejercicios(self, filtros: Optional[Dict] = None) -> List[Dict]:
-        """Obtiene ejercicios con filtros opcionales"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM ejercicios"
+    @staticmethod
+    def _build_filter_conditions(filtros: Optional[Dict], alias: str = "") -> tuple:
+        """Traduce los filtros a condiciones SQL parametrizadas.
+
+        Claves reconocidas (las vacías o ``None`` se ignoran):
+
+        - ``id``, ``unidad_tematica``, ``nivel_dificultad``, ``modalidad``, ``estado_ia``:
+          un valor o una lista de valores (``IN``). En ``estado_ia`` la lista
+          puede incluir ``None`` para los ejercicios nunca procesados.
+        - ``tiempo_estimado_min/_max``, ``año_creacion_min/_max``,
+          ``fecha_ultimo_uso_min/_max``: rangos cerrados (acepta ``date``).
+        - ``con_imagen``, ``con_solucion``, ``con_codigo``: ``True`` exige que el
+          campo tenga contenido y ``False`` que esté vacío.
+        """
+        conditions = []
         params = []
-        
-        if filtros:
-            conditions = []
-            if 'unidad_tematica' in filtros and filtros['unidad_tematica']:
-                conditions.append("unidad_tematica = ?")
-                params.append(filtros['unidad_tematica'])
-            if 'nivel_dificultad' in filtros and filtros['nivel_dificultad']:
-                conditions.append("nivel_dificultad = ?")
-                params.append(filtros['nivel_dificultad'])
-            if 'modalidad' in filtros and filtros['modalidad']:
-                conditions.append("modalidad = ?")
-                params.append(filtros['modalidad'])
-            
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-        
-        query += " ORDER BY fecha_creacion DESC"
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
+        if not filtros:
+            return conditions, params
+        
+        prefix = f"{alias}." if alias else ""
+        for field in VALUE_FILTERS:
+            value = filtros.get(field)
+            if value is None or value == "" or value == [] or value == ():
+                continue
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            no_nulos = [v for v in values if v is not None]
+            partes = []
+            if no_nulos:
+                partes.append(f"{prefix}{field} IN ({','.join('?' for _ in no_nulos)})")
+                params.extend(no_nulos)
+            if len(no_nulos) < len(values):
+                partes.append(f"{prefix}{field} IS NULL")
+            conditions.append(partes[0] if len(partes) == 1 else f"({' OR '.join(partes)})")
+        
+        for field in RANGE_FILTERS:
+            for suffix, op in (('_min', '>='), ('_max', '<=')):
+                value = filtros.get(field + suffix)
+                if value is None or value == "":
+                    continue
+                if hasattr(value, 'isoformat'):
+                    value = value.isoformat()
+                conditions.append(f"{prefix}{field} {op} ?")
+                params.append(value)
+        
+        for flag, column in FLAG_FILTERS.items():
+            value = filtros.get(flag)
+            if value is None:
+                continue
+            if value:
+                conditions.append(f"COALESCE({prefix}{column}, '') != ''")
+            else:
+                conditions.append(f"COALESCE({prefix}{column}, '') = ''")
+        return conditions, params
+
+    def _columnas_tabla(self) -> List[str]:
+        """Columnas de la tabla ejercicios (se consultan una vez por instancia)"""
+        if self._columnas_cache is None:
+            with self.pool.connection() as conn:
+                self._columnas_cache = [row[1] for row in conn.execute("PRAGMA table_info(ejercicios)")]
+        return self._columnas_cache
+
+    def _select_ejercicios(self, select: str, filtros: Optional[Dict], limit: Optional[int],
+                           offset: int, after_id: Optional[int], row_builder):
+        """SELECT paginado sobre ejercicios, ordenado del más reciente al más antiguo.
+
+        ``after_id`` pagina por keyset: devuelve las filas que siguen al ejercicio
+        con ese id en el mismo orden, sin recorrer las páginas anteriores.
+        """
+        query = f"SELECT {select} FROM ejercicios"
+        conditions, params = self._build_filter_conditions(filtros)
+        if after_id is not None:
+            conditions.append("(fecha_creacion, id) < (SELECT fecha_creacion, id FROM ejercicios WHERE id = ?)")
+            params.append(after_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        query += " ORDER BY fecha_creacion DESC, id DESC"
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params += [limit if limit is not None else -1, offset]
+        
+        with self.pool.connection() as conn:
+            return row_builder(conn.execute(query, params))
+
+    def obtener_ejercicios(self, filtros: Optional[Dict] = None, columns: Optional[Sequence[str]] = None,
+                           limit: Optional[int] = None, offset: int = 0,
+                           after_id: Optional[int] = None) -> List[Dict]:
+        """Obtiene ejercicios con filtros opcionales.
+
+        ``columns`` limita las columnas leídas (el ``id`` se incluye siempre);
+        ``limit``/``offset`` o ``after_id`` paginan el resultado en SQL.
+        """
+        if columns:
+            validas = set(self._columnas_tabla())
+            invalidas = [c for c in columns if c not in validas]
+            if invalidas:
+                raise ValueError(f"Columnas desconocidas: {', '.join(invalidas)}")
+            select = ', '.join(['id'] + [c for c in columns if c != 'id'])
+        else:
+            select = "*"
+        
+        # Las listas JSON se decodifican recién cuando se accede a ellas
+        return self._select_ejercicios(select, filtros, limit, offset, after_id, self._rows_from_cursor)
+    
+    def obtener_resumenes(self, filtros: Optional[Dict] = None, limit: Optional[int] = None,
+                          offset: int = 0, after_id: Optional[int] = None) -> List[EjercicioResumen]:
+        """Versión liviana de obtener_ejercicios para listados y selectores"""
+        return self._select_ejercicios(', '.join(SUMMARY_COLUMNS), filtros, limit, offset, after_id,
+                                       lambda cursor: [EjercicioResumen(*row) for row in cursor])
+
+    def contar_ejercicios(self, filtros: Optional[Dict] = None) -> int:
+        """Cantidad de ejercicios que cumplen los filtros (para paginar)"""
+        query = "SELECT COUNT(*) FROM ejercicios"
+        conditions, params = self._build_filter_conditions(filtros)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self.pool.connection() as conn:
+            return conn.execute(query, params).fetchone()[0]
+    
+    def obtener_ejercicios_por_ids(self, ids: Sequence[int], preserve_order: bool = True) -> List[Dict]:
+        """Obtiene varios ejercicios por id con consultas ``WHERE id IN (...)``.
+
+        Los ids se consultan en bloques de SQLITE_MAX_IDS para no superar el
+        límite de variables de SQLite. Con ``preserve_order`` el resultado sigue
+        el orden de ``ids``; los ids inexistentes se omiten.
+        """
+        unicos = list(dict.fromkeys(ids))
         ejercicios = []
-        for row in rows:
-            ejercicio = dict(row)
-            # Convertir JSON strings de vuelta a listas
-            for field in ['subtemas', 'tipo_actividad', 'objetivos_curso', 'competencias_abet',
-                         'habilidades_especificas', 'figuras_asociadas', 'semestre_usado', 'errores_comunes', 'hints',
-                         'palabras_clave', 'conectado_con', 'versiones_alternativas']:
-                if ejercicio.get(field):
-                    try:
-                        ejercicio[field] = json.loads(ejercicio[field])
-                    except:
-                        ejercicio[field] = []
-            ejercicios.append(ejercicio)
-        
-        conn.close()
+        with self.pool.connection() as conn:
+            for inicio in range(0, len(unicos), SQLITE_MAX_IDS):
+                bloque = unicos[inicio:inicio + SQLITE_MAX_IDS]
+                query = f"SELECT * FROM ejercicios WHERE id IN ({','.join('?' for _ in bloque)})"
+                ejercicios.extend(self._rows_from_cursor(conn.execute(query, bloque)))
+        
+        if preserve_order:
+            por_id = {ejercicio['id']: ejercicio for ejercicio in ejercicios}
+            ejercicios = [por_id[i] for i in unicos if i in por_id]
         return ejercicios
-    
+
     def obtener_ejercicio_por_id(self, ejercicio_id: int) -> Optional[Dict]:
         """Obtiene un ejercicio específico por ID"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self.pool.connection() as conn:
+            rows = self._rows_from_cursor(conn.execute("SELECT * FROM ejercicios WHERE id = ?", (ejercicio_id,)))
         
-        cursor.execute("SELECT * FROM ejercicios WHERE id = ?", (ejercicio_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            ejercicio = dict(row)
-            # Convertir JSON strings
-            for field in ['subtemas', 'tipo_actividad', 'objetivos_curso', 'competencias_abet',
-                         'habilidades_especificas', 'figuras_asociadas', 'semestre_usado', 'errores_comunes', 'hints',
-                         'palabras_clave', 'conectado_con', 'versiones_alternativas']:
-                if ejercicio.get(field):
-                    try:
-                        ejercicio[field] = json.loads(ejercicio[field])
-                    except:
-                        ejercicio[field] = []
-            conn.close()
-            return ejercicio
-        
-        conn.close()
-        return None
-    
+        return rows[0] if rows else None
+
+    def obtener_ids_por_huella(self, huellas: Sequence[str]) -> Dict[str, int]:
+        """Id del ejercicio más antiguo con cada huella de contenido (las ausentes se omiten)"""
+        unicas = list(dict.fromkeys(huellas))
+        por_huella: Dict[str, int] = {}
+        with self.pool.connection() as conn:
+            for inicio in range(0, len(unicas), SQLITE_MAX_IDS):
+                bloque = unicas[inicio:inicio + SQLITE_MAX_IDS]
+                query = (f"SELECT {CONTENT_FINGERPRINT_COLUMN}, MIN(id) FROM ejercicios "
+                         f"WHERE {CONTENT_FINGERPRINT_COLUMN} IN ({','.join('?' for _ in bloque)}) "
+                         f"GROUP BY {CONTENT_FINGERPRINT_COLUMN}")
+                por_huella.update(conn.execute(query, bloque).fetchall())
+        return por_huella
+
+    def obtener_huellas_por_fuente(self, fuente: str) -> List[tuple]:
+        """``(id, huella)`` de los ejercicios de una fuente, en orden de inserción"""
+        with self.pool.connection() as conn:
+            return conn.execute(
+                f"SELECT id, {CONTENT_FINGERPRINT_COLUMN} FROM ejercicios WHERE fuente = ? ORDER BY id",
+                (fuente,)).fetchall()
+
+    def buscar_similares(self, ejercicio_id: int, umbral: float = DEFAULT_THRESHOLD, limit: int = 10) -> List[Dict]:
+        """Ejercicios casi duplicados de uno dado, con su ``similitud`` estimada (0 a 1)"""
+        similares = self.duplicados.similar(ejercicio_id, umbral, limit)
+        filas = self.obtener_ejercicios_por_ids([i for i, _ in similares])
+        similitud = dict(similares)
+        for fila in filas:
+            fila['similitud'] = similitud[fila['id']]
+        return filas
+
+    def reporte_duplicados(self, umbral: float = DEFAULT_THRESHOLD) -> List[Dict]:
+        """Grupos de ejercicios casi duplicados de toda la base.
+
+        Cada grupo tiene ``ejercicios`` (id, título, fuente y unidad) y ``pares``
+        ``(id_a, id_b, similitud)``; primero los grupos más grandes.
+        """
+        self.duplicados.sync()
+        grupos = self.duplicados.report(umbral)
+        ids = [i for grupo in grupos for i in grupo['ids']]
+        with self.pool.connection() as conn:
+            resumen = {}
+            for inicio in range(0, len(ids), SQLITE_MAX_IDS):
+                bloque = ids[inicio:inicio + SQLITE_MAX_IDS]
+                cursor = conn.execute(
+                    "SELECT id, titulo, fuente, unidad_tematica FROM ejercicios "
+                    f"WHERE id IN ({','.join('?' for _ in bloque)})", bloque)
+                resumen.update((fila['id'], fila) for fila in self._rows_from_cursor(cursor))
+        return [{'ejercicios': [resumen[i] for i in grupo['ids'] if i in resumen], 'pares': grupo['pares']}
+                for grupo in grupos]
+
+    @staticmethod
+    def _fts_query(texto: str) -> str:
+        """Convierte el texto del usuario en una consulta FTS5 segura.
+
+        Cada palabra se cita (para neutralizar la sintaxis de FTS5) y se busca
+        como prefijo; todas deben aparecer en el ejercicio.
+        """
+        palabras = re.findall(r'\w+', texto)
+        return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+    def _busqueda_sql(self, conn: sqlite3.Connection, texto: str, filtros: Optional[Dict]) -> Optional[tuple]:
+        """``(FROM ... WHERE ..., params, usa_fts)`` de una búsqueda de texto; None si no hay palabras"""
+        fts_query = self._fts_query(texto or "")
+        if not fts_query:
+            return None
+        
+        conditions, params = self._build_filter_conditions(filtros, alias="e")
+        if fts_disponible(conn):
+            sql = """
+                FROM ejercicios_fts
+                JOIN ejercicios e ON e.id = ejercicios_fts.rowid
+                WHERE ejercicios_fts MATCH ?
+                """
+            if conditions:
+                sql += " AND " + " AND ".join(conditions)
+            return sql, [fts_query] + params, True
+        # Respaldo sin FTS5: cada palabra debe aparecer en alguna columna
+        for palabra in re.findall(r'\w+', texto):
+            conditions.append("(" + " OR ".join(f"e.{c} LIKE ?" for c in FTS_COLUMNS) + ")")
+            params.extend([f"%{palabra}%"] * len(FTS_COLUMNS))
+        return " FROM ejercicios e WHERE " + " AND ".join(conditions), params, False
+
+    def buscar(self, texto: str, filtros: Optional[Dict] = None, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Búsqueda de texto completo en título, enunciado, solución, palabras clave y subtemas.
+
+        Los resultados vienen ordenados por relevancia (BM25) e incluyen un
+        ``snippet`` con los términos encontrados resaltados en Markdown.
+        """
+        with self.pool.connection() as conn:
+            busqueda = self._busqueda_sql(conn, texto, filtros)
+            if busqueda is None:
+                return []
+            sql, params, usa_fts = busqueda
+            if usa_fts:
+                weights = ', '.join(str(w) for w in FTS_BM25_WEIGHTS)
+                query = (f"SELECT e.*, snippet(ejercicios_fts, -1, '**', '**', '…', 16) AS snippet, "
+                         f"bm25(ejercicios_fts, {weights}) AS rank {sql} ORDER BY rank LIMIT ? OFFSET ?")
+            else:
+                query = f"SELECT e.*, NULL AS snippet, 0 AS rank {sql} ORDER BY e.fecha_creacion DESC LIMIT ? OFFSET ?"
+            params += [limit if limit is not None else -1, offset]
+            return self._rows_from_cursor(conn.execute(query, params))
+
+    def contar_busqueda(self, texto: str, filtros: Optional[Dict] = None) -> int:
+        """Cantidad total de resultados de ``buscar`` (para paginar)"""
+        with self.pool.connection() as conn:
+            busqueda = self._busqueda_sql(conn, texto, filtros)
+            if busqueda is None:
+                return 0
+            sql, params, _ = busqueda
+            return conn.execute(f"SELECT COUNT(*) {sql}", params).fetchone()[0]
+
     def actualizar_ejercicio(self, ejercicio_id: int, ejercicio_data: Dict) -> bool:
         """Actualiza un ejercicio existente"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Convertir listas a JSON strings para almacenamiento
-        for field in ['subtemas', 'tipo_actividad', 'objetivos_curso', 'competencias_abet', 
-                     'habilidades_especificas', 'figuras_asociadas', 'semestre_usado', 'errores_comunes', 'hints',
-                     'palabras_clave', 'conectado_con', 'versiones_alternativas']:
-            if field in ejercicio_data and isinstance(ejercicio_data[field], list):
-                ejercicio_data[field] = json.dumps(ejercicio_data[field], ensure_ascii=False)
+        self._encode_json_fields(ejercicio_data)
         
         ejercicio_data['fecha_modificacion'] = datetime.now().isoformat()
         
         fields = ', '.join([f"{k} = ?" for k in ejercicio_data.keys()])
         values = list(ejercicio_data.values()) + [ejercicio_id]
         
-        cursor.execute(f"UPDATE ejercicios SET {fields} WHERE id = ?", values)
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(f"UPDATE ejercicios SET {fields} WHERE id = ?", values)
+            success = cursor.rowcount > 0
+            if success and 'enunciado' in ejercicio_data:
+                index_rows(conn, [(ejercicio_id, ejercicio_data['enunciado'])])
         
         return success
     
+    def actualizar_ejercicios(self, actualizaciones: Sequence, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Actualiza varios ejercicios ``(id, datos)`` en una sola transacción.
+
+        Con ``conn`` las sentencias se ejecutan en la transacción del llamador
+        (p. ej. para registrar algo más en el mismo COMMIT). Devuelve la
+        cantidad de filas actualizadas.
+        """
+        if conn is None:
+            with self.pool.transaction() as conn:
+                return self.actualizar_ejercicios(actualizaciones, conn)
+        
+        fecha = datetime.now().isoformat()
+        actualizadas = 0
+        for ejercicio_id, ejercicio_data in actualizaciones:
+            data = dict(ejercicio_data)
+            self._encode_json_fields(data)
+            data['fecha_modificacion'] = fecha
+            fields = ', '.join([f"{k} = ?" for k in data.keys()])
+            cursor = conn.execute(f"UPDATE ejercicios SET {fields} WHERE id = ?", list(data.values()) + [ejercicio_id])
+            actualizadas += cursor.rowcount
+            if cursor.rowcount and 'enunciado' in data:
+                index_rows(conn, [(ejercicio_id, data['enunciado'])])
+        return actualizadas
+    
     def eliminar_ejercicio(self, ejercicio_id: int) -> bool:
         """Elimina un ejercicio y sus imágenes asociadas."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 1. Obtener las rutas de las imágenes antes de borrar el registro
-        cursor.execute("SELECT imagen_path, solucion_imagen_path FROM ejercicios WHERE id = ?", (ejercicio_id,))
-        paths = cursor.fetchone()
-        
-        # 2. Eliminar el registro de la base de datos
-        cursor.execute("DELETE FROM ejercicios WHERE id = ?", (ejercicio_id,))
-        success = cursor.rowcount > 0
-        
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as conn:
+            cursor = conn.cursor()
+            
+            # 1. Obtener las rutas de las imágenes antes de borrar el registro
+            cursor.execute("SELECT imagen_path, solucion_imagen_path FROM ejercicios WHERE id = ?", (ejercicio_id,))
+            paths = cursor.fetchone()
+            
+            # 2. Eliminar el registro de la base de datos
+            cursor.execute("DELETE FROM ejercicios WHERE id = ?", (ejercicio_id,))
+            success = cursor.rowcount > 0
         
         # 3. Si se eliminó de la BD, eliminar los archivos de imagen
         if success and paths:
@@ -235,73 +424,55 @@ class DatabaseManager:
 
     def actualizar_estado_ia(self, ejercicio_id: int, estado: str) -> bool:
         """Actualiza solo el estado de enriquecimiento de un ejercicio."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("UPDATE ejercicios SET estado_ia = ? WHERE id = ?", (estado, ejercicio_id))
-        success = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as conn:
+            cursor = conn.execute("UPDATE ejercicios SET estado_ia = ? WHERE id = ?", (estado, ejercicio_id))
+            success = cursor.rowcount > 0
         return success
 
     def obtener_estadisticas(self) -> Dict:
-        """Obtiene estadísticas generales de la base de datos"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Total de ejercicios
-        cursor.execute("SELECT COUNT(*) FROM ejercicios")
-        total_ejercicios = cursor.fetchone()[0]
-        
-        # Por unidad temática
-        cursor.execute("""
-        SELECT unidad_tematica, COUNT(*) 
-        FROM ejercicios 
-        WHERE unidad_tematica IS NOT NULL
-        GROUP BY unidad_tematica
-        """)
-        por_unidad = dict(cursor.fetchall())
-        
-        # Por dificultad
-        cursor.execute("""
-        SELECT nivel_dificultad, COUNT(*) 
-        FROM ejercicios 
-        WHERE nivel_dificultad IS NOT NULL
-        GROUP BY nivel_dificultad
-        """)
-        por_dificultad = dict(cursor.fetchall())
+        """Obtiene estadísticas generales de la base de datos.
+
+        Se leen de la tabla ``estadisticas``, que los triggers mantienen al día
+        en cada insert/update/delete, así que no se recorre la tabla ejercicios.
+        """
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT dimension, valor, cantidad FROM estadisticas WHERE cantidad != 0").fetchall()
         
-        # Por modalidad
-        cursor.execute("""
-        SELECT modalidad, COUNT(*) 
-        FROM ejercicios 
-        WHERE modalidad IS NOT NULL
-        GROUP BY modalidad
-        """)
-        por_modalidad = dict(cursor.fetchall())
+        conteos: Dict[str, Dict] = {}
+        for dimension, valor, cantidad in rows:
+            conteos.setdefault(dimension, {})[valor] = cantidad
         
-        conn.close()
+        def escalar(dimension: str) -> int:
+            return conteos.get(dimension, {}).get('', 0)
         
+        con_tiempo = escalar('con_tiempo')
+        por_estado_ia = conteos.get('estado_ia', {})
         return {
-            'total_ejercicios': total_ejercicios,
-            'por_unidad': por_unidad,
-            'por_dificultad': por_dificultad,
-            'por_modalidad': por_modalidad
+            'total_ejercicios': escalar('total'),
+            'por_unidad': conteos.get('unidad_tematica', {}),
+            'por_dificultad': conteos.get('nivel_dificultad', {}),
+            'por_modalidad': conteos.get('modalidad', {}),
+            'por_estado': conteos.get('estado', {}),
+            # '' agrupa los ejercicios con estado_ia NULL
+            'por_estado_ia': {(k or None): v for k, v in por_estado_ia.items()},
+            'con_solucion': escalar('con_solucion'),
+            'con_codigo': escalar('con_codigo'),
+            'con_imagen': escalar('con_imagen'),
+            'con_imagen_solucion': escalar('con_imagen_solucion'),
+            'tiempo_promedio': round(escalar('tiempo_total') / con_tiempo) if con_tiempo else 0,
         }
     
     def obtener_unidades_tematicas(self) -> List[str]:
         """Obtiene la lista de unidades temáticas únicas"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT DISTINCT unidad_tematica 
-        FROM ejercicios 
-        WHERE unidad_tematica IS NOT NULL 
-        ORDER BY unidad_tematica
-        """)
-        
-        unidades = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        with self.pool.connection() as conn:
+            cursor = conn.execute("""
+            SELECT DISTINCT unidad_tematica 
+            FROM ejercicios 
+            WHERE unidad_tematica IS NOT NULL 
+            ORDER BY unidad_tematica
+            """)
+            
+            unidades = [row[0] for row in cursor.fetchall()]
         
         # Si no hay unidades, retornar lista por defecto
         if not unidades:
@@ -319,33 +490,77 @@ class DatabaseManager:
     
     def registrar_uso(self, ejercicio_id: int, tipo_actividad: str, semestre: str, notas: str = ""):
         """Registra el uso de un ejercicio"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Actualizar fecha_ultimo_uso
-        cursor.execute("""
-        UPDATE ejercicios 
-        SET fecha_ultimo_uso = ? 
-        WHERE id = ?
-        """, (datetime.now().date(), ejercicio_id))
-        
-        conn.commit()
-        conn.close()
+        with self.pool.transaction() as conn:
+            conn.execute("""
+            UPDATE ejercicios 
+            SET fecha_ultimo_uso = ? 
+            WHERE id = ?
+            """, (datetime.now().date().isoformat(), ejercicio_id))
     
     # Métodos adicionales para importación
-    def batch_import_exercises(self, exercises: List[Dict], archivo_origen: str = '', usuario: str = 'Sistema') -> Dict:
-        """Importa múltiples ejercicios"""
-        imported = 0
+    def batch_import_exercises(self, exercises: List[Dict], archivo_origen: str = '', usuario: str = 'Sistema',
+                               conn: Optional[sqlite3.Connection] = None) -> Dict:
+        """Importa múltiples ejercicios en una sola transacción.
+
+        Las filas se agrupan por conjunto de columnas y cada grupo se inserta con
+        ``executemany``. Si un grupo falla, se reintenta fila por fila dentro de
+        un SAVEPOINT para reportar el error de cada ejercicio sin perder el resto.
+        Con ``conn`` se usa la transacción del llamador.
+        """
+        if conn is None:
+            with self.pool.transaction() as conn:
+                return self.batch_import_exercises(exercises, archivo_origen, usuario, conn)
+
+        ids: List[Optional[int]] = [None] * len(exercises)
         errors = []
-        
-        for exercise in exercises:
+
+        # Agrupar por columnas, serializando las listas una sola vez
+        grupos: Dict[tuple, List[tuple]] = {}
+        for index, exercise in enumerate(exercises):
+            data = dict(exercise)
+            self._encode_json_fields(data)
+            self._add_content_fingerprint(data)
+            grupos.setdefault(tuple(data.keys()), []).append((index, tuple(data.values())))
+
+        cursor = conn.cursor()
+        for fields, filas in grupos.items():
+            query = f"INSERT INTO ejercicios ({','.join(fields)}) VALUES ({','.join('?' for _ in fields)})"
+            last_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM ejercicios").fetchone()[0]
+
+            cursor.execute("SAVEPOINT grupo")
             try:
-                self.agregar_ejercicio(exercise)
-                imported += 1
-            except Exception as e:
-                errors.append(str(e))
-        
+                cursor.executemany(query, [values for _, values in filas])
+            except sqlite3.Error:
+                cursor.execute("ROLLBACK TO grupo")
+                cursor.execute("RELEASE grupo")
+            else:
+                cursor.execute("RELEASE grupo")
+                # Con AUTOINCREMENT y el lock de escritura tomado, los ids nuevos son
+                # consecutivos y respetan el orden de inserción del grupo
+                nuevos = [row[0] for row in cursor.execute(
+                    "SELECT id FROM ejercicios WHERE id > ? ORDER BY id", (last_id,))]
+                for (index, _), ejercicio_id in zip(filas, nuevos):
+                    ids[index] = ejercicio_id
+                continue
+
+            # El grupo falló: insertar fila por fila para aislar los errores
+            for index, values in filas:
+                cursor.execute("SAVEPOINT fila")
+                try:
+                    cursor.execute(query, values)
+                    ids[index] = cursor.lastrowid
+                except sqlite3.Error as e:
+                    cursor.execute("ROLLBACK TO fila")
+                    titulo = exercises[index].get('titulo', f"#{index + 1}")
+                    errors.append(f"Error con '{titulo}': {str(e)}")
+                cursor.execute("RELEASE fila")
+
+        index_rows(conn, [(ejercicio_id, exercises[index].get('enunciado'))
+                          for index, ejercicio_id in enumerate(ids) if ejercicio_id is not None])
+        ids_insertados = [ejercicio_id for ejercicio_id in ids if ejercicio_id is not None]
         return {
-            'imported': imported,
-            'errors': errors
+            'imported': len(ids_insertados),
+            'errors': errors,
+            'ids_insertados': ids_insertados
         }
@@ -0,0 +1,130 @@
+"""
+Fila de ejercicio con decodificación JSON diferida
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import json
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+_MISSING = object()
+
+
+class EjercicioRow(MutableMapping):
+    """Ejercicio leído de la BD que se comporta como el ``dict`` de siempre.
+
+    Guarda los valores crudos de la fila en una lista y solo ejecuta
+    ``json.loads`` sobre una columna de lista (subtemas, hints, ...) la primera
+    vez que se accede a ella. Las filas de una misma consulta comparten el
+    índice de columnas, así que cada fila cuesta una lista y un entero.
+    """
+
+    __slots__ = ('_index', '_values', '_pending', '_extra')
+
+    def __init__(self, index: Dict[str, int], values: List[Any], pending: int):
+        self._index = index        # columna -> posición (compartido entre filas)
+        self._values = values      # valores crudos de SQLite
+        self._pending = pending    # bit i encendido = columna i aún sin decodificar
+        self._extra = None         # claves agregadas por el llamador
+
+    @staticmethod
+    def build_layout(columns: Sequence[str], json_fields: Iterable[str]) -> Tuple[Dict[str, int], int]:
+        """Índice de columnas y máscara de columnas JSON para una consulta"""
+        index = {name: i for i, name in enumerate(columns)}
+        mask = 0
+        for field in json_fields:
+            if field in index:
+                mask |= 1 << index[field]
+        return index, mask
+
+    @classmethod
+    def from_cursor(cls, cursor, json_fields: Iterable[str]) -> List['EjercicioRow']:
+        """Materializa todas las filas pendientes de un cursor"""
+        index, mask = cls.build_layout([d[0] for d in cursor.description], json_fields)
+        return [cls(index, list(row), mask) for row in cursor]
+
+    def _decode(self, i: int) -> Any:
+        value = self._values[i]
+        self._pending &= ~(1 << i)
+        if value:
+            try:
+                value = json.loads(value)
+            except (TypeError, ValueError):
+                value = []
+            self._values[i] = value
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        i = self._index.get(key)
+        if i is None:
+            if self._extra is not None and key in self._extra:
+                return self._extra[key]
+            raise KeyError(key)
+        if self._pending >> i & 1:
+            return self._decode(i)
+        value = self._values[i]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        i = self._index.get(key)
+        if i is None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+            return
+        self._pending &= ~(1 << i)
+        self._values[i] = value
+
+    def __delitem__(self, key: str):
+        i = self._index.get(key)
+        if i is None:
+            if self._extra is None or key not in self._extra:
+                raise KeyError(key)
+            del self._extra[key]
+            return
+        if self._values[i] is _MISSING:
+            raise KeyError(key)
+        self._pending &= ~(1 << i)
+        self._values[i] = _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        for key, i in self._index.items():
+            if self._values[i] is not _MISSING:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        count = sum(1 for v in self._values if v is not _MISSING)
+        return count + (len(self._extra) if self._extra else 0)
+
+    def __contains__(self, key: object) -> bool:
+        i = self._index.get(key)
+        if i is None:
+            return self._extra is not None and key in self._extra
+        return self._values[i] is not _MISSING
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Atajo sobre Mapping.get, que pasa por una excepción cuando falta la clave
+        if key in self:
+            return self[key]
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copia como ``dict`` normal con todas las columnas decodificadas"""
+        return {key: self[key] for key in self}
+
+    def __repr__(self) -> str:
+        return f"EjercicioRow({self.to_dict()!r})"
+
+    def __getstate__(self):
+        # Se serializa como dict decodificado (p. ej. para st.session_state)
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self._index = {key: i for i, key in enumerate(state)}
+        self._values = list(state.values())
+        self._pending = 0
+        self._extra = None
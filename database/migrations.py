@@ -0,0 +1,452 @@
+"""
+Migraciones versionadas del esquema de la base de datos
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+La versión aplicada se guarda en ``PRAGMA user_version``. Cada migración corre
+dentro de la transacción de ``migrate`` y nunca se modifica una vez publicada:
+los cambios nuevos se agregan como una migración adicional al final de MIGRATIONS.
+"""
+
+import hashlib
+import re
+import sqlite3
+import unicodedata
+from typing import Callable, List, Optional, Tuple
+
+from database.near_duplicates import index_rows
+
+
+def _m001_esquema_base(cursor: sqlite3.Cursor):
+    """Tabla principal y columnas agregadas en versiones anteriores"""
+    # Tabla principal de ejercicios
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ejercicios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        titulo TEXT NOT NULL,
+        fuente TEXT,
+        año_creacion INTEGER,
+        unidad_tematica TEXT NOT NULL,
+        subtemas TEXT,
+        nivel_dificultad TEXT,
+        tiempo_estimado INTEGER,
+        prerrequisitos TEXT,
+        tipo_actividad TEXT,
+        modalidad TEXT,
+        objetivos_curso TEXT,
+        competencias_abet TEXT,
+        habilidades_especificas TEXT,
+        enunciado TEXT NOT NULL,
+        datos_entrada TEXT,
+        solucion_completa TEXT,
+        respuesta_final TEXT,
+        codigo_python TEXT,
+        figuras_asociadas TEXT,
+        imagen_path TEXT,
+        solucion_imagen_path TEXT,
+        versiones_alternativas TEXT,
+        parametros_variables TEXT,
+        dificultad_escalable BOOLEAN DEFAULT FALSE,
+        fecha_ultimo_uso DATE,
+        semestre_usado TEXT,
+        rendimiento_estudiantes REAL,
+        comentarios_docente TEXT,
+        palabras_clave TEXT,
+        estado TEXT DEFAULT 'Listo',
+        conectado_con TEXT,
+        inspirado_en TEXT,
+        extensiones_posibles TEXT,
+        errores_comunes TEXT,
+        hints TEXT,
+        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    
+    # Para compatibilidad con bases de datos existentes, agregar la columna si no existe
+    try:
+        cursor.execute("ALTER TABLE ejercicios ADD COLUMN imagen_path TEXT;")
+    except sqlite3.OperationalError:
+        # La columna ya existe, no hay problema
+        pass
+    
+    try:
+        cursor.execute("ALTER TABLE ejercicios ADD COLUMN solucion_imagen_path TEXT;")
+    except sqlite3.OperationalError:
+        # La columna ya existe, no hay problema
+        pass
+    
+    try:
+        cursor.execute("ALTER TABLE ejercicios ADD COLUMN estado_ia TEXT DEFAULT 'PENDIENTE';")
+    except sqlite3.OperationalError:
+        # La columna ya existe, no hay problema
+        pass
+
+
+def _m002_indices(cursor: sqlite3.Cursor):
+    """Índices para los filtros, agrupaciones y el orden por fecha de los listados"""
+    # Los filtros por unidad/dificultad/modalidad de obtener_ejercicios terminan en
+    # ORDER BY fecha_creacion DESC: incluir la fecha evita el ordenamiento temporal.
+    # Las mismas columnas iniciales cubren los GROUP BY de obtener_estadisticas.
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_unidad_fecha
+    ON ejercicios (unidad_tematica, fecha_creacion)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_unidad_dificultad_fecha
+    ON ejercicios (unidad_tematica, nivel_dificultad, fecha_creacion)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_dificultad_fecha
+    ON ejercicios (nivel_dificultad, fecha_creacion)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_modalidad_fecha
+    ON ejercicios (modalidad, fecha_creacion)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_estado_ia
+    ON ejercicios (estado_ia, id)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_fecha_creacion
+    ON ejercicios (fecha_creacion)
+    """)
+    cursor.execute("ANALYZE ejercicios")
+
+
+def _m004_indices_rangos(cursor: sqlite3.Cursor):
+    """Índices para los filtros por rango de tiempo estimado y último uso"""
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_tiempo_estimado
+    ON ejercicios (tiempo_estimado)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_fecha_ultimo_uso
+    ON ejercicios (fecha_ultimo_uso)
+    """)
+
+
+FTS_COLUMNS = ['titulo', 'enunciado', 'solucion_completa', 'palabras_clave', 'subtemas']
+
+
+def fts_disponible(conn: sqlite3.Connection) -> bool:
+    """Indica si la tabla de búsqueda de texto completo existe en esta base"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ejercicios_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def _m003_busqueda_fts(cursor: sqlite3.Cursor):
+    """Índice FTS5 sobre el texto de los ejercicios, sincronizado por triggers"""
+    columnas = ', '.join(FTS_COLUMNS)
+    nuevos = ', '.join(f"new.{c}" for c in FTS_COLUMNS)
+    viejos = ', '.join(f"old.{c}" for c in FTS_COLUMNS)
+    try:
+        # remove_diacritics 2: 'convolucion' encuentra 'convolución' y viceversa
+        cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS ejercicios_fts USING fts5(
+            {columnas},
+            content='ejercicios', content_rowid='id',
+            tokenize="unicode61 remove_diacritics 2",
+            prefix='2 3'
+        )
+        """)
+    except sqlite3.OperationalError as e:
+        if 'fts5' not in str(e):
+            raise
+        # SQLite compilado sin FTS5: DatabaseManager.buscar usa LIKE como respaldo
+        return
+
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS ejercicios_fts_ai AFTER INSERT ON ejercicios BEGIN
+        INSERT INTO ejercicios_fts (rowid, {columnas}) VALUES (new.id, {nuevos});
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS ejercicios_fts_ad AFTER DELETE ON ejercicios BEGIN
+        INSERT INTO ejercicios_fts (ejercicios_fts, rowid, {columnas}) VALUES ('delete', old.id, {viejos});
+    END
+    """)
+    # Solo se reindexa si cambia alguna columna indexada (no con estado_ia, fechas, etc.)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS ejercicios_fts_au AFTER UPDATE OF {columnas} ON ejercicios BEGIN
+        INSERT INTO ejercicios_fts (ejercicios_fts, rowid, {columnas}) VALUES ('delete', old.id, {viejos});
+        INSERT INTO ejercicios_fts (rowid, {columnas}) VALUES (new.id, {nuevos});
+    END
+    """)
+    cursor.execute("INSERT INTO ejercicios_fts (ejercicios_fts) VALUES ('rebuild')")
+
+
+# Conteos que mantienen los triggers de la tabla estadisticas:
+# (dimensión, valor, condición para contar la fila, cantidad que aporta).
+# {r} es la fila (new/old en los triggers). estado_ia NULL se cuenta como ''.
+STATS_DIMENSIONS = [
+    ('total', "''", "1", "1"),
+    ('unidad_tematica', "{r}.unidad_tematica", "{r}.unidad_tematica IS NOT NULL", "1"),
+    ('nivel_dificultad', "{r}.nivel_dificultad", "{r}.nivel_dificultad IS NOT NULL", "1"),
+    ('modalidad', "{r}.modalidad", "{r}.modalidad IS NOT NULL", "1"),
+    ('estado', "{r}.estado", "{r}.estado IS NOT NULL", "1"),
+    ('estado_ia', "COALESCE({r}.estado_ia, '')", "1", "1"),
+    ('con_solucion', "''", "COALESCE({r}.solucion_completa, '') != ''", "1"),
+    ('con_codigo', "''", "COALESCE({r}.codigo_python, '') != ''", "1"),
+    ('con_imagen', "''", "COALESCE({r}.imagen_path, '') != ''", "1"),
+    ('con_imagen_solucion', "''", "COALESCE({r}.solucion_imagen_path, '') != ''", "1"),
+    ('con_tiempo', "''", "{r}.tiempo_estimado > 0", "1"),
+    ('tiempo_total', "''", "{r}.tiempo_estimado > 0", "CAST({r}.tiempo_estimado AS INTEGER)"),
+]
+
+STATS_SOURCE_COLUMNS = ['unidad_tematica', 'nivel_dificultad', 'modalidad', 'estado', 'estado_ia',
+                        'solucion_completa', 'codigo_python', 'imagen_path', 'solucion_imagen_path',
+                        'tiempo_estimado']
+
+
+def _stats_upserts(row: str, sign: int) -> str:
+    """Sentencias de trigger que suman (sign=1) o restan (sign=-1) una fila"""
+    sentencias = []
+    for dimension, valor, condicion, cantidad in STATS_DIMENSIONS:
+        sentencias.append(
+            f"INSERT INTO estadisticas (dimension, valor, cantidad) "
+            f"SELECT '{dimension}', {valor.format(r=row)}, {sign} * ({cantidad.format(r=row)}) "
+            f"WHERE {condicion.format(r=row)} "
+            f"ON CONFLICT (dimension, valor) DO UPDATE SET cantidad = cantidad + excluded.cantidad;"
+        )
+    return "\n        ".join(sentencias)
+
+
+def _m005_estadisticas(cursor: sqlite3.Cursor):
+    """Tabla de conteos para el Dashboard y Estadísticas, mantenida por triggers"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS estadisticas (
+        dimension TEXT NOT NULL,
+        valor TEXT NOT NULL,
+        cantidad INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, valor)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("DELETE FROM estadisticas")
+    for dimension, valor, condicion, cantidad in STATS_DIMENSIONS:
+        cursor.execute(f"""
+        INSERT INTO estadisticas (dimension, valor, cantidad)
+        SELECT '{dimension}', {valor.format(r='r')}, SUM({cantidad.format(r='r')})
+        FROM ejercicios r
+        WHERE {condicion.format(r='r')}
+        GROUP BY 2
+        """)
+
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS estadisticas_ai AFTER INSERT ON ejercicios BEGIN
+        {_stats_upserts('new', 1)}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS estadisticas_ad AFTER DELETE ON ejercicios BEGIN
+        {_stats_upserts('old', -1)}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS estadisticas_au AFTER UPDATE OF {', '.join(STATS_SOURCE_COLUMNS)} ON ejercicios BEGIN
+        {_stats_upserts('old', -1)}
+        {_stats_upserts('new', 1)}
+    END
+    """)
+
+
+# Huella de las entradas de cada fase del enriquecimiento con IA (ver
+# utils/enrichment_planner.py) y versión de los prompts con que se calcularon
+IA_FINGERPRINT_COLUMNS = ['ia_hash_fase1', 'ia_hash_fase2', 'ia_hash_fase3', 'ia_version_prompt']
+
+
+def _m006_huellas_ia(cursor: sqlite3.Cursor):
+    """Columnas con las huellas de contenido del último enriquecimiento"""
+    for columna in IA_FINGERPRINT_COLUMNS:
+        try:
+            cursor.execute(f"ALTER TABLE ejercicios ADD COLUMN {columna} TEXT")
+        except sqlite3.OperationalError:
+            # La columna ya existe, no hay problema
+            pass
+
+
+def _m007_corridas_enriquecimiento(cursor: sqlite3.Cursor):
+    """Corridas de enriquecimiento y bitácora de ejercicios terminados (para reanudar)"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS enriquecimiento_corridas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        modo TEXT NOT NULL,
+        version_prompt TEXT,
+        iniciada TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        terminada TIMESTAMP
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS enriquecimiento_bitacora (
+        corrida_id INTEGER NOT NULL REFERENCES enriquecimiento_corridas (id) ON DELETE CASCADE,
+        ejercicio_id INTEGER NOT NULL,
+        estado TEXT NOT NULL,
+        fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (corrida_id, ejercicio_id)
+    ) WITHOUT ROWID
+    """)
+
+
+# Huella del contenido tal como se importó (ver utils/import_planner.py). No se
+# recalcula cuando la IA o el editor corrigen el texto: identifica el item de origen.
+CONTENT_FINGERPRINT_COLUMN = 'huella_contenido'
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_content(text: Optional[str]) -> str:
+    """Normaliza Unicode (NFC) y colapsa espacios para comparar contenidos"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text or '')).strip()
+
+
+def content_fingerprint(enunciado: Optional[str], solucion: Optional[str]) -> str:
+    """Hash del enunciado y la solución normalizados"""
+    h = hashlib.sha256(normalize_content(enunciado).encode('utf-8'))
+    h.update(b'\0')
+    h.update(normalize_content(solucion).encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+def _m008_huella_contenido(cursor: sqlite3.Cursor):
+    """Huella del contenido importado, con índice para detectar re-importaciones"""
+    # fuente falta en bases anteriores al esquema base actual
+    for columna in (CONTENT_FINGERPRINT_COLUMN, 'fuente'):
+        try:
+            cursor.execute(f"ALTER TABLE ejercicios ADD COLUMN {columna} TEXT")
+        except sqlite3.OperationalError:
+            # La columna ya existe, no hay problema
+            pass
+    filas = cursor.execute(
+        f"SELECT id, enunciado, solucion_completa FROM ejercicios WHERE {CONTENT_FINGERPRINT_COLUMN} IS NULL"
+    ).fetchall()
+    cursor.executemany(
+        f"UPDATE ejercicios SET {CONTENT_FINGERPRINT_COLUMN} = ? WHERE id = ?",
+        [(content_fingerprint(enunciado, solucion), ejercicio_id) for ejercicio_id, enunciado, solucion in filas],
+    )
+    cursor.execute(f"""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_huella_contenido
+    ON ejercicios ({CONTENT_FINGERPRINT_COLUMN})
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ejercicios_fuente
+    ON ejercicios (fuente, id)
+    """)
+
+
+def _m009_minhash(cursor: sqlite3.Cursor):
+    """Firmas MinHash y bandas LSH para detectar ejercicios casi duplicados"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS minhash_firmas (
+        ejercicio_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        firma BLOB NOT NULL
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS minhash_bandas (
+        banda INTEGER NOT NULL,
+        valor INTEGER NOT NULL,
+        ejercicio_id INTEGER NOT NULL,
+        PRIMARY KEY (banda, valor, ejercicio_id)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_minhash_bandas_ejercicio ON minhash_bandas (ejercicio_id)")
+    # Borrar o cambiar el enunciado por cualquier vía invalida la firma; DatabaseManager
+    # la recalcula en la misma transacción y NearDuplicateIndex.sync() repone las demás
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS minhash_ad AFTER DELETE ON ejercicios BEGIN
+        DELETE FROM minhash_firmas WHERE ejercicio_id = old.id;
+        DELETE FROM minhash_bandas WHERE ejercicio_id = old.id;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS minhash_au AFTER UPDATE OF enunciado ON ejercicios BEGIN
+        DELETE FROM minhash_firmas WHERE ejercicio_id = old.id;
+        DELETE FROM minhash_bandas WHERE ejercicio_id = old.id;
+    END
+    """)
+    index_rows(cursor, cursor.execute("SELECT id, enunciado FROM ejercicios").fetchall())
+
+
+# Columnas que alimentan el índice vectorial de búsqueda semántica (database/vector_index.py)
+VECTOR_SOURCE_COLUMNS = ['enunciado', 'subtemas', 'palabras_clave']
+
+
+def rotate_vector_token(conn: sqlite3.Connection):
+    """Obliga a reconstruir el índice vectorial (p. ej. tras restaurar un backup)"""
+    conn.execute("UPDATE indice_vectorial SET token = lower(hex(randomblob(8)))")
+
+
+def _m010_indice_vectorial(cursor: sqlite3.Cursor):
+    """Cola de ejercicios por (re)vectorizar y token que identifica la base.
+
+    ``cambios`` cuenta las escrituras de cada ejercicio en cola: el índice solo
+    saca de la cola los que no volvieron a cambiar mientras los vectorizaba.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS vectores_pendientes (
+        ejercicio_id INTEGER PRIMARY KEY,
+        cambios INTEGER NOT NULL DEFAULT 1
+    )
+    """)
+    # El índice en disco guarda este token: si la base se recrea o se restaura,
+    # no coincide y el índice se reconstruye en lugar de mezclar ids ajenos
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS indice_vectorial (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        token TEXT NOT NULL
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO indice_vectorial (id, token) VALUES (1, lower(hex(randomblob(8))))")
+    cursor.execute("INSERT OR IGNORE INTO vectores_pendientes (ejercicio_id) SELECT id FROM ejercicios")
+    for nombre, evento, fila in (('ai', 'INSERT', 'new'), ('ad', 'DELETE', 'old'),
+                                 ('au', f"UPDATE OF {', '.join(VECTOR_SOURCE_COLUMNS)}", 'new')):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS vectores_{nombre} AFTER {evento} ON ejercicios BEGIN
+            INSERT INTO vectores_pendientes (ejercicio_id) VALUES ({fila}.id)
+            ON CONFLICT (ejercicio_id) DO UPDATE SET cambios = cambios + 1;
+        END
+        """)
+
+
+# (versión, descripción, función) en orden estrictamente creciente
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "Esquema base de ejercicios", _m001_esquema_base),
+    (2, "Índices de filtros, estadísticas y orden por fecha", _m002_indices),
+    (3, "Búsqueda de texto completo (FTS5)", _m003_busqueda_fts),
+    (4, "Índices de filtros por rango", _m004_indices_rangos),
+    (5, "Estadísticas materializadas", _m005_estadisticas),
+    (6, "Huellas de contenido del enriquecimiento IA", _m006_huellas_ia),
+    (7, "Corridas y bitácora del enriquecimiento IA", _m007_corridas_enriquecimiento),
+    (8, "Huella del contenido importado", _m008_huella_contenido),
+    (9, "Índice MinHash de casi duplicados", _m009_minhash),
+    (10, "Cola del índice vectorial de búsqueda semántica", _m010_indice_vectorial),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Versión del esquema guardada en la base de datos (0 si nunca se migró)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> List[int]:
+    """Aplica las migraciones pendientes y devuelve las versiones aplicadas.
+
+    Debe llamarse dentro de una transacción; la versión se vuelve a leer aquí
+    para no repetir migraciones si otro proceso las aplicó primero.
+    """
+    cursor = conn.cursor()
+    current = get_schema_version(conn)
+    applied = []
+    for version, _description, apply in MIGRATIONS:
+        if version <= current:
+            continue
+        apply(cursor)
+        # PRAGMA no acepta parámetros; version es siempre un entero de MIGRATIONS
+        cursor.execute(f"PRAGMA user_version = {int(version)}")
+        applied.append(version)
+    return applied
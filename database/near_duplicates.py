@@ -0,0 +1,196 @@
+"""
+Detección de ejercicios casi duplicados con MinHash y LSH
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+Cada ejercicio guarda una firma MinHash de los trigramas de palabras de su
+enunciado (tabla ``minhash_firmas``) y un hash por cada banda de la firma
+(tabla ``minhash_bandas``, indexada). Dos ejercicios son candidatos si
+coinciden en alguna banda; solo entre candidatos se estima la similitud de
+Jaccard con las firmas completas, sin comparar todos los pares de la base.
+"""
+
+import hashlib
+import random
+import re
+import sqlite3
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from database.connection_pool import ConnectionPool
+
+# 16 bandas de 4 filas: la probabilidad de ser candidatos pasa de ~5% con
+# similitud 0.3 a ~99% con 0.8 (umbral efectivo ≈ (1/16)^(1/4) = 0.5)
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.6
+# Cambia si cambian los parámetros: las firmas de otra versión se recalculan
+MINHASH_VERSION = 1
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(8191)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORDS = re.compile(r'\w+')
+
+
+def shingles(text: Optional[str]) -> Set[str]:
+    """Trigramas de palabras del texto normalizado (minúsculas, NFC)"""
+    words = _WORDS.findall(unicodedata.normalize('NFC', text or '').lower())
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text: Optional[str]) -> Optional[List[int]]:
+    """Firma MinHash del texto; None si no tiene palabras"""
+    valores = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+               for s in shingles(text)]
+    if not valores:
+        return None
+    return [min([(a * v + b) % _PRIME for v in valores]) for a, b in _PERMUTATIONS]
+
+
+def band_hashes(signature: Sequence[int]) -> List[int]:
+    """Hash (entero de 64 bits con signo, como los INTEGER de SQLite) de cada banda"""
+    bandas = []
+    for banda in range(BANDS):
+        filas = array('Q', signature[banda * ROWS_PER_BAND:(banda + 1) * ROWS_PER_BAND]).tobytes()
+        bandas.append(int.from_bytes(hashlib.blake2b(filas, digest_size=8).digest(), 'little', signed=True))
+    return bandas
+
+
+def estimate_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Similitud de Jaccard estimada: fracción de posiciones iguales de las firmas"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def _decode(firma: bytes) -> List[int]:
+    return array('Q', firma).tolist()
+
+
+def index_rows(conn: Union[sqlite3.Connection, sqlite3.Cursor], rows: Iterable[Tuple[int, Optional[str]]]):
+    """Calcula y guarda la firma de ``(id, enunciado)`` dentro de la transacción ``conn``"""
+    firmas, bandas, ids = [], [], []
+    for ejercicio_id, enunciado in rows:
+        ids.append((ejercicio_id,))
+        signature = minhash_signature(enunciado)
+        if signature is None:
+            # Sin texto no hay firma: se registra igual para no reindexarlo en cada sync
+            firmas.append((ejercicio_id, MINHASH_VERSION, b''))
+            continue
+        firmas.append((ejercicio_id, MINHASH_VERSION, array('Q', signature).tobytes()))
+        bandas.extend((banda, valor, ejercicio_id) for banda, valor in enumerate(band_hashes(signature)))
+    if not ids:
+        return
+    conn.executemany("DELETE FROM minhash_bandas WHERE ejercicio_id = ?", ids)
+    conn.executemany("INSERT OR REPLACE INTO minhash_firmas (ejercicio_id, version, firma) VALUES (?, ?, ?)", firmas)
+    conn.executemany("INSERT OR IGNORE INTO minhash_bandas (banda, valor, ejercicio_id) VALUES (?, ?, ?)", bandas)
+
+
+class NearDuplicateIndex:
+    """Índice LSH persistido en las tablas minhash_* de la base de ejercicios"""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    def sync(self) -> int:
+        """Indexa los ejercicios sin firma vigente (p. ej. escritos fuera de DatabaseManager)"""
+        with self.pool.transaction() as conn:
+            filas = conn.execute("""
+                SELECT e.id, e.enunciado FROM ejercicios e
+                LEFT JOIN minhash_firmas f ON f.ejercicio_id = e.id
+                WHERE f.ejercicio_id IS NULL OR f.version != ?
+            """, (MINHASH_VERSION,)).fetchall()
+            index_rows(conn, filas)
+        return len(filas)
+
+    def similar(self, ejercicio_id: int, threshold: float = DEFAULT_THRESHOLD,
+                limit: int = 10) -> List[Tuple[int, float]]:
+        """Ejercicios casi duplicados de ``ejercicio_id``: ``(id, similitud)`` de mayor a menor"""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT firma FROM minhash_firmas WHERE ejercicio_id = ?", (ejercicio_id,)).fetchone()
+            if row is None:
+                texto = conn.execute("SELECT enunciado FROM ejercicios WHERE id = ?", (ejercicio_id,)).fetchone()
+                signature = minhash_signature(texto[0]) if texto else None
+            else:
+                signature = _decode(row[0]) if row[0] else None
+            if signature is None:
+                return []
+            return self._query(conn, signature, threshold, limit, exclude=ejercicio_id)
+
+    def similar_to_text(self, text: str, threshold: float = DEFAULT_THRESHOLD,
+                        limit: int = 10) -> List[Tuple[int, float]]:
+        """Ejercicios guardados parecidos a un texto que aún no está en la base"""
+        signature = minhash_signature(text)
+        if signature is None:
+            return []
+        with self.pool.connection() as conn:
+            return self._query(conn, signature, threshold, limit)
+
+    def _query(self, conn: sqlite3.Connection, signature: List[int], threshold: float, limit: int,
+               exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        condiciones = ' OR '.join('(banda = ? AND valor = ?)' for _ in range(BANDS))
+        params = [x for par in enumerate(band_hashes(signature)) for x in par]
+        candidatos = conn.execute(f"""
+            SELECT f.ejercicio_id, f.firma FROM minhash_firmas f
+            WHERE f.ejercicio_id IN (SELECT ejercicio_id FROM minhash_bandas WHERE {condiciones})
+        """, params).fetchall()
+        similares = []
+        for candidato_id, firma in candidatos:
+            if candidato_id == exclude:
+                continue
+            similitud = estimate_similarity(signature, _decode(firma))
+            if similitud >= threshold:
+                similares.append((candidato_id, similitud))
+        similares.sort(key=lambda par: (-par[1], par[0]))
+        return similares[:limit]
+
+    def report(self, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+        """Grupos de casi duplicados de toda la base, de los más grandes a los más chicos.
+
+        Cada grupo tiene ``ids`` (ordenados) y ``pares`` ``(id_a, id_b, similitud)``
+        con similitud >= ``threshold``.
+        """
+        with self.pool.connection() as conn:
+            cubetas = conn.execute("""
+                SELECT GROUP_CONCAT(ejercicio_id) FROM minhash_bandas
+                GROUP BY banda, valor HAVING COUNT(*) > 1
+            """).fetchall()
+            candidatos: Set[Tuple[int, int]] = set()
+            for (ids,) in cubetas:
+                miembros = sorted(int(i) for i in ids.split(','))
+                candidatos.update((a, b) for i, a in enumerate(miembros) for b in miembros[i + 1:])
+            involucrados = sorted({i for par in candidatos for i in par})
+            firmas: Dict[int, List[int]] = {}
+            for inicio in range(0, len(involucrados), 900):
+                bloque = involucrados[inicio:inicio + 900]
+                firmas.update((i, _decode(f)) for i, f in conn.execute(
+                    f"SELECT ejercicio_id, firma FROM minhash_firmas WHERE ejercicio_id IN ({','.join('?' for _ in bloque)})",
+                    bloque))
+
+        # Unión de pares similares en grupos (union-find)
+        padre: Dict[int, int] = {}
+
+        def raiz(x: int) -> int:
+            while padre.setdefault(x, x) != x:
+                padre[x] = padre[padre[x]]
+                x = padre[x]
+            return x
+
+        pares = []
+        for a, b in sorted(candidatos):
+            similitud = estimate_similarity(firmas[a], firmas[b])
+            if similitud >= threshold:
+                pares.append((a, b, similitud))
+                padre[raiz(a)] = raiz(b)
+
+        grupos: Dict[int, Dict] = {}
+        for a, b, similitud in pares:
+            grupo = grupos.setdefault(raiz(a), {'ids': set(), 'pares': []})
+            grupo['ids'].update((a, b))
+            grupo['pares'].append((a, b, similitud))
+        resultado = [{'ids': sorted(g['ids']), 'pares': g['pares']} for g in grupos.values()]
+        resultado.sort(key=lambda g: (-len(g['ids']), g['ids'][0]))
+        return resultado
@@ -0,0 +1,268 @@
+"""
+Índice vectorial local para búsqueda semántica de ejercicios
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+Cada ejercicio es un vector de frecuencias (sublineales) de palabras y
+bigramas de ``enunciado``, ``subtemas`` y ``palabras_clave``, proyectado por
+hashing a ``DIM`` columnas. La matriz float32 vive en disco junto a la base
+(``ejercicios.vec`` y ``ejercicios.vec.ids``) y se lee con ``numpy.memmap``.
+La ponderación IDF se aplica al consultar, así que agregar filas no obliga a
+recalcular las existentes.
+
+Las filas solo se agregan al final: un ejercicio editado agrega una fila
+nueva (vale la última) y uno borrado una fila en cero. Los triggers de la
+migración 10 anotan los cambios en ``vectores_pendientes`` y ``sync`` los
+vectoriza en lote.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Collection, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from database.db_manager import SQLITE_MAX_IDS, DatabaseManager
+from database.migrations import VECTOR_SOURCE_COLUMNS
+
+DIM = 1024  # Potencia de 2: la columna son los bits bajos del hash
+INDEX_VERSION = 1
+FIELD_WEIGHTS = {'enunciado': 1.0, 'subtemas': 2.0, 'palabras_clave': 2.0}
+QUERY_BATCH = 256
+# Se compacta cuando más de la mitad de las filas quedaron obsoletas
+COMPACT_MIN_ROWS = 1000
+
+_WORDS = re.compile(r'[^\W\d_]{2,}')
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(v) for v in value)
+    text = str(value)
+    if text.startswith('['):
+        # Lista JSON sin decodificar (fila leída directo de SQLite)
+        try:
+            return _as_text(json.loads(text))
+        except ValueError:
+            pass
+    return text
+
+
+def vectorize(items: Sequence[Union[str, Mapping]]) -> np.ndarray:
+    """Matriz ``(len(items), DIM)`` de un texto de consulta o de ejercicios (dict) por fila"""
+    matrix = np.zeros((len(items), DIM), dtype=np.float32)
+    for row, item in enumerate(items):
+        fields = {'enunciado': item} if isinstance(item, str) else item
+        counts: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            words = _WORDS.findall(unicodedata.normalize('NFC', _as_text(fields.get(field))).lower())
+            for word in words:
+                counts[word] += weight
+            for first, second in zip(words, words[1:]):
+                counts[f"{first} {second}"] += weight
+        for feature, count in counts.items():
+            h = zlib.crc32(feature.encode('utf-8'))
+            # Bit alto como signo: las colisiones tienden a cancelarse en vez de sumar
+            matrix[row, h & (DIM - 1)] += (1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0)
+    return matrix
+
+
+class VectorIndex:
+    """Matriz de vectores en disco con consultas top-k por similitud coseno TF-IDF"""
+
+    def __init__(self, db_manager: DatabaseManager, path: Optional[str] = None):
+        self.db = db_manager
+        self.path = Path(path) if path else Path(db_manager.db_path).with_suffix('.vec')
+        self.ids_path = Path(f"{self.path}.ids")
+        self.meta_path = Path(f"{self.path}.json")
+        self._lock = threading.Lock()
+        self._load()
+
+    # --- Estado en disco ---
+
+    def _load(self):
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get('version') != INDEX_VERSION or meta.get('dim') != DIM:
+            meta = {'version': INDEX_VERSION, 'dim': DIM, 'token': None, 'rows': 0}
+        self.meta = meta
+        rows = meta['rows']
+        if rows:
+            self._matrix = np.memmap(self.path, dtype=np.float32, mode='r', shape=(rows, DIM))
+            self._ids = np.fromfile(self.ids_path, dtype=np.int64, count=rows)
+        else:
+            self._matrix = np.zeros((0, DIM), dtype=np.float32)
+            self._ids = np.zeros(0, dtype=np.int64)
+        self._derive()
+
+    def _derive(self):
+        """Filas vigentes, IDF y normas ponderadas de cada fila"""
+        rows = len(self._ids)
+        live = np.zeros(rows, dtype=bool)
+        if rows:
+            # La última fila de cada id es la vigente
+            _, first_from_end = np.unique(self._ids[::-1], return_index=True)
+            live[rows - 1 - first_from_end] = True
+
+        df = np.zeros(DIM, dtype=np.float64)
+        for start in range(0, rows, 8192):
+            block = np.asarray(self._matrix[start:start + 8192])
+            df += (block[live[start:start + 8192]] != 0).sum(axis=0)
+        n_docs = int(live.sum())
+        idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+        idf2 = (idf ** 2).astype(np.float32)
+
+        norms = np.zeros(rows, dtype=np.float32)
+        for start in range(0, rows, 8192):
+            block = np.asarray(self._matrix[start:start + 8192])
+            norms[start:start + 8192] = np.sqrt((block ** 2) @ idf2)
+        # Las filas en cero marcan ejercicios borrados
+        live &= norms > 0
+        self._live, self._idf2, self._norms = live, idf2, norms
+
+    def _write_meta(self):
+        tmp = Path(f"{self.meta_path}.tmp")
+        tmp.write_text(json.dumps(self.meta), encoding='utf-8')
+        os.replace(tmp, self.meta_path)
+
+    def _append(self, ids: List[int], vectors: np.ndarray):
+        rows = self.meta['rows']
+        # Los bytes más allá de meta['rows'] son de una escritura interrumpida
+        for path, itemsize in ((self.path, 4 * DIM), (self.ids_path, 8)):
+            with open(path, 'ab') as f:
+                f.truncate(rows * itemsize)
+        with open(self.path, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self.ids_path, 'ab') as f:
+            f.write(np.asarray(ids, dtype=np.int64).tobytes())
+        self.meta['rows'] = rows + len(ids)
+        self._write_meta()
+
+    def _reset(self, token: str):
+        self._matrix = None
+        for path in (self.path, self.ids_path):
+            path.unlink(missing_ok=True)
+        self.meta = {'version': INDEX_VERSION, 'dim': DIM, 'token': token, 'rows': 0}
+        self._write_meta()
+
+    def _compact(self):
+        """Reescribe los archivos solo con las filas vigentes"""
+        matrix, ids = np.array(self._matrix[self._live]), self._ids[self._live]
+        # Soltar el memmap antes de reemplazar el archivo
+        self._matrix = None
+        for path, data in ((self.path, matrix), (self.ids_path, ids)):
+            tmp = Path(f"{path}.tmp")
+            data.tofile(tmp)
+            os.replace(tmp, path)
+        self.meta['rows'] = len(ids)
+        self._write_meta()
+
+    # --- Sincronización con la base ---
+
+    def sync(self) -> int:
+        """Vectoriza los ejercicios en cola (o toda la base si el índice no es de esta base).
+
+        Devuelve la cantidad de filas agregadas.
+        """
+        with self._lock:
+            # Lectura en una sola transacción: la cola y los textos son coherentes entre sí
+            with self.db.pool.transaction(immediate=False) as conn:
+                token = conn.execute("SELECT token FROM indice_vectorial").fetchone()[0]
+                pendientes = conn.execute("SELECT ejercicio_id, cambios FROM vectores_pendientes").fetchall()
+                rebuild = token != self.meta.get('token')
+                ids = [row[0] for row in conn.execute("SELECT id FROM ejercicios ORDER BY id")] if rebuild \
+                    else sorted(ejercicio_id for ejercicio_id, _ in pendientes)
+                filas = {}
+                for start in range(0, len(ids), SQLITE_MAX_IDS):
+                    bloque = ids[start:start + SQLITE_MAX_IDS]
+                    cursor = conn.execute(
+                        f"SELECT id, {', '.join(VECTOR_SOURCE_COLUMNS)} FROM ejercicios "
+                        f"WHERE id IN ({','.join('?' for _ in bloque)})", bloque)
+                    filas.update((fila['id'], fila) for fila in self.db._rows_from_cursor(cursor))
+
+            if rebuild:
+                self._reset(token)
+            conocidos = set() if rebuild else set(self._ids.tolist())
+            # Un id en cola que ya no existe solo necesita fila en cero si estaba indexado
+            nuevos = [i for i in ids if i in filas or i in conocidos]
+            if nuevos:
+                vectors = vectorize([filas.get(i, {}) for i in nuevos])
+                self._append(nuevos, vectors)
+            self._load()
+            if len(self._ids) >= COMPACT_MIN_ROWS and self._live.sum() * 2 < len(self._ids):
+                self._compact()
+                self._load()
+
+            if pendientes:
+                with self.db.pool.transaction() as conn:
+                    conn.executemany("DELETE FROM vectores_pendientes WHERE ejercicio_id = ? AND cambios = ?",
+                                     pendientes)
+            return len(nuevos)
+
+    # --- Consultas ---
+
+    def _snapshot(self):
+        with self._lock:
+            return self._matrix, self._ids, self._live, self._idf2, self._norms
+
+    def _top_k(self, queries: np.ndarray, k: int, exclude: Sequence[Optional[int]],
+               allowed: Optional[Collection[int]] = None) -> List[List[Tuple[int, float]]]:
+        matrix, ids, live, idf2, norms = self._snapshot()
+        results: List[List[Tuple[int, float]]] = []
+        if allowed is not None:
+            # Solo compiten los ejercicios permitidos (p. ej. los que cumplen los filtros)
+            live = live & np.isin(ids, np.fromiter(allowed, dtype=np.int64, count=len(allowed)))
+        if not live.any():
+            return [[] for _ in range(len(queries))]
+        safe_norms = np.where(live, norms, 1.0)
+        for start in range(0, len(queries), QUERY_BATCH):
+            batch = queries[start:start + QUERY_BATCH]
+            weighted = batch * idf2
+            q_norms = np.sqrt((batch * weighted).sum(axis=1))
+            q_norms[q_norms == 0] = 1.0
+            scores = (np.asarray(matrix) @ weighted.T).T / safe_norms / q_norms[:, None]
+            scores[:, ~live] = -np.inf
+            for row, query_scores in enumerate(scores):
+                skip = exclude[start + row]
+                if skip is not None:
+                    query_scores[ids == skip] = -np.inf
+                top = min(k, len(query_scores))
+                best = np.argpartition(-query_scores, top - 1)[:top]
+                best = best[np.argsort(-query_scores[best], kind='stable')]
+                results.append([(int(ids[i]), float(query_scores[i])) for i in best if query_scores[i] > 0])
+        return results
+
+    def search_batch(self, texts: Sequence[str], k: int = 10,
+                     allowed: Optional[Collection[int]] = None) -> List[List[Tuple[int, float]]]:
+        """Top-k ``(id, similitud)`` de cada texto, de mayor a menor.
+
+        Con ``allowed`` el top-k se busca solo entre esos ids.
+        """
+        return self._top_k(vectorize(list(texts)), k, [None] * len(texts), allowed)
+
+    def search(self, text: str, k: int = 10, allowed: Optional[Collection[int]] = None) -> List[Tuple[int, float]]:
+        """Ejercicios más parecidos a un texto libre"""
+        return self.search_batch([text], k, allowed)[0]
+
+    def similar(self, ejercicio_id: int, k: int = 10) -> List[Tuple[int, float]]:
+        """Ejercicios relacionados con uno ya indexado (excluye al propio ejercicio)"""
+        matrix, ids, live, _, _ = self._snapshot()
+        rows = np.flatnonzero((ids == ejercicio_id) & live)
+        if not len(rows):
+            return []
+        return self._top_k(np.asarray(matrix[rows[-1:]]), k, [ejercicio_id])[0]
+
+    def stats(self) -> Dict:
+        """Filas en disco, filas vigentes y tamaño de la matriz"""
+        _, ids, live, _, _ = self._snapshot()
+        return {'rows': len(ids), 'live': int(live.sum()), 'bytes': len(ids) * DIM * 4, 'dim': DIM}
@@ -33,23 +33,19 @@ def main():
         # AQUÍ ESTÁ LA CORRECCIÓN PRINCIPAL
         db = DatabaseManager()
         
-        # OBTENER TODOS LOS EJERCICIOS (no solo estadísticas)
-        todos_ejercicios = db.obtener_ejercicios()  # Esto da los 28 ejercicios
-        stats = db.obtener_estadisticas()           # Esto daba 3 por algún bug
-        
-        # USAR EL CONTEO REAL DE LA LISTA
-        total_real = len(todos_ejercicios)  # Esto será 28
+        # Las estadísticas se leen de la tabla que mantienen los triggers,
+        # sin cargar los ejercicios
+        stats = db.obtener_estadisticas()
+        total_ejercicios = stats['total_ejercicios']
         
         st.subheader("📊 Resumen General")
         
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            # USAR EL CONTEO REAL EN LUGAR DEL DE STATS
             st.metric(
                 label="📚 Total de Ejercicios",
-                value=total_real,  # Ahora mostrará 28
-                delta=f"Real: {total_real} vs Stats: {stats['total_ejercicios']}"
+                value=total_ejercicios
             )
         
         with col2:
@@ -60,19 +56,17 @@ def main():
             )
         
         with col3:
-            ejercicios_listos = len([e for e in todos_ejercicios if e.get('estado') == 'Listo'])
+            ejercicios_listos = stats['por_estado'].get('Listo', 0)
             st.metric(
                 label="✅ Ejercicios Listos",
                 value=ejercicios_listos,
-                delta=f"{round(ejercicios_listos/total_real*100) if total_real > 0 else 0}%"
+                delta=f"{round(ejercicios_listos/total_ejercicios*100) if total_ejercicios > 0 else 0}%"
             )
         
         with col4:
-            tiempos = [e['tiempo_estimado'] for e in todos_ejercicios if e.get('tiempo_estimado')]
-            tiempo_promedio = round(sum(tiempos)/len(tiempos)) if tiempos else 0
             st.metric(
                 label="⏱️ Tiempo Promedio",
-                value=f"{tiempo_promedio} min",
+                value=f"{stats['tiempo_promedio']} min",
                 delta="por ejercicio"
             )
         
@@ -98,12 +92,11 @@ def main():
         
         # DEBUG INFO
         with st.expander("🔍 Debug Info"):
-            st.write(f"**Ejercicios por lista directa:** {total_real}")
-            st.write(f"**Ejercicios por stats:** {stats['total_ejercicios']}")
+            st.write(f"**Total de ejercicios:** {total_ejercicios}")
             st.write(f"**Por unidad:** {stats['por_unidad']}")
             st.write("**Primeros 3 ejercicios:**")
-            for i, ej in enumerate(todos_ejercicios[:3]):
-                st.write(f"{i+1}. {ej.get('titulo', 'Sin título')} - {ej.get('unidad_tematica', 'Sin unidad')}")
+            for i, ej in enumerate(db.obtener_resumenes(limit=3)):
+                st.write(f"{i+1}. {ej.titulo or 'Sin título'} - {ej.unidad_tematica or 'Sin unidad'}")
     
     except Exception as e:
         st.error(f"Error: {str(e)}")
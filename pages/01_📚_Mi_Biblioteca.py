@@ -54,6 +54,8 @@ def convert_latex_to_markdown(text: str) -> str:
     text = re.sub(r'\\sum', r'\\sum ', text)
     return text
 
+EJERCICIOS_POR_PAGINA = 20
+
 @st.cache_resource
 def get_db_manager():
     """Carga y cachea una instancia del gestor de la base de datos."""
@@ -105,6 +107,14 @@ def mostrar_ficha_ejercicio(ejercicio: dict):
     if ejercicio.get('solucion_completa'):
         with st.expander("Ver Solución"):
             st.markdown(convert_latex_to_markdown(ejercicio['solucion_completa']), unsafe_allow_html=True)
+    # La búsqueda LSH solo corre para las fichas en que se pide, no para toda la página
+    if st.toggle("🧬 Ver ejercicios similares", key=f"similares_{ejercicio['id']}"):
+        similares = get_db_manager().buscar_similares(ejercicio['id'])
+        for similar in similares:
+            st.markdown(f"- **ID {similar['id']}**: {similar.get('titulo') or 'Sin título'} "
+                        f"— {similar['similitud']:.0%} de coincidencia")
+        if not similares:
+            st.caption("No hay ejercicios casi duplicados en la base.")
 
 def main():
     st.set_page_config(page_title="Mi Biblioteca", page_icon="📚", layout="wide")
@@ -126,7 +136,6 @@ def main():
     # =========================================================================
     with st.sidebar:
         st.header("🔍 Filtros de Búsqueda")
-        ejercicios = db_manager.obtener_ejercicios()
         unidades = db_manager.obtener_unidades_tematicas()
         
         unidades_filtro = st.multiselect("🎯 Unidades Temáticas", unidades, default=[])
@@ -151,18 +160,39 @@ def main():
             st.info("Marca las casillas de los ejercicios que quieras usar.")
 
     # =========================================================================
-    # ▼▼▼ LÓGICA DE FILTRADO (SIN CAMBIOS) ▼▼▼
+    # ▼▼▼ LÓGICA DE FILTRADO (EN SQL) ▼▼▼
     # =========================================================================
-    ejercicios_filtrados = ejercicios
-    if unidades_filtro:
-        ejercicios_filtrados = [e for e in ejercicios_filtrados if e.get('unidad_tematica') in unidades_filtro]
-    if dificultades_filtro:
-        ejercicios_filtrados = [e for e in ejercicios_filtrados if e.get('nivel_dificultad') in dificultades_filtro]
+    filtros = {'unidad_tematica': unidades_filtro, 'nivel_dificultad': dificultades_filtro}
+    ejercicio_por_id = None
     if texto_busqueda:
-        texto_lower = texto_busqueda.lower()
-        ejercicios_filtrados = [e for e in ejercicios_filtrados if (texto_lower in e.get('titulo', '').lower() or texto_lower in e.get('enunciado', '').lower() or str(e.get('id')) == texto_lower)]
-
-    st.metric("🔍 Ejercicios Encontrados", len(ejercicios_filtrados))
+        # Búsqueda de texto completo (FTS5): se cuenta aquí y se lee solo la página visible
+        total_encontrados = db_manager.contar_busqueda(texto_busqueda, filtros)
+        if texto_busqueda.strip().isdigit():
+            # Un número también muestra ese ejercicio al inicio, si no está ya entre los resultados
+            ejercicio_por_id = db_manager.obtener_ejercicio_por_id(int(texto_busqueda))
+            if ejercicio_por_id and db_manager.contar_busqueda(texto_busqueda, {**filtros, 'id': ejercicio_por_id['id']}):
+                ejercicio_por_id = None
+            elif ejercicio_por_id:
+                total_encontrados += 1
+    else:
+        total_encontrados = db_manager.contar_ejercicios(filtros)
+
+    st.metric("🔍 Ejercicios Encontrados", total_encontrados)
+
+    # --- PAGINACIÓN: solo se leen de la BD los ejercicios de la página visible ---
+    num_paginas = max(1, -(-total_encontrados // EJERCICIOS_POR_PAGINA))
+    pagina = st.number_input("Página", min_value=1, max_value=num_paginas, value=1, step=1) if num_paginas > 1 else 1
+    inicio = (pagina - 1) * EJERCICIOS_POR_PAGINA
+    if texto_busqueda:
+        # El ejercicio buscado por id ocupa el primer lugar de la primera página
+        fijado = 1 if ejercicio_por_id else 0
+        ejercicios_filtrados = db_manager.buscar(
+            texto_busqueda, filtros=filtros,
+            limit=EJERCICIOS_POR_PAGINA - (fijado if inicio == 0 else 0), offset=max(0, inicio - fijado))
+        if ejercicio_por_id and inicio == 0:
+            ejercicios_filtrados.insert(0, ejercicio_por_id)
+    else:
+        ejercicios_filtrados = db_manager.obtener_ejercicios(filtros, limit=EJERCICIOS_POR_PAGINA, offset=inicio)
     st.divider()
 
     # =========================================================================
@@ -200,6 +230,8 @@ def main():
         with col2:
             # El expander contiene la ficha detallada del ejercicio
             with st.expander(f"**ID {ej_id}**: {ejercicio.get('titulo', 'Sin título')}"):
+                if ejercicio.get('snippet'):
+                    st.caption(f"🔎 …{ejercicio['snippet']}…")
                 mostrar_ficha_ejercicio(ejercicio)
 
 if __name__ == "__main__":
@@ -9,11 +9,11 @@ import time
 import asyncio
 import re
 import json
-import google.generativeai as genai
 
 # Se activan las importaciones para conectar con la lógica de enriquecimiento y BD.
 from database.db_manager import DatabaseManager
 from enrich_db_with_ai import AIEnricher, setup_ai_model
+from utils.ai_backends import create_backend
 
 
 # =========================================================================
@@ -44,9 +44,14 @@ def get_ai_enricher():
 @st.cache_resource
 def get_ai_model():
     """
-    Configura y retorna un modelo generativo de Gemini para OCR.
+    Configura y retorna el backend multimodal para OCR.
+    Con AI_BACKEND="fake" en los secretos se usa un modelo local simulado (sin conexión).
     """
     try:
+        if st.secrets.get("AI_BACKEND") == "fake":
+            respuesta = {"enunciado_extraido": "Enunciado simulado", "solucion_extraida": ""}
+            return create_backend("fake", latency=1.0, responder=lambda prompt: json.dumps(respuesta))
+
         # Es una mejor práctica usar st.secrets para la API Key
         # Asegúrate de tener un archivo .streamlit/secrets.toml con GOOGLE_API_KEY="AIza..."
         api_key = st.secrets.get("GOOGLE_API_KEY")
@@ -54,9 +59,7 @@ def get_ai_model():
             st.error("La API Key de Google no ha sido configurada en los secretos de Streamlit (.streamlit/secrets.toml).")
             return None
         
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-pro-latest')
-        return model
+        return create_backend("gemini", api_key=api_key)
     except Exception as e:
         st.error(f"❌ Error al configurar el modelo de IA para OCR: {e}")
         return None
@@ -104,7 +107,7 @@ def extract_content_from_media(uploaded_file) -> dict:
             Devuelve el resultado exclusivamente en formato JSON. Usa esta estructura:
             {"enunciado_extraido": "...", "solucion_extraida": "..."}
             """
-            response = model.generate_content([ocr_prompt, media_file])
+            response = model.generate_multimodal([ocr_prompt, media_file])
             json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
             if not json_match:
                 st.error(f"No se pudo encontrar un bloque JSON en la respuesta de la IA: {response.text[:200]}...")
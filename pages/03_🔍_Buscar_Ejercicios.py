@@ -9,6 +9,9 @@ import re
 from pathlib import Path
 import asyncio
 
+# Máximo de resultados de una búsqueda de texto en el selector (los más relevantes)
+MAX_RESULTADOS_BUSQUEDA = 200
+
 # Importar dependencias
 try:
     from database.db_manager import DatabaseManager
@@ -73,6 +76,24 @@ def get_db_manager():
     """Carga y cachea una instancia del gestor de la base de datos."""
     return DatabaseManager(db_path="database/ejercicios.db")
 
+@st.cache_resource
+def get_vector_index():
+    """Índice vectorial de búsqueda semántica (None si NumPy no está instalado)."""
+    try:
+        from database.vector_index import VectorIndex
+    except ImportError:
+        return None
+    return VectorIndex(get_db_manager())
+
+def get_vector_index_sincronizado():
+    """Índice vectorial sincronizado con la base una vez por sesión."""
+    vector_index = get_vector_index()
+    if vector_index is not None and not st.session_state.get('indice_vectorial_sincronizado'):
+        with st.spinner("Actualizando el índice de búsqueda semántica..."):
+            vector_index.sync()
+        st.session_state.indice_vectorial_sincronizado = True
+    return vector_index
+
 @st.cache_resource
 def get_ai_enricher():
     """Carga y cachea el modelo de IA y la clase AIEnricher."""
@@ -101,31 +122,60 @@ def main():
         # --- FILTROS EN LA BARRA LATERAL ---
         with st.sidebar:
             st.header("🔍 Filtros de Búsqueda")
-            ejercicios = db_manager.obtener_ejercicios()
             unidades = db_manager.obtener_unidades_tematicas()
             unidades_filtro = st.multiselect("🎯 Unidades Temáticas", unidades, default=[])
             dificultades_filtro = st.multiselect("🎚️ Nivel de Dificultad", ["Básico", "Intermedio", "Avanzado", "Desafío"], default=[])
             modalidades_filtro = st.multiselect("💻 Modalidad", ["Teórico", "Computacional", "Mixto"], default=[])
             texto_busqueda = st.text_input("🔎 Buscar en título/contenido", placeholder="Ej: convolución...")
-
-        # --- LÓGICA DE FILTRADO ---
-        ejercicios_filtrados = ejercicios
-        if unidades_filtro: ejercicios_filtrados = [e for e in ejercicios_filtrados if e.get('unidad_tematica') in unidades_filtro]
-        if dificultades_filtro: ejercicios_filtrados = [e for e in ejercicios_filtrados if e.get('nivel_dificultad') in dificultades_filtro]
-        if modalidades_filtro: ejercicios_filtrados = [e for e in ejercicios_filtrados if e.get('modalidad') in modalidades_filtro]
-        if texto_busqueda:
-            texto_lower = texto_busqueda.lower()
-            ejercicios_filtrados = [e for e in ejercicios_filtrados if (texto_lower in e.get('titulo', '').lower() or texto_lower in e.get('enunciado', '').lower() or str(e.get('id')) == texto_lower)]
-
-        st.metric("🔍 Ejercicios Encontrados", len(ejercicios_filtrados))
+            busqueda_semantica = st.toggle("🧠 Búsqueda semántica", disabled=get_vector_index() is None,
+                                           help="Ejercicios conceptualmente relacionados, aunque no contengan las palabras buscadas.")
+            if busqueda_semantica and st.button("🔄 Actualizar índice semántico", help="Incluye los cambios hechos en esta sesión."):
+                st.session_state.indice_vectorial_sincronizado = False
+
+        # --- LÓGICA DE FILTRADO (EN SQL) ---
+        filtros = {'unidad_tematica': unidades_filtro, 'nivel_dificultad': dificultades_filtro, 'modalidad': modalidades_filtro}
+        if texto_busqueda and busqueda_semantica:
+            # Vecinos más cercanos en el índice vectorial local, solo entre los que cumplen los filtros
+            vector_index = get_vector_index_sincronizado()
+            permitidos = None
+            if any(filtros.values()):
+                permitidos = [e['id'] for e in db_manager.obtener_ejercicios(filtros, columns=['id'])]
+            similitud = dict(vector_index.search(texto_busqueda, k=MAX_RESULTADOS_BUSQUEDA, allowed=permitidos))
+            ejercicios_filtrados = db_manager.obtener_ejercicios_por_ids(list(similitud))
+            opciones_ejercicios = {f"ID {e['id']}: {e.get('titulo', 'Sin título')} ({similitud[e['id']]:.0%})": e['id']
+                                   for e in ejercicios_filtrados}
+            detalle_por_id = {e['id']: e for e in ejercicios_filtrados}
+            total_encontrados = len(opciones_ejercicios)
+        elif texto_busqueda:
+            # Búsqueda de texto completo (FTS5), ordenada por relevancia
+            ejercicios_filtrados = db_manager.buscar(texto_busqueda, filtros=filtros, limit=MAX_RESULTADOS_BUSQUEDA)
+            total_encontrados = db_manager.contar_busqueda(texto_busqueda, filtros)
+            if texto_busqueda.strip().isdigit():
+                ejercicio_por_id = db_manager.obtener_ejercicio_por_id(int(texto_busqueda))
+                if ejercicio_por_id and all(e['id'] != ejercicio_por_id['id'] for e in ejercicios_filtrados):
+                    ejercicios_filtrados.insert(0, ejercicio_por_id)
+                    if not db_manager.contar_busqueda(texto_busqueda, {**filtros, 'id': ejercicio_por_id['id']}):
+                        total_encontrados += 1
+            opciones_ejercicios = {f"ID {e['id']}: {e.get('titulo', 'Sin título')}": e['id'] for e in ejercicios_filtrados}
+            detalle_por_id = {e['id']: e for e in ejercicios_filtrados}
+        else:
+            # Para el selector basta con id y título; la ficha completa se lee al seleccionar
+            resumenes = db_manager.obtener_resumenes(filtros)
+            opciones_ejercicios = {f"ID {r.id}: {r.titulo or 'Sin título'}": r.id for r in resumenes}
+            detalle_por_id = {}
+            total_encontrados = len(opciones_ejercicios)
+
+        st.metric("🔍 Ejercicios Encontrados", total_encontrados)
+        if total_encontrados > len(opciones_ejercicios):
+            st.caption(f"Se muestran los {len(opciones_ejercicios)} resultados más relevantes. "
+                       "Precisa la búsqueda o usa los filtros para ver el resto.")
         st.divider()
 
         # --- VISTA PRINCIPAL: SELECTOR Y FICHA DE DETALLE ---
-        if not ejercicios_filtrados:
+        if not opciones_ejercicios:
             st.warning("🔍 No se encontraron ejercicios con los filtros aplicados.")
             return
 
-        opciones_ejercicios = {f"ID {e['id']}: {e.get('titulo', 'Sin título')}": e['id'] for e in ejercicios_filtrados}
         ejercicio_seleccionado_key = st.selectbox(
             "Selecciona un ejercicio para ver sus detalles",
             options=opciones_ejercicios.keys(),
@@ -135,9 +185,11 @@ def main():
 
         if ejercicio_seleccionado_key:
             ejercicio_id_seleccionado = opciones_ejercicios[ejercicio_seleccionado_key]
-            ejercicio = next((e for e in ejercicios_filtrados if e['id'] == ejercicio_id_seleccionado), None)
+            ejercicio = detalle_por_id.get(ejercicio_id_seleccionado) or db_manager.obtener_ejercicio_por_id(ejercicio_id_seleccionado)
 
             if ejercicio:
+                if ejercicio.get('snippet'):
+                    st.caption(f"🔎 …{ejercicio['snippet']}…")
                 mostrar_ficha_ejercicio(ejercicio)
 
     except Exception as e:
@@ -193,6 +245,24 @@ def mostrar_ficha_ejercicio(ejercicio: dict):
                 if ejercicio.get('solucion_imagen_path') and Path(ejercicio['solucion_imagen_path']).is_file():
                     st.image(str(ejercicio['solucion_imagen_path']), caption="Imagen de la Solución")
 
+        # --- EJERCICIOS SIMILARES ---
+        if st.toggle("🧬 Ver ejercicios similares", key=f"similares_{ejercicio['id']}"):
+            similares = get_db_manager().buscar_similares(ejercicio['id'])
+            for similar in similares:
+                st.markdown(f"- **ID {similar['id']}**: {similar.get('titulo') or 'Sin título'} "
+                            f"— {similar['similitud']:.0%} de coincidencia")
+            if not similares:
+                st.caption("No hay ejercicios casi duplicados en la base.")
+
+        if get_vector_index() is not None and st.toggle("🧠 Ver ejercicios relacionados",
+                                                        key=f"relacionados_{ejercicio['id']}"):
+            relacionados = dict(get_vector_index_sincronizado().similar(ejercicio['id'], k=5))
+            for relacionado in get_db_manager().obtener_ejercicios_por_ids(list(relacionados)):
+                st.markdown(f"- **ID {relacionado['id']}**: {relacionado.get('titulo') or 'Sin título'} "
+                            f"— {relacionados[relacionado['id']]:.0%}")
+            if not relacionados:
+                st.caption("Aún no hay ejercicios relacionados.")
+
         # --- ANÁLISIS PEDAGÓGICO (IA) ---
         st.markdown("##### 🧠 Análisis Pedagógico (IA)")
         
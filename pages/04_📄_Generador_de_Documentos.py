@@ -56,19 +56,14 @@ def get_instrucciones_default(tipo_documento):
             "Algunos ejercicios requieren uso de software."
         ]
 
-def obtener_ejercicios_filtrados(db, unidades, dificultades, modalidades):
-    """Obtiene ejercicios de la BD aplicando los filtros automáticos."""
-    todos = db.obtener_ejercicios()
-    filtrados = []
-    for ej in todos:
-        if unidades and ej.get('unidad_tematica') not in unidades:
-            continue
-        if dificultades and ej.get('nivel_dificultad') not in dificultades:
-            continue
-        if modalidades and ej.get('modalidad') not in modalidades:
-            continue
-        filtrados.append(ej)
-    return filtrados
+def obtener_ejercicios_filtrados(db, unidades, dificultades, modalidades, limit=None):
+    """Obtiene ejercicios de la BD aplicando los filtros automáticos en una sola consulta."""
+    filtros = {
+        'unidad_tematica': unidades,
+        'nivel_dificultad': dificultades,
+        'modalidad': modalidades,
+    }
+    return db.obtener_ejercicios(filtros, limit=limit)
 
 def display_and_edit_scores(ejercicios: list):
     """Muestra una UI para editar los puntajes de los ejercicios seleccionados."""
@@ -242,10 +237,9 @@ def main():
 
         # Determinar la lista final de ejercicios
         if usar_seleccion_manual:
-            todos_ejercicios = db.obtener_ejercicios()
-            ejercicios_finales = [ej for ej in todos_ejercicios if ej['id'] in ejercicios_seleccionados_ids]
+            ejercicios_finales = db.obtener_ejercicios_por_ids(ejercicios_seleccionados_ids)
         else:
-            ejercicios_finales = obtener_ejercicios_filtrados(db, unidades_sel, dificultades_sel, modalidades_sel)[:num_ejercicios]
+            ejercicios_finales = obtener_ejercicios_filtrados(db, unidades_sel, dificultades_sel, modalidades_sel, limit=num_ejercicios)
 
         with col2:
             if not ejercicios_finales:
@@ -7,9 +7,9 @@ VERSIÓN MEJORADA: Usa st.tabs y procesa archivos .zip con imágenes.
 import streamlit as st
 import logging
 from pathlib import Path
-import zipfile
 import tempfile
 import shutil
+import time
 from typing import List, Dict
 
 # Configuración de la página
@@ -35,6 +35,18 @@ st.markdown("""
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@st.cache_resource
+def get_latex_parser():
+    """Carga y cachea una instancia del parser LaTeX."""
+    from utils.latex_parser import LaTeXParser
+    return LaTeXParser()
+
+@st.cache_resource
+def get_parse_cache():
+    """Carga y cachea la caché en disco de resultados del parser."""
+    from utils.parse_cache import ParseResultCache
+    return ParseResultCache()
+
 def _convert_parsed_to_dict(parsed_ex, source_name: str) -> Dict:
     """Convierte un objeto ParsedExercise a un diccionario para session_state."""
     exercise_dict = {
@@ -70,7 +82,34 @@ def _convert_parsed_to_dict(parsed_ex, source_name: str) -> Dict:
 
 def process_and_store_exercises(parsed_exercises: List, source_name: str):
     """Procesa y guarda los ejercicios parseados en el estado de la sesión."""
-    exercises_found = [_convert_parsed_to_dict(p, source_name) for p in parsed_exercises]
+    st.session_state.import_report = None
+    store_exercises_found([_convert_parsed_to_dict(p, source_name) for p in parsed_exercises])
+
+def process_and_store_batch(results: List, zip_name: str, wall_seconds: float):
+    """Une los ejercicios de todos los .tex del ZIP, con su archivo de origen y el reporte por archivo."""
+    from utils.batch_import import merge_results
+
+    exercises_found = []
+    for result, parsed_ex in merge_results(results):
+        exercise = _convert_parsed_to_dict(parsed_ex, f"{zip_name}/{result.source}")
+        # Las imágenes se resuelven relativas al .tex de cada ejercicio
+        exercise['tex_parent'] = str(Path(result.path).parent)
+        exercises_found.append(exercise)
+
+    st.session_state.import_report = {
+        'files': [{'Archivo': r.source, 'Ejercicios': len(r.exercises),
+                   'Tiempo (s)': round(r.seconds, 3), 'Caché': '✅' if r.cached else '',
+                   'Error': r.error or ''} for r in results],
+        'parse_seconds': sum(r.seconds for r in results),
+        'wall_seconds': wall_seconds,
+    }
+    for result in results:
+        if result.error:
+            st.error(f"❌ Error parseando `{result.source}`: {result.error}")
+    store_exercises_found(exercises_found)
+
+def store_exercises_found(exercises_found: List[Dict]):
+    """Guarda los ejercicios encontrados en el estado de la sesión."""
     st.session_state.exercises_found = exercises_found
     st.session_state.import_completed = False
     
@@ -104,6 +143,8 @@ def main():
         st.session_state.import_zip_root = None
     if 'import_tex_parent' not in st.session_state:
         st.session_state.import_tex_parent = None
+    if 'import_report' not in st.session_state:
+        st.session_state.import_report = None
 
 
     # --- Pestañas de Importación ---
@@ -114,7 +155,8 @@ def main():
     ])
 
     with tab_zip:
-        st.markdown("Sube un archivo `.zip` que contenga tu archivo `.tex` y todas las imágenes referenciadas.")
+        st.markdown("Sube un archivo `.zip` con uno o más archivos `.tex` y todas las imágenes referenciadas. "
+                    "Todos los `.tex` se analizan en paralelo.")
         uploaded_zip = st.file_uploader("Selecciona archivo .zip", type=['zip'], key="zip_uploader")
         if uploaded_zip:
             if st.button("🔄 Extraer Ejercicios del ZIP", key="extract_zip"):
@@ -129,27 +171,17 @@ def main():
                         st.session_state.import_zip_root = temp_dir
                         temp_path = Path(temp_dir)
 
-                        with zipfile.ZipFile(uploaded_zip, 'r') as zip_ref:
-                            zip_ref.extractall(temp_path)
-                        
-                        # Búsqueda RECURSIVA para encontrar el .tex sin importar la estructura de carpetas
-                        tex_files = list(temp_path.rglob('*.tex'))
-                        if not tex_files:
+                        # Búsqueda RECURSIVA de todos los .tex, parseados en paralelo (un proceso por núcleo)
+                        from utils.batch_import import parse_zip
+                        inicio = time.perf_counter()
+                        results = parse_zip(uploaded_zip, temp_path, cache=get_parse_cache())
+                        if not results:
                             st.error("❌ No se encontró ningún archivo `.tex` en el ZIP.")
                             return
-                        
-                        tex_file_path = tex_files[0]
-                        tex_parent_dir = tex_file_path.parent
-                        st.session_state.import_tex_parent = str(tex_parent_dir) # Guardar como string
 
-                        logger.info(f"Archivo .tex encontrado en: {tex_file_path}")
-                        logger.info(f"Directorio base para imágenes: {tex_parent_dir}")
-                        content = tex_file_path.read_text(encoding='utf-8')
-                        
-                        from utils.latex_parser import LaTeXParser
-                        parser = LaTeXParser()
-                        parsed_exercises = parser.parse_file(content)
-                        process_and_store_exercises(parsed_exercises, uploaded_zip.name)
+                        st.session_state.import_tex_parent = str(Path(results[0].path).parent) # Guardar como string
+                        logger.info(f"{len(results)} archivos .tex encontrados en: {temp_path}")
+                        process_and_store_batch(results, uploaded_zip.name, time.perf_counter() - inicio)
 
                     except Exception as e:
                         st.error(f"❌ Error procesando el ZIP: {e}")
@@ -168,9 +200,7 @@ def main():
                             st.session_state.import_zip_root = None
                             st.session_state.import_tex_parent = None
                         content = str(uploaded_file.read(), "utf-8")
-                        from utils.latex_parser import LaTeXParser
-                        parser = LaTeXParser()
-                        parsed_exercises = parser.parse_file(content)
+                        parsed_exercises = get_parse_cache().parse(content, get_latex_parser())
                         process_and_store_exercises(parsed_exercises, uploaded_file.name)
                     except Exception as e:
                         st.error(f"❌ Error parseando archivo: {e}")
@@ -188,9 +218,7 @@ def main():
                             shutil.rmtree(st.session_state.import_zip_root, ignore_errors=True)
                             st.session_state.import_zip_root = None
                             st.session_state.import_tex_parent = None
-                        from utils.latex_parser import LaTeXParser
-                        parser = LaTeXParser()
-                        parsed_exercises = parser.parse_file(latex_content)
+                        parsed_exercises = get_parse_cache().parse(latex_content, get_latex_parser())
                         process_and_store_exercises(parsed_exercises, "Importación manual")
                     except Exception as e:
                         st.error(f"❌ Error parseando código: {e}")
@@ -201,6 +229,13 @@ def main():
     if st.session_state.exercises_found:
         st.divider()
         st.subheader(f"📋 Vista Previa de Ejercicios ({len(st.session_state.exercises_found)} encontrados)")
+
+        report = st.session_state.get('import_report')
+        if report:
+            with st.expander(f"⏱️ Reporte por archivo ({len(report['files'])} archivos .tex)"):
+                st.dataframe(report['files'], use_container_width=True)
+                st.caption(f"Parseo: {report['parse_seconds']:.2f} s sumando todos los archivos, "
+                           f"{report['wall_seconds']:.2f} s de tiempo real.")
         
         for i, exercise in enumerate(st.session_state.exercises_found):
             with st.expander(f"**{i+1}. {exercise['titulo']}**", expanded=i < 2):
@@ -224,6 +259,14 @@ def main():
         
         st.divider()
         st.subheader("💾 Importar a Base de Datos")
+        try:
+            from database.db_manager import DatabaseManager
+            from utils.import_planner import plan_import
+            resumen = plan_import(DatabaseManager(), st.session_state.exercises_found).summary()
+            st.caption(f"Comparado con la base: {resumen['nuevos']} nuevos, {resumen['modificados']} modificados, "
+                       f"{resumen['sin_cambios']} sin cambios. Solo se escriben los nuevos y modificados.")
+        except Exception as e:
+            logger.warning(f"No se pudo comparar con la base: {e}")
         if st.button("✅ Confirmar Importación a la Base de Datos", type="primary"):
             exercises_to_import = st.session_state.exercises_found
             zip_root_dir_str = st.session_state.get('import_zip_root')
@@ -235,10 +278,14 @@ def main():
 
             try:
                 from database.db_manager import DatabaseManager
+                from utils.import_planner import apply_import_plan, plan_import
                 db_manager = DatabaseManager()
                 
-                ejercicios_preparados = []
-                for ex in exercises_to_import:
+                # Solo se preparan (e imágenes incluidas) los ejercicios nuevos o modificados
+                plan = plan_import(db_manager, exercises_to_import)
+                ejercicios_preparados = [None] * len(exercises_to_import)
+                for index in plan.delta_indices():
+                    ex = exercises_to_import[index]
                     ejercicio = {
                         'titulo': ex.get('titulo', 'Sin título'),
                         'enunciado': ex.get('enunciado', ''),
@@ -257,9 +304,10 @@ def main():
                     # Manejo de la imagen
                     ejercicio['imagen_path'] = None
                     image_filename = ex.get('image_filename')
-                    if image_filename and zip_root_dir_str and tex_parent_dir_str:
+                    ex_tex_parent = ex.get('tex_parent') or tex_parent_dir_str
+                    if image_filename and zip_root_dir_str and ex_tex_parent:
                         zip_root_dir = Path(zip_root_dir_str)
-                        tex_parent_dir = Path(tex_parent_dir_str)
+                        tex_parent_dir = Path(ex_tex_parent)
                         
                         # Intento 1: Resolver la ruta relativa al archivo .tex
                         source_image_path = (tex_parent_dir / image_filename).resolve()
@@ -289,9 +337,9 @@ def main():
                     # Manejo de la imagen de la solución
                     ejercicio['solucion_imagen_path'] = None
                     solucion_image_filename = ex.get('solucion_image_filename')
-                    if solucion_image_filename and zip_root_dir_str and tex_parent_dir_str:
+                    if solucion_image_filename and zip_root_dir_str and ex_tex_parent:
                         zip_root_dir = Path(zip_root_dir_str)
-                        tex_parent_dir = Path(tex_parent_dir_str)
+                        tex_parent_dir = Path(ex_tex_parent)
                         
                         source_image_path = (tex_parent_dir / solucion_image_filename).resolve()
                         if not source_image_path.is_file():
@@ -308,27 +356,28 @@ def main():
                             st.warning(f"🖼️❌ Imagen de solución `{solucion_image_filename}` mencionada para '{ejercicio['titulo']}' pero no se encontró.")
 
 
-                    ejercicios_preparados.append(ejercicio)
-                
-                importados = 0
-                errores = []
+                    ejercicios_preparados[index] = ejercicio
                 
                 with st.spinner("Guardando en la base de datos..."):
-                    for i, ejercicio_para_db in enumerate(ejercicios_preparados):
-                        try:
-                            ejercicio_id = db_manager.agregar_ejercicio(ejercicio_para_db)
-                            if ejercicio_id:
-                                importados += 1
-                                logger.info(f"Importado: {ejercicio_para_db['titulo']} (ID: {ejercicio_id})")
-                        except Exception as e:
-                            error_msg = f"Error con '{ejercicio_para_db['titulo']}': {str(e)}"
-                            errores.append(error_msg)
-                            logger.error(error_msg)
+                    # Una sola transacción para los nuevos y los modificados
+                    resultado = apply_import_plan(db_manager, plan, ejercicios_preparados)
+                importados = resultado['imported']
+                actualizados = resultado['updated']
+                errores = resultado['errors']
+                logger.info(f"Importados {importados} ejercicios (IDs: {resultado['ids_insertados']}), "
+                            f"actualizados {actualizados} (IDs: {resultado['ids_actualizados']}), "
+                            f"{resultado['unchanged']} sin cambios")
+                for error_msg in errores:
+                    logger.error(error_msg)
                 
                 # Mostrar resultados
-                if importados > 0:
-                    st.success(f"🎉 ¡{importados} ejercicios importados exitosamente!")
-                    st.balloons()
+                if importados > 0 or actualizados > 0 or not errores:
+                    if importados > 0 or actualizados > 0:
+                        st.success(f"🎉 ¡{importados} ejercicios nuevos y {actualizados} actualizados! "
+                                   f"({resultado['unchanged']} ya estaban sin cambios)")
+                        st.balloons()
+                    else:
+                        st.info(f"ℹ️ Los {resultado['unchanged']} ejercicios ya estaban en la base sin cambios.")
                     
                     stats = db_manager.obtener_estadisticas()
                     st.info(f"📊 Total de ejercicios en la base de datos ahora: {stats['total_ejercicios']}")
@@ -340,6 +389,7 @@ def main():
                     st.session_state.import_zip_root = None
                     st.session_state.import_tex_parent = None
                     st.session_state.exercises_found = []
+                    st.session_state.import_report = None
                     st.session_state.import_completed = True
                 
                 if errores:
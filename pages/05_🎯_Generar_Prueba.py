@@ -151,11 +151,10 @@ def main():
             
             # Obtener ejercicios según método
             if usar_seleccionados and ejercicios_seleccionados_ids:
-                todos_ejercicios = db.obtener_ejercicios()
-                ejercicios_finales = [ej for ej in todos_ejercicios if ej['id'] in ejercicios_seleccionados_ids]
+                ejercicios_finales = db.obtener_ejercicios_por_ids(ejercicios_seleccionados_ids)
                 st.success(f"✅ Usando {len(ejercicios_finales)} ejercicios pre-seleccionados")
             else:
-                ejercicios_finales = obtener_ejercicios_filtrados(db, unidades_sel, dificultades_sel, modalidades_sel)[:num_ejercicios]
+                ejercicios_finales = obtener_ejercicios_filtrados(db, unidades_sel, dificultades_sel, modalidades_sel, limit=num_ejercicios)
                 st.info(f"🔍 {len(ejercicios_finales)} ejercicios filtrados automáticamente")
             
             # Mostrar distribución y puntajes
@@ -207,21 +206,14 @@ def get_instrucciones_default(tipo_documento):
             "Algunos ejercicios requieren uso de software."
         ]
 
-def obtener_ejercicios_filtrados(db, unidades, dificultades, modalidades):
-    todos = db.obtener_ejercicios()
-    filtrados = []
-    for ej in todos:
-        # Filtro por unidad
-        if unidades and ej.get('unidad_tematica') not in unidades:
-            continue
-        # Filtro por dificultad  
-        if dificultades and ej.get('nivel_dificultad') not in dificultades:
-            continue
-        # Filtro por modalidad
-        if modalidades and ej.get('modalidad') not in modalidades:
-            continue
-        filtrados.append(ej)
-    return filtrados
+def obtener_ejercicios_filtrados(db, unidades, dificultades, modalidades, limit=None):
+    """Obtiene ejercicios de la BD aplicando los filtros automáticos en una sola consulta."""
+    filtros = {
+        'unidad_tematica': unidades,
+        'nivel_dificultad': dificultades,
+        'modalidad': modalidades,
+    }
+    return db.obtener_ejercicios(filtros, limit=limit)
 
 def display_and_edit_scores(ejercicios: list) -> dict:
     """Muestra una UI para editar los puntajes de los ejercicios seleccionados."""
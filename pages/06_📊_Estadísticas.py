@@ -33,13 +33,10 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def display_summary_metrics(stats, all_exercises):
+def display_summary_metrics(stats):
     """Muestra las métricas principales en la parte superior."""
     st.subheader("📈 Resumen General")
     
-    # Calcular estadísticas de imágenes
-    total_con_imagen_enunciado = sum(1 for e in all_exercises if e.get('imagen_path'))
-    
     col1, col2, col3, col4 = st.columns(4)
     
     col1.metric("Total Ejercicios", stats.get('total_ejercicios', 0))
@@ -58,7 +55,7 @@ def display_summary_metrics(stats, all_exercises):
         unidad_comun = "N/A"
     col3.metric("Unidad Más Común", unidad_comun)
     
-    col4.metric("🖼️ Con Imagen", total_con_imagen_enunciado)
+    col4.metric("🖼️ Con Imagen", stats.get('con_imagen', 0))
 
 def display_distribution_charts(stats):
     """Muestra los gráficos de distribución por unidad, dificultad y modalidad."""
@@ -89,21 +86,20 @@ def display_distribution_charts(stats):
                      color_discrete_sequence=px.colors.sequential.Blues_r)
         st.plotly_chart(fig, use_container_width=True)
 
-def display_completeness_analysis(all_exercises):
+def display_completeness_analysis(stats):
     """Muestra el análisis de completitud de los ejercicios con barras de progreso."""
     st.subheader("✅ Análisis de Completitud")
     
-    if not all_exercises:
+    total_ejercicios = stats.get('total_ejercicios', 0)
+    if not total_ejercicios:
         st.info("No hay ejercicios para analizar.")
         return
-        
-    total_ejercicios = len(all_exercises)
     
-    # Cálculos
-    total_con_solucion = sum(1 for e in all_exercises if e.get('solucion_completa'))
-    total_con_codigo = sum(1 for e in all_exercises if e.get('codigo_python'))
-    total_con_imagen_enunciado = sum(1 for e in all_exercises if e.get('imagen_path'))
-    total_con_imagen_solucion = sum(1 for e in all_exercises if e.get('solucion_imagen_path'))
+    # Conteos mantenidos por la base de datos
+    total_con_solucion = stats.get('con_solucion', 0)
+    total_con_codigo = stats.get('con_codigo', 0)
+    total_con_imagen_enunciado = stats.get('con_imagen', 0)
+    total_con_imagen_solucion = stats.get('con_imagen_solucion', 0)
     
     # Porcentajes
     pct_solucion = total_con_solucion / total_ejercicios
@@ -128,11 +124,11 @@ def display_completeness_analysis(all_exercises):
 def display_recent_exercises(db_manager):
     """Muestra una tabla con los ejercicios más recientes."""
     st.subheader("🔥 Ejercicios Más Recientes")
-    ejercicios_recientes = db_manager.obtener_ejercicios()[:10]
+    columnas_mostrar = ['titulo', 'unidad_tematica', 'nivel_dificultad', 'modalidad', 'tiempo_estimado']
+    ejercicios_recientes = db_manager.obtener_ejercicios(columns=columnas_mostrar, limit=10)
     
     if ejercicios_recientes:
         df_recientes = pd.DataFrame(ejercicios_recientes)
-        columnas_mostrar = ['titulo', 'unidad_tematica', 'nivel_dificultad', 'modalidad', 'tiempo_estimado']
         df_display = df_recientes[columnas_mostrar].copy()
         df_display.columns = ['Título', 'Unidad', 'Dificultad', 'Modalidad', 'Tiempo (min)']
         st.dataframe(df_display, use_container_width=True, hide_index=True)
@@ -147,17 +143,16 @@ def main():
     try:
         db_manager = DatabaseManager()
         stats = db_manager.obtener_estadisticas()
-        all_exercises = db_manager.obtener_ejercicios()
         
-        if not all_exercises:
+        if not stats['total_ejercicios']:
             st.info("💡 No hay ejercicios en la base de datos. Importa algunos para ver las estadísticas.")
             return
             
-        display_summary_metrics(stats, all_exercises)
+        display_summary_metrics(stats)
         st.divider()
         display_distribution_charts(stats)
         st.divider()
-        display_completeness_analysis(all_exercises)
+        display_completeness_analysis(stats)
         st.divider()
         display_recent_exercises(db_manager)
         
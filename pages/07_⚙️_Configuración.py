@@ -5,6 +5,7 @@ Sistema de Gestión de Ejercicios - Señales y Sistemas
 
 import streamlit as st
 import os
+import time
 from pathlib import Path
 
 # Dependencias del proyecto
@@ -144,6 +145,24 @@ def create_db_management_ui():
                     for diff, count in stats.get('by_difficulty', {}).items():
                         st.write(f"• {diff}: {count}")
 
+    st.divider()
+    st.subheader("🧬 Ejercicios Casi Duplicados")
+    umbral = st.slider("Similitud mínima", 0.3, 1.0, 0.6, 0.05,
+                       help="Fracción estimada de trigramas de palabras que comparten los enunciados.")
+    if st.button("🔍 Generar reporte de duplicados"):
+        with st.spinner("Comparando enunciados..."):
+            grupos = DatabaseManager().reporte_duplicados(umbral)
+        if not grupos:
+            st.success("✅ No se encontraron ejercicios casi duplicados.")
+        else:
+            st.write(f"**{len(grupos)} grupos de ejercicios casi duplicados:**")
+            for grupo in grupos:
+                maxima = max(similitud for _, _, similitud in grupo['pares'])
+                with st.expander(f"{len(grupo['ejercicios'])} ejercicios — hasta {maxima:.0%} de coincidencia"):
+                    for ejercicio in grupo['ejercicios']:
+                        st.write(f"• ID {ejercicio['id']}: {ejercicio.get('titulo') or 'Sin título'} "
+                                 f"({ejercicio.get('fuente') or 'sin fuente'})")
+
     st.divider()
     st.subheader("🧹 Opciones de Limpieza")
     cleanup_option = st.selectbox(
@@ -197,6 +216,28 @@ def create_db_management_ui():
 
     st.divider()
     st.subheader("💾 Gestión de Backups")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        comprimir = st.checkbox("🗜️ Comprimir backup (gzip)", value=False)
+    with col2:
+        backup_en_curso = st.session_state.get('backup_job')
+        if st.button("💾 Backup en segundo plano", use_container_width=True,
+                     disabled=backup_en_curso is not None and not backup_en_curso.done):
+            st.session_state.backup_job = cleanup_manager.start_backup(compress=comprimir)
+
+    backup_job = st.session_state.get('backup_job')
+    if backup_job is not None:
+        if not backup_job.done:
+            st.progress(backup_job.fraction,
+                        text=f"Copiando páginas: {backup_job.copied}/{backup_job.total or '?'}")
+        elif backup_job.error:
+            st.error(f"❌ Error creando backup: {backup_job.error}")
+            del st.session_state.backup_job
+        else:
+            st.success(f"✅ Backup creado: {backup_job.path} "
+                       f"({backup_job.finished_at - backup_job.started_at:.1f} s)")
+            del st.session_state.backup_job
+
     backups = cleanup_manager.list_backups()
     if backups:
         st.write(f"**{len(backups)} backups disponibles:**")
@@ -220,6 +261,11 @@ def create_db_management_ui():
     else:
         st.info("No hay backups disponibles")
 
+    if backup_job is not None and not backup_job.done:
+        # El backup corre en su propio hilo; solo se refresca la barra de progreso
+        time.sleep(0.5)
+        st.rerun()
+
 def create_image_gallery_ui():
     """Crea la UI para la galería de imágenes."""
     st.subheader("Galería de Imágenes")
@@ -0,0 +1,120 @@
+"""
+Tests de los backends de modelos generativos
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.db_manager import DatabaseManager
+from utils.ai_backends import FakeBackend, GenerativeModelAdapter, ModelBackend, as_backend, create_backend
+from utils.ai_scheduler import AIScheduler, is_rate_limit_error, is_retryable_error
+
+
+def _resultados(backend, prompts):
+    salida = []
+    for prompt in prompts:
+        try:
+            salida.append(backend.generate(prompt).text)
+        except Exception as e:
+            salida.append(type(e).__name__)
+    return salida
+
+
+def test_fake_es_reproducible_sin_importar_el_orden():
+    opciones = dict(latency=0, error_rate=0.3, rate_limit_rate=0.3, seed=7, responder=str.upper)
+    prompts = [f"prompt {i}" for i in range(30)]
+
+    directo = _resultados(FakeBackend(**opciones), prompts)
+    invertido = _resultados(FakeBackend(**opciones), prompts[::-1])[::-1]
+
+    assert directo == invertido
+    assert {"RateLimitError", "BackendError"} <= set(directo)
+    assert "PROMPT 0" in directo or "PROMPT 1" in directo
+
+
+def test_errores_simulados_son_reintentables():
+    backend = FakeBackend(latency=0, rate_limit_rate=1.0, retry_after=2.5)
+    with pytest.raises(Exception) as cuota:
+        backend.generate("x")
+    assert is_rate_limit_error(cuota.value) and cuota.value.retry_after == 2.5
+
+    backend = FakeBackend(latency=0, error_rate=1.0)
+    with pytest.raises(Exception) as caida:
+        backend.generate("x")
+    assert is_retryable_error(caida.value) and not is_rate_limit_error(caida.value)
+    assert backend.counters == {'calls': 1, 'ok': 0, 'errors': 1, 'rate_limited': 0}
+
+
+def test_planificador_reintenta_contra_el_fake():
+    backend = FakeBackend(latency=0.001, error_rate=0.2, rate_limit_rate=0.2, retry_after=0.001,
+                          seed=1, responder=lambda prompt: "ok " + prompt)
+    scheduler = AIScheduler(requests_per_minute=60_000, tokens_per_minute=10**9, max_retries=10,
+                            base_delay=0.001, max_delay=0.01, rng=random.Random(0))
+
+    async def run():
+        return await asyncio.gather(*(scheduler.call(backend.generate_async, f"p{i}") for i in range(20)))
+
+    respuestas = asyncio.run(run())
+    assert [r.text for r in respuestas] == [f"ok p{i}" for i in range(20)]
+    assert scheduler.counters['retries'] == backend.counters['errors'] + backend.counters['rate_limited'] > 0
+
+
+def test_multimodal_y_registro_de_backends():
+    backend = create_backend('fake', latency=0, responder=lambda prompt: json.dumps({"prompt": prompt}))
+    imagen = {'mime_type': 'image/png', 'data': b'\x89PNG'}
+    texto = json.loads(backend.generate_multimodal(["Transcribe", imagen]).text)["prompt"]
+    assert texto.startswith("Transcribe\n") and "PNG" not in texto
+
+    with pytest.raises(ValueError):
+        create_backend('inexistente')
+
+
+def test_adapta_modelos_con_la_api_de_la_libreria():
+    class Modelo:
+        model_name = "models/gemini"
+
+        def generate_content(self, contenido):
+            return contenido
+
+    backend = as_backend(Modelo())
+    assert isinstance(backend, GenerativeModelAdapter)
+    assert backend.model_name == "models/gemini"
+    assert asyncio.run(backend.generate_async("hola")) == "hola"
+    assert backend.generate_multimodal(("a", "b")) == ["a", "b"]
+    assert as_backend(backend) is backend
+
+
+def test_backend_incompleto_falla_al_crearse():
+    class SoloTexto(ModelBackend):
+        def generate(self, prompt):
+            return prompt
+
+    with pytest.raises(TypeError):
+        SoloTexto()
+
+
+def test_enriquecimiento_completo_con_el_fake(tmp_path):
+    enrich = pytest.importorskip("enrich_db_with_ai")
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    for i in range(6):
+        db.agregar_ejercicio({'titulo': f"Ejercicio {i}", 'unidad_tematica': "Transformada Z",
+                              'enunciado': f"Enunciado {i}"})
+    backend = FakeBackend(latency=0.001, responder=enrich.simulated_response)
+    scheduler = AIScheduler(requests_per_minute=60_000, tokens_per_minute=10**9, rng=random.Random(0))
+    enricher = enrich.AIEnricher(backend, db, scheduler=scheduler, batch_size=3, batch_max_wait=0.01)
+
+    asyncio.run(enricher.enrich_exercises([enrich.prepare_exercise(row) for row in db.obtener_ejercicios()]))
+
+    assert db.obtener_estadisticas()['por_estado_ia'] == {'COMPLETADO': 6}
+    # 6 llamadas de fase 1 y 2 lotes de 3 en cada una de las fases 2 y 3
+    assert backend.counters['calls'] == 6 + 4
+    db.pool.close_all()
@@ -0,0 +1,135 @@
+"""
+Tests de los prompts por lotes del enriquecimiento con IA
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from utils.ai_batching import MicroBatcher, parse_batch_response
+from utils.ai_scheduler import AIScheduler
+
+CLAVES_FASE_2 = ('objetivos_curso', 'prerrequisitos')
+
+
+def test_parsea_arreglo_y_descarta_elementos_incompletos():
+    texto = json.dumps([
+        {"id": 1, "objetivos_curso": ["OA_II"], "prerrequisitos": "Integrales"},
+        {"id": 2, "objetivos_curso": ["OA_V"]},            # falta prerrequisitos
+        {"objetivos_curso": [], "prerrequisitos": "x"},    # sin id
+    ])
+    resultados = parse_batch_response("```json\n" + texto + "\n```", CLAVES_FASE_2)
+    assert resultados == {"1": {"objetivos_curso": ["OA_II"], "prerrequisitos": "Integrales"}}
+
+
+def test_parsea_objeto_indexado_por_id_y_arreglo_envuelto():
+    por_id = '{"7": {"objetivos_curso": [], "prerrequisitos": "Fourier"}}'
+    envuelto = '{"resultados": [{"id": 7, "objetivos_curso": [], "prerrequisitos": "Fourier"}]}'
+    assert set(parse_batch_response(por_id, CLAVES_FASE_2)) == {"7"}
+    assert set(parse_batch_response(envuelto, CLAVES_FASE_2)) == {"7"}
+    assert parse_batch_response("sin json", CLAVES_FASE_2) == {}
+
+
+def test_parsea_objeto_unico_con_id_aunque_tenga_una_lista():
+    unico = '{"id": 5, "objetivos_curso": ["OA_II"], "prerrequisitos": "Convolución"}'
+    assert parse_batch_response(unico, CLAVES_FASE_2) == {
+        "5": {"objetivos_curso": ["OA_II"], "prerrequisitos": "Convolución"}}
+
+
+def test_parsea_latex_con_escapes_invalidos():
+    texto = '[{"id": 3, "objetivos_curso": [], "prerrequisitos": "Usar \\int_0^t h(s) ds"}]'
+    assert parse_batch_response(texto, CLAVES_FASE_2)["3"]["prerrequisitos"] == "Usar \\int_0^t h(s) ds"
+
+
+def test_micro_batcher_agrupa_por_tamano_y_por_espera():
+    lotes = []
+
+    async def procesar(items):
+        lotes.append([k for k, _ in items])
+        return {k: item * 10 for k, item in items}
+
+    async def run():
+        batcher = MicroBatcher(procesar, max_batch_size=3, max_wait=0.02)
+        return await asyncio.gather(*(batcher.submit(str(i), i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    # Un lote lleno y el resto al vencer la espera
+    assert lotes == [["0", "1", "2"], ["3", "4"]]
+
+
+def test_micro_batcher_resuelve_none_si_falta_o_falla():
+    async def incompleto(items):
+        return {items[0][0]: "ok"}
+
+    async def falla(items):
+        raise RuntimeError("lote fallido")
+
+    async def run(procesar):
+        batcher = MicroBatcher(procesar, max_batch_size=2, max_wait=0.01)
+        return await asyncio.gather(batcher.submit("a", 1), batcher.submit("b", 2))
+
+    assert asyncio.run(run(incompleto)) == ["ok", None]
+    assert asyncio.run(run(falla)) == [None, None]
+
+
+def test_enricher_reintenta_solo_el_ejercicio_faltante():
+    enrich = pytest.importorskip("enrich_db_with_ai")
+
+    class StubModel:
+        """Responde los lotes omitiendo el ejercicio 2; las llamadas individuales responden bien"""
+
+        def __init__(self):
+            self.prompts = []
+
+        async def generate_content_async(self, prompt):
+            self.prompts.append(prompt)
+
+            class Respuesta:
+                pass
+
+            respuesta = Respuesta()
+            if "VARIOS ejercicios" in prompt:
+                inicio = prompt.index("[")
+                fin = prompt.index("]\n") + 1
+                ids = [e["id"] for e in json.loads(prompt[inicio:fin]) if e["id"] != 2]
+                respuesta.text = json.dumps([
+                    {"id": i, "objetivos_curso": [], "prerrequisitos": "",
+                     "errores_comunes": [], "hints": [], "extensiones_posibles": ""} for i in ids])
+            else:
+                respuesta.text = json.dumps({
+                    "enunciado_corregido": "x", "objetivos_curso": [], "prerrequisitos": "",
+                    "errores_comunes": [], "hints": [], "extensiones_posibles": ""})
+            return respuesta
+
+    model = StubModel()
+    scheduler = AIScheduler(requests_per_minute=60_000, tokens_per_minute=10**9, rng=random.Random(0))
+    enricher = enrich.AIEnricher(model, db_manager=None, scheduler=scheduler, batch_size=4, batch_max_wait=0.01)
+
+    async def run():
+        return await asyncio.gather(*(
+            enricher._run_analysis_pipeline({'id': i, 'titulo': f"t{i}"}) for i in range(1, 5)))
+
+    resultados = asyncio.run(run())
+    assert all(datos is not None for _, datos in resultados)
+    # 4 llamadas de fase 1, un lote por fase 2 y 3, y 2 reintentos individuales del id 2
+    assert len(model.prompts) == 4 + 2 + 2
+    assert enricher.batch_split == 2
+
+
+def test_clave_de_lote_cambia_con_la_lista_de_oa(monkeypatch):
+    enrich = pytest.importorskip("enrich_db_with_ai")
+    enricher = enrich.AIEnricher(object(), db_manager=None, batch_size=4)
+    item = {"id": 1, "titulo": "t1", "enunciado": "x", "unidad_tematica": "LTI", "nivel_dificultad": "Básico"}
+    antes = enricher._batch_cache_key(2, item)
+
+    # Editar OBJETIVOS_APRENDIZAJE cambia la versión de la fase 2 (y LISTA_OA en el prompt)
+    monkeypatch.setitem(enrich.PHASE_VERSIONS, 2, enrich.PHASE_VERSIONS[2] + "-oa-editados")
+    assert enricher._batch_cache_key(2, item) != antes
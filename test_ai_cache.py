@@ -0,0 +1,72 @@
+"""
+Tests de la caché de respuestas de la IA
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from utils.ai_cache import AIResponseCache, cache_key, template_version
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AIResponseCache(str(tmp_path / "ai_cache.db"))
+    yield cache
+    cache.pool.close_all()
+
+
+def test_clave_estable_ante_espacios_y_unicode():
+    base = cache_key("1", "gemini", "Calcule la convolución  de\n x(t)")
+    # 'ó' descompuesta (o + acento combinado) y espacios distintos
+    assert cache_key("1", "gemini", "Calcule la convolución de x(t) ") == base
+    assert cache_key("2", "gemini", "Calcule la convolución de x(t)") != base
+    assert cache_key("1", "otro-modelo", "Calcule la convolución de x(t)") != base
+
+
+def test_version_de_plantilla_cambia_con_el_texto():
+    assert template_version("Prompt {titulo}") != template_version("Prompt v2 {titulo}")
+
+
+def test_aciertos_y_fallos(cache):
+    assert cache.get("k") is None
+    cache.put("k", '{"a": 1}', "gemini")
+    assert cache.get("k") == '{"a": 1}'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['writes']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_persiste_entre_instancias(tmp_path):
+    path = str(tmp_path / "ai_cache.db")
+    AIResponseCache(path).put("k", "respuesta")
+    assert AIResponseCache(path).get("k") == "respuesta"
+
+
+def test_bypass_ignora_lecturas_pero_guarda(cache):
+    cache.put("k", "vieja")
+    cache.bypass = True
+    assert cache.get("k") is None
+    cache.put("k", "nueva")
+    cache.bypass = False
+    assert cache.get("k") == "nueva"
+
+
+def test_expulsa_las_menos_usadas(tmp_path):
+    cache = AIResponseCache(str(tmp_path / "lru.db"), max_bytes=350)
+    cache.put("a", "x" * 100)
+    cache.put("b", "x" * 100)
+    cache.put("c", "x" * 100)
+    cache.get("a")  # 'a' pasa a ser la más reciente
+    cache.put("d", "x" * 100)
+
+    assert cache.stats()['bytes'] <= 350
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None
+    assert cache.stats()['evictions'] >= 1
@@ -0,0 +1,175 @@
+"""
+Tests del planificador de llamadas a la IA
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from utils.ai_scheduler import (AdaptiveLimiter, AIScheduler, RateLimitError, TokenBucket,
+                                is_rate_limit_error, is_retryable_error, retry_after_seconds)
+
+
+class FakeModel:
+    """Modelo local: latencia fija, errores 429 programados y registro de concurrencia"""
+
+    def __init__(self, latency=0.01, rate_limited_calls=0, retry_after=None):
+        self.latency = latency
+        self.rate_limited_calls = rate_limited_calls
+        self.retry_after = retry_after
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        if self.calls <= self.rate_limited_calls:
+            raise RateLimitError(retry_after=self.retry_after)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        return f"respuesta a {prompt}"
+
+
+def _scheduler(**kwargs):
+    opciones = dict(requests_per_minute=60_000, tokens_per_minute=10**9,
+                    base_delay=0.001, max_delay=0.01, rng=random.Random(0))
+    opciones.update(kwargs)
+    return AIScheduler(**opciones)
+
+
+def test_token_bucket_limita_la_tasa():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=1200, capacity=2)  # 20 por segundo
+        inicio = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - inicio
+
+    # 2 salen del balde lleno y los otros 4 esperan 50 ms cada uno
+    assert asyncio.run(run()) >= 0.18
+
+
+def test_token_bucket_respeta_pausa():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=60_000)
+        bucket.pause(0.1)
+        inicio = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - inicio
+
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_reintenta_limites_de_cuota_y_reduce_concurrencia():
+    model = FakeModel(rate_limited_calls=2)
+    scheduler = _scheduler(initial_concurrency=8, max_concurrency=8)
+
+    respuesta = asyncio.run(scheduler.call(model.generate_content_async, "p"))
+
+    assert respuesta == "respuesta a p"
+    assert model.calls == 3
+    assert scheduler.stats()['rate_limited'] == 2
+    assert scheduler.stats()['concurrency'] == 2  # 8 -> 4 -> 2
+
+
+def test_honra_retry_after_del_servidor():
+    model = FakeModel(rate_limited_calls=1, retry_after=0.1)
+    scheduler = _scheduler()
+
+    inicio = time.monotonic()
+    asyncio.run(scheduler.call(model.generate_content_async, "p"))
+
+    assert time.monotonic() - inicio >= 0.1
+
+
+def test_errores_no_reintentables_se_propagan():
+    llamadas = []
+
+    async def falla(prompt):
+        llamadas.append(prompt)
+        raise ValueError("respuesta bloqueada")
+
+    with pytest.raises(ValueError):
+        asyncio.run(_scheduler().call(falla, "p"))
+    assert len(llamadas) == 1
+
+
+def test_agota_reintentos():
+    model = FakeModel(rate_limited_calls=10)
+    scheduler = _scheduler(max_retries=3)
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(scheduler.call(model.generate_content_async, "p"))
+    assert model.calls == 4
+    assert scheduler.stats()['failed'] == 1
+
+
+def test_concurrencia_adaptativa_crece_sin_superar_el_maximo():
+    model = FakeModel(latency=0.005)
+    scheduler = _scheduler(initial_concurrency=1, max_concurrency=4)
+
+    async def run():
+        await asyncio.gather(*(scheduler.call(model.generate_content_async, i) for i in range(60)))
+
+    asyncio.run(run())
+    assert scheduler.stats()['concurrency'] == 4
+    assert 1 < model.max_in_flight <= 4
+
+
+def test_limitador_aimd():
+    limiter = AdaptiveLimiter(initial=4, max_limit=6)
+    limiter.on_backpressure()
+    assert limiter.limit == 2
+    for _ in range(2):
+        limiter.on_success()
+    assert limiter.limit == 3
+
+
+def test_clasificacion_de_errores():
+    class ResourceExhausted(Exception):
+        code = 429
+
+    error = ResourceExhausted("Quota exceeded. retry_delay {\n  seconds: 33\n}")
+    assert is_rate_limit_error(error)
+    assert retry_after_seconds(error) == 33
+    assert retry_after_seconds(Exception("429 Please retry in 1500ms")) == 1.5
+    assert is_retryable_error(asyncio.TimeoutError())
+    assert not is_retryable_error(ValueError("JSON inválido"))
+
+
+def test_enricher_lanza_fases_2_y_3_a_la_vez():
+    enrich = pytest.importorskip("enrich_db_with_ai")
+
+    class PhaseModel:
+        def __init__(self):
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+        async def generate_content_async(self, prompt):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+
+            class Respuesta:
+                text = '{"enunciado_corregido": "x", "objetivos_curso": [], "hints": []}'
+            return Respuesta()
+
+    model = PhaseModel()
+    enricher = enrich.AIEnricher(model, db_manager=None, scheduler=_scheduler(initial_concurrency=4))
+    ejercicio_id, datos = asyncio.run(enricher._run_analysis_pipeline({'id': 1, 'titulo': 't'}))
+
+    assert ejercicio_id == 1 and datos is not None
+    assert model.max_in_flight == 2
@@ -0,0 +1,98 @@
+"""
+Tests de los backups en línea y la restauración de la base de datos
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import gzip
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.backup import BackupJob, online_backup, restore_backup
+from database.db_manager import DatabaseManager
+
+
+def _db(tmp_path, n: int = 300) -> DatabaseManager:
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    db.batch_import_exercises([{'titulo': f"E{i}", 'unidad_tematica': 'LTI', 'enunciado': f"Ejercicio {i} " + "x" * 2000}
+                               for i in range(n)])
+    return db
+
+
+def _count(path) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+        return conn.execute("SELECT COUNT(*) FROM ejercicios").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_por_pasos_consistente_con_escrituras_concurrentes(tmp_path):
+    db = _db(tmp_path)
+    avance = []
+    parar = threading.Event()
+
+    def escritor():
+        while not parar.is_set():
+            db.agregar_ejercicio({'titulo': 'Concurrente', 'unidad_tematica': 'LTI', 'enunciado': 'Nuevo'})
+
+    hilo = threading.Thread(target=escritor)
+    hilo.start()
+    try:
+        path = online_backup(db.db_path, str(tmp_path / "copia.db"), pages=16,
+                             progress=lambda copiadas, total: avance.append((copiadas, total)))
+    finally:
+        parar.set()
+        hilo.join()
+
+    assert _count(path) >= 300
+    assert len(avance) > 1 and avance[-1][0] == avance[-1][1]
+    assert not list(tmp_path.glob("*.partial*"))
+    db.pool.close_all()
+
+
+def test_backup_comprimido_en_segundo_plano(tmp_path):
+    db = _db(tmp_path)
+    job = BackupJob(db.db_path, str(tmp_path / "copia.db"), compress=True, pages=16).start()
+    assert job.wait(timeout=30) and job.error is None and job.fraction == 1.0
+    assert job.path.endswith("copia.db.gz")
+
+    with gzip.open(job.path, 'rb') as f:
+        (tmp_path / "descomprimido.db").write_bytes(f.read())
+    assert _count(tmp_path / "descomprimido.db") == 300
+    db.pool.close_all()
+
+
+def test_restaurar_reemplaza_el_contenido_de_forma_atomica(tmp_path):
+    db = _db(tmp_path, n=20)
+    path = online_backup(db.db_path, str(tmp_path / "copia.db"), compress=True)
+    with db.pool.connection() as conn:
+        token = conn.execute("SELECT token FROM indice_vectorial").fetchone()[0]
+
+    db.eliminar_ejercicio(1)
+    db.agregar_ejercicio({'titulo': 'Posterior', 'unidad_tematica': 'LTI', 'enunciado': 'Después del backup'})
+    restore_backup(db.pool, path)
+
+    # Las conexiones del pool siguen siendo válidas y ven la base restaurada
+    assert db.contar_ejercicios() == 20 and db.obtener_ejercicio_por_id(1)['titulo'] == 'E0'
+    with db.pool.connection() as conn:
+        assert conn.execute("SELECT token FROM indice_vectorial").fetchone()[0] != token
+    assert not list(tmp_path.glob("*.restore"))
+    db.pool.close_all()
+
+
+def test_backup_dañado_no_toca_la_base(tmp_path):
+    db = _db(tmp_path, n=5)
+    danado = tmp_path / "danado.db"
+    danado.write_bytes(b"esto no es una base SQLite" * 100)
+    with pytest.raises(sqlite3.DatabaseError):
+        restore_backup(db.pool, str(danado))
+    assert db.contar_ejercicios() == 5
+    db.pool.close_all()
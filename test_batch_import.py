@@ -0,0 +1,75 @@
+"""
+Tests de la importación en lote de archivos LaTeX
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.db_manager import DatabaseManager
+from utils.batch_import import find_tex_files, merge_results, parse_directory, parse_files, parse_zip
+
+
+def _guia(n: int, tema: str) -> str:
+    items = "\n".join(f"\\item Calcule la convolución {i} de {tema}." for i in range(n))
+    return f"\\section*{{{tema}}}\n\\begin{{enumerate}}\n{items}\n\\end{{enumerate}}\n"
+
+
+def _curso(root: Path):
+    (root / "unidad1").mkdir(parents=True)
+    (root / "unidad2" / "figs").mkdir(parents=True)
+    (root / "__MACOSX").mkdir()
+    (root / "unidad1" / "guia1.tex").write_text(_guia(3, "Convolución"), encoding='utf-8')
+    (root / "unidad2" / "guia2.tex").write_text(_guia(2, "Transformada Z"), encoding='utf-8')
+    (root / "unidad2" / "roto.tex").write_bytes(b"\\section*{X}\xff\xfe")
+    (root / "__MACOSX" / "._guia1.tex").write_text("basura", encoding='utf-8')
+
+
+def test_encuentra_tex_y_omite_carpetas_de_sistema(tmp_path):
+    _curso(tmp_path)
+    fuentes = [p.relative_to(tmp_path).as_posix() for p in find_tex_files(tmp_path)]
+    assert fuentes == ["unidad1/guia1.tex", "unidad2/guia2.tex", "unidad2/roto.tex"]
+
+
+def test_parseo_en_procesos_con_procedencia_y_tiempos(tmp_path):
+    _curso(tmp_path)
+    resultados = parse_directory(tmp_path, max_workers=2)
+
+    assert [(r.source, len(r.exercises)) for r in resultados] == [
+        ("unidad1/guia1.tex", 3), ("unidad2/guia2.tex", 2), ("unidad2/roto.tex", 0)]
+    assert all(r.seconds > 0 for r in resultados)
+    # Un archivo que no se puede leer se reporta sin detener a los demás
+    assert resultados[2].error and not resultados[0].error
+
+    unidos = merge_results(resultados)
+    assert [r.source for r, _ in unidos] == ["unidad1/guia1.tex"] * 3 + ["unidad2/guia2.tex"] * 2
+    assert unidos[3][1].unidad_tematica == "Transformada Z"
+
+
+def test_zip_alimenta_un_solo_insert_en_lote(tmp_path):
+    origen = tmp_path / "curso"
+    _curso(origen)
+    archivo = tmp_path / "curso.zip"
+    with zipfile.ZipFile(archivo, 'w') as zf:
+        for path in origen.rglob('*'):
+            zf.write(path, path.relative_to(origen))
+
+    extraidos = parse_zip(archivo, tmp_path / "extraido", max_workers=2)
+    # Un ejecutor externo da los mismos ejercicios que el pool de procesos
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        en_hilos = parse_files(find_tex_files(origen), origen, executor=executor)
+    assert [(r.source, [ex.enunciado for ex in r.exercises]) for r in en_hilos] == \
+        [(r.source, [ex.enunciado for ex in r.exercises]) for r in extraidos]
+
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    ejercicios = [{'titulo': ex.titulo, 'enunciado': ex.enunciado, 'unidad_tematica': ex.unidad_tematica,
+                   'fuente': f"curso.zip/{r.source}"} for r, ex in merge_results(extraidos)]
+    assert db.batch_import_exercises(ejercicios)['imported'] == 5
+    fuentes = [e['fuente'] for e in db.obtener_ejercicios(columns=['fuente'])]
+    assert fuentes.count("curso.zip/unidad2/guia2.tex") == 2
+    db.pool.close_all()
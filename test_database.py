@@ -0,0 +1,358 @@
+"""
+Tests del DatabaseManager y su capa de conexiones
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.connection_pool import ConnectionPool, get_pool
+from database.db_manager import DatabaseManager
+from database.migrations import LATEST_VERSION, get_schema_version
+
+
+def _ejercicio(i: int = 1, **extra) -> dict:
+    data = {
+        'titulo': f"Ejercicio {i}",
+        'unidad_tematica': "Sistemas Continuos",
+        'nivel_dificultad': "Intermedio",
+        'modalidad': "Teórico",
+        'enunciado': f"Calcule la convolución número {i}.",
+        'subtemas': ["Convolución", "LTI"],
+    }
+    data.update(extra)
+    return data
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    yield manager
+    manager.pool.close_all()
+
+
+def test_pool_compartido_por_ruta(tmp_path):
+    path = str(tmp_path / "compartido.db")
+    assert get_pool(path) is get_pool(path)
+    assert DatabaseManager(path).pool is DatabaseManager(path).pool
+
+
+def test_pool_usa_wal(db):
+    with db.pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_pool_reutiliza_conexiones(db):
+    for i in range(20):
+        db.agregar_ejercicio(_ejercicio(i))
+        db.obtener_ejercicios()
+    assert db.pool.stats()['created'] == 1
+
+
+def test_transaccion_hace_rollback_en_error(db):
+    with pytest.raises(RuntimeError):
+        with db.pool.transaction() as conn:
+            conn.execute("INSERT INTO ejercicios (titulo, unidad_tematica, enunciado) VALUES ('x', 'y', 'z')")
+            raise RuntimeError("falla a mitad de la transacción")
+    assert db.obtener_ejercicios() == []
+
+
+def test_crud_con_pool(db):
+    ejercicio_id = db.agregar_ejercicio(_ejercicio())
+    ejercicio = db.obtener_ejercicio_por_id(ejercicio_id)
+    assert ejercicio['subtemas'] == ["Convolución", "LTI"]
+
+    assert db.actualizar_ejercicio(ejercicio_id, {'hints': ["Use la propiedad de desplazamiento"]})
+    assert db.obtener_ejercicio_por_id(ejercicio_id)['hints'] == ["Use la propiedad de desplazamiento"]
+
+    assert db.actualizar_estado_ia(ejercicio_id, 'COMPLETADO')
+    assert db.obtener_estadisticas()['total_ejercicios'] == 1
+
+    assert db.eliminar_ejercicio(ejercicio_id)
+    assert db.obtener_ejercicio_por_id(ejercicio_id) is None
+
+
+def test_escrituras_concurrentes(db):
+    def worker(offset):
+        for i in range(25):
+            db.agregar_ejercicio(_ejercicio(offset + i))
+
+    threads = [threading.Thread(target=worker, args=(n * 100,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert db.obtener_estadisticas()['total_ejercicios'] == 100
+    assert db.pool.stats()['created'] <= db.pool.max_size
+
+
+def test_close_all_descarta_conexiones_prestadas(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "gen.db"))
+    with pool.connection() as prestada:
+        pool.close_all()
+    assert pool.stats()['idle'] == 0
+    with pytest.raises(Exception):
+        prestada.execute("SELECT 1")
+
+
+def test_batch_import_una_transaccion(db):
+    ejercicios = [_ejercicio(i) for i in range(50)]
+    ejercicios += [_ejercicio(i, codigo_python="print(1)") for i in range(50, 60)]
+
+    resultado = db.batch_import_exercises(ejercicios)
+
+    assert resultado['imported'] == 60
+    assert resultado['errors'] == []
+    assert len(resultado['ids_insertados']) == 60
+    # Los ids respetan el orden de entrada aunque se inserten por grupos
+    primero = db.obtener_ejercicio_por_id(resultado['ids_insertados'][0])
+    ultimo = db.obtener_ejercicio_por_id(resultado['ids_insertados'][-1])
+    assert primero['titulo'] == "Ejercicio 0"
+    assert ultimo['titulo'] == "Ejercicio 59"
+    assert ultimo['subtemas'] == ["Convolución", "LTI"]
+    # El dict original no se modifica al serializar las listas
+    assert ejercicios[0]['subtemas'] == ["Convolución", "LTI"]
+
+
+def test_batch_import_reporta_errores_por_fila(db):
+    ejercicios = [_ejercicio(1), _ejercicio(2, enunciado=None), _ejercicio(3)]
+
+    resultado = db.batch_import_exercises(ejercicios)
+
+    assert resultado['imported'] == 2
+    assert len(resultado['errors']) == 1
+    assert "Ejercicio 2" in resultado['errors'][0]
+    titulos = {e['titulo'] for e in db.obtener_ejercicios()}
+    assert titulos == {"Ejercicio 1", "Ejercicio 3"}
+
+
+def test_migraciones_dejan_esquema_al_dia(db):
+    with db.pool.connection() as conn:
+        assert get_schema_version(conn) == LATEST_VERSION
+        indices = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'ejercicios'")}
+    assert "idx_ejercicios_unidad_dificultad_fecha" in indices
+    assert "idx_ejercicios_estado_ia" in indices
+
+
+def test_migracion_de_base_antigua(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "antigua.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE ejercicios (id INTEGER PRIMARY KEY AUTOINCREMENT, titulo TEXT NOT NULL, "
+                 "unidad_tematica TEXT NOT NULL, enunciado TEXT NOT NULL, nivel_dificultad TEXT, "
+                 "modalidad TEXT, solucion_completa TEXT, palabras_clave TEXT, subtemas TEXT, "
+                 "tiempo_estimado INTEGER, fecha_ultimo_uso DATE, codigo_python TEXT, estado TEXT, "
+                 "fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO ejercicios (titulo, unidad_tematica, enunciado) VALUES ('a', 'b', 'c')")
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path)
+    ejercicio = db.obtener_ejercicios()[0]
+    assert ejercicio['titulo'] == 'a'
+    assert 'estado_ia' in ejercicio
+    assert db.obtener_estadisticas()['por_unidad'] == {'b': 1}
+    db.pool.close_all()
+
+
+def test_inicio_sin_ddl_si_el_esquema_esta_al_dia(db):
+    sentencias = []
+    with db.pool.connection() as conn:
+        conn.set_trace_callback(sentencias.append)
+    try:
+        DatabaseManager(db.db_path)
+    finally:
+        with db.pool.connection() as conn:
+            conn.set_trace_callback(None)
+    assert sentencias == ["PRAGMA user_version"]
+
+
+def test_filtro_usa_indice(db):
+    with db.pool.connection() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM ejercicios WHERE unidad_tematica = ? "
+            "ORDER BY fecha_creacion DESC", ("Transformada Z",)))
+    assert "idx_ejercicios_" in plan
+
+
+def test_buscar_ignora_acentos_y_ordena_por_relevancia(db):
+    db.agregar_ejercicio(_ejercicio(1, titulo="Convolución de pulsos", enunciado="Calcule x(t) * h(t).", subtemas=[]))
+    db.agregar_ejercicio(_ejercicio(2, titulo="Serie de Fourier", enunciado="Use la convolucion periódica.", subtemas=[]))
+    db.agregar_ejercicio(_ejercicio(3, titulo="Transformada Z", enunciado="Región de convergencia.", subtemas=[]))
+
+    resultados = db.buscar("convolucion")
+    assert [r['titulo'] for r in resultados] == ["Convolución de pulsos", "Serie de Fourier"]
+    assert "**" in resultados[0]['snippet']
+
+    # Búsqueda por prefijo y con filtros
+    assert [r['titulo'] for r in db.buscar("transf")] == ["Transformada Z"]
+    assert db.buscar("convolución", filtros={'unidad_tematica': ["Transformada Z"]}) == []
+
+
+def test_buscar_sigue_sincronizado_con_la_tabla(db):
+    ejercicio_id = db.agregar_ejercicio(_ejercicio(1, palabras_clave=["laplace"]))
+    assert len(db.buscar("laplace")) == 1
+
+    db.actualizar_ejercicio(ejercicio_id, {'palabras_clave': ["fourier"]})
+    assert db.buscar("laplace") == []
+    assert db.buscar("fourier")[0]['palabras_clave'] == ["fourier"]
+
+    db.eliminar_ejercicio(ejercicio_id)
+    assert db.buscar("fourier") == []
+
+
+def test_buscar_neutraliza_sintaxis_fts(db):
+    db.agregar_ejercicio(_ejercicio(1, enunciado="Señal AND sistema"))
+    assert len(db.buscar('"AND* (')) == 1
+    assert db.buscar("señal") != []
+    assert db.buscar("***") == []
+
+
+def test_buscar_pagina_y_cuenta_todos_los_resultados(db):
+    db.batch_import_exercises([_ejercicio(i, enunciado=f"Calcule la convolución número {i}.") for i in range(250)])
+    assert db.contar_busqueda("convolucion") == 250
+    assert db.contar_busqueda("convolucion", filtros={'unidad_tematica': ["Transformada Z"]}) == 0
+    assert db.contar_busqueda("   ") == 0
+
+    paginas = [db.buscar("convolucion", limit=100, offset=inicio) for inicio in (0, 100, 200)]
+    assert [len(p) for p in paginas] == [100, 100, 50]
+    assert len({r['id'] for p in paginas for r in p}) == 250
+    assert db.contar_busqueda("convolucion", filtros={'id': paginas[0][0]['id']}) == 1
+
+
+def test_paginacion_y_proyeccion(db):
+    ids = db.batch_import_exercises([_ejercicio(i) for i in range(25)])['ids_insertados']
+    # Mismo timestamp para todos: el orden cae en id DESC
+    recientes = list(reversed(ids))
+
+    pagina = db.obtener_ejercicios(columns=['titulo'], limit=10, offset=10)
+    assert [e['id'] for e in pagina] == recientes[10:20]
+    assert set(pagina[0]) == {'id', 'titulo'}
+
+    siguiente = db.obtener_ejercicios(columns=['titulo'], limit=10, after_id=recientes[9])
+    assert [e['id'] for e in siguiente] == recientes[10:20]
+
+    assert db.contar_ejercicios({'unidad_tematica': "Sistemas Continuos"}) == 25
+    with pytest.raises(ValueError):
+        db.obtener_ejercicios(columns=['titulo; DROP TABLE ejercicios'])
+
+
+def test_resumenes(db):
+    db.agregar_ejercicio(_ejercicio(1))
+    (resumen,) = db.obtener_resumenes(limit=5)
+    assert resumen.titulo == "Ejercicio 1"
+    assert resumen.estado_ia == 'PENDIENTE'
+
+
+def test_fila_decodifica_json_de_forma_diferida(db):
+    ejercicio_id = db.agregar_ejercicio(_ejercicio(1, hints=["Pista"], errores_comunes="no es json"))
+    ejercicio = db.obtener_ejercicio_por_id(ejercicio_id)
+
+    assert ejercicio._values[ejercicio._index['subtemas']] == '["Convolución", "LTI"]'
+    assert ejercicio['subtemas'] == ["Convolución", "LTI"]
+    assert ejercicio.get('hints') == ["Pista"]
+    assert ejercicio['errores_comunes'] == []
+    assert ejercicio.get('no_existe', 'x') == 'x'
+
+    # Se comporta como el dict que usaban las páginas
+    ejercicio['puntaje'] = 5
+    copia = dict(ejercicio)
+    assert copia['puntaje'] == 5 and copia['subtemas'] == ["Convolución", "LTI"]
+    assert {**ejercicio}['hints'] == ["Pista"]
+    del ejercicio['hints']
+    assert 'hints' not in ejercicio and len(ejercicio) == len(copia) - 1
+
+
+def test_fila_se_puede_serializar(db):
+    import pickle
+    ejercicio = db.obtener_ejercicio_por_id(db.agregar_ejercicio(_ejercicio(1)))
+    restaurado = pickle.loads(pickle.dumps(ejercicio))
+    assert restaurado == ejercicio
+    assert restaurado['subtemas'] == ["Convolución", "LTI"]
+
+
+def test_filtros_compilados_en_sql(db):
+    from datetime import date
+    db.batch_import_exercises([
+        _ejercicio(1, nivel_dificultad="Básico", tiempo_estimado=10, año_creacion=2022,
+                   imagen_path="images/a.png", solucion_completa="y(t) = 0"),
+        _ejercicio(2, nivel_dificultad="Avanzado", tiempo_estimado=30, año_creacion=2024,
+                   fecha_ultimo_uso="2024-05-01"),
+        _ejercicio(3, nivel_dificultad="Desafío", tiempo_estimado=45, modalidad="Computacional",
+                   codigo_python="import numpy"),
+    ])
+    db.actualizar_estado_ia(db.obtener_resumenes(filtros={'nivel_dificultad': "Desafío"})[0].id, 'ERROR')
+
+    def titulos(filtros):
+        return sorted(e['titulo'] for e in db.obtener_ejercicios(filtros, columns=['titulo']))
+
+    assert titulos({'nivel_dificultad': ["Básico", "Desafío"]}) == ["Ejercicio 1", "Ejercicio 3"]
+    assert titulos({'tiempo_estimado_min': 20, 'tiempo_estimado_max': 40}) == ["Ejercicio 2"]
+    assert titulos({'año_creacion_min': 2023}) == ["Ejercicio 2"]
+    assert titulos({'fecha_ultimo_uso_max': date(2024, 12, 31)}) == ["Ejercicio 2"]
+    assert titulos({'con_imagen': True, 'con_solucion': True}) == ["Ejercicio 1"]
+    assert titulos({'con_codigo': False}) == ["Ejercicio 1", "Ejercicio 2"]
+    assert titulos({'estado_ia': ['ERROR']}) == ["Ejercicio 3"]
+    assert titulos({'estado_ia': ['ERROR', None], 'modalidad': []}) == ["Ejercicio 3"]
+    assert db.contar_ejercicios({'modalidad': "Computacional", 'tiempo_estimado_min': 40}) == 1
+
+
+def test_obtener_por_ids_en_bloques(db, monkeypatch):
+    import database.db_manager as db_manager_module
+    monkeypatch.setattr(db_manager_module, 'SQLITE_MAX_IDS', 3)
+    ids = db.batch_import_exercises([_ejercicio(i) for i in range(10)])['ids_insertados']
+
+    pedidos = [ids[7], ids[2], 9999, ids[9], ids[0], ids[2], ids[5]]
+    ejercicios = db.obtener_ejercicios_por_ids(pedidos)
+    assert [e['id'] for e in ejercicios] == [ids[7], ids[2], ids[9], ids[0], ids[5]]
+    assert ejercicios[0]['subtemas'] == ["Convolución", "LTI"]
+
+    sin_orden = db.obtener_ejercicios_por_ids(pedidos, preserve_order=False)
+    assert sorted(e['id'] for e in sin_orden) == sorted({ids[7], ids[2], ids[9], ids[0], ids[5]})
+    assert db.obtener_ejercicios_por_ids([]) == []
+
+
+def _estadisticas_recorriendo(db):
+    ejercicios = db.obtener_ejercicios()
+    por_unidad = {}
+    for e in ejercicios:
+        por_unidad[e['unidad_tematica']] = por_unidad.get(e['unidad_tematica'], 0) + 1
+    return len(ejercicios), por_unidad
+
+
+def test_estadisticas_se_mantienen_con_los_cambios(db):
+    ids = [db.agregar_ejercicio(_ejercicio(i, tiempo_estimado=10 * (i + 1))) for i in range(4)]
+    db.batch_import_exercises([_ejercicio(10, unidad_tematica='Fourier', codigo_python='x = 1')])
+    db.actualizar_ejercicio(ids[0], {'unidad_tematica': 'Fourier', 'solucion_completa': ''})
+    db.actualizar_estado_ia(ids[1], 'COMPLETADO')
+    db.eliminar_ejercicio(ids[2])
+
+    stats = db.obtener_estadisticas()
+    total, por_unidad = _estadisticas_recorriendo(db)
+    assert stats['total_ejercicios'] == total == 4
+    assert stats['por_unidad'] == por_unidad
+    assert stats['por_estado_ia']['COMPLETADO'] == 1
+    assert stats['con_codigo'] == 1
+    assert stats['tiempo_promedio'] == round((10 + 20 + 40) / 3)
+
+
+def test_estadisticas_sin_recorrer_ejercicios(db):
+    db.agregar_ejercicio(_ejercicio(0))
+    sentencias = []
+    with db.pool.connection() as conn:
+        conn.set_trace_callback(sentencias.append)
+    try:
+        db.obtener_estadisticas()
+    finally:
+        with db.pool.connection() as conn:
+            conn.set_trace_callback(None)
+    assert not any('FROM ejercicios' in s for s in sentencias)
@@ -0,0 +1,105 @@
+"""
+Tests del escritor de base de datos en un hilo dedicado
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.db_manager import DatabaseManager
+from utils.db_writer import AsyncDBWriter
+
+
+def test_agrupa_por_tamano_y_guarda_lo_pendiente_al_cerrar():
+    grupos = []
+    writer = AsyncDBWriter(grupos.append, max_batch=3, max_delay_ms=10_000).start()
+    for i in range(7):
+        writer.submit(i)
+    writer.close()
+
+    assert grupos == [[0, 1, 2], [3, 4, 5], [6]]
+    stats = writer.stats()
+    assert stats['written'] == 7 and stats['commits'] == 3 and stats['pending'] == 0
+
+
+def test_guarda_al_vencer_la_espera():
+    guardado = threading.Event()
+    writer = AsyncDBWriter(lambda grupo: guardado.set(), max_batch=100, max_delay_ms=20).start()
+    writer.submit("a")
+    assert guardado.wait(timeout=2)
+    writer.close()
+
+
+def test_grupo_fallido_se_reintenta_de_a_uno():
+    errores = []
+
+    def commit(grupo):
+        if "malo" in grupo:
+            raise ValueError("fila inválida")
+
+    writer = AsyncDBWriter(commit, max_batch=3, max_delay_ms=10_000,
+                           on_error=lambda item, e: errores.append(item)).start()
+    for item in ("a", "malo", "b"):
+        writer.submit(item)
+    writer.close()
+
+    assert errores == ["malo"]
+    assert writer.counters['written'] == 2 and writer.counters['errors'] == 1
+
+
+def test_no_bloquea_el_event_loop(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    ids = [db.agregar_ejercicio({'titulo': f"Ejercicio {i}", 'unidad_tematica': "Transformada Z",
+                                 'enunciado': f"Enunciado {i}"}) for i in range(20)]
+
+    liberar = threading.Event()
+
+    def commit(grupo):
+        liberar.wait(timeout=10)  # COMMIT lento (disco, fsync) hasta que se libera
+        with db.pool.transaction() as conn:
+            db.actualizar_ejercicios([(i, {'estado_ia': 'COMPLETADO'}) for i in grupo], conn)
+
+    async def run():
+        writer = AsyncDBWriter(commit, max_batch=5, max_delay_ms=5).start()
+        for i in ids:
+            writer.submit(i)
+            await asyncio.sleep(0)
+        # Todo quedó encolado sin esperar a ningún COMMIT
+        encolados, escritos = writer.counters['queued'], writer.counters['written']
+        liberar.set()
+        await writer.aclose()
+        return encolados, escritos, writer
+
+    encolados, escritos, writer = asyncio.run(run())
+    assert encolados == 20 and escritos == 0
+    assert writer.counters['written'] == 20
+    assert db.obtener_estadisticas()['por_estado_ia'] == {'COMPLETADO': 20}
+    db.pool.close_all()
+
+
+def test_enriquecimiento_guarda_errores_con_el_escritor(tmp_path, monkeypatch):
+    enrich = pytest.importorskip("enrich_db_with_ai")
+    from utils.ai_scheduler import AIScheduler
+
+    class StubModel:
+        async def generate_content_async(self, prompt):
+            raise RuntimeError("modelo caído")
+
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    ids = [db.agregar_ejercicio({'titulo': f"Ejercicio {i}", 'unidad_tematica': "Transformada Z",
+                                 'enunciado': f"Enunciado {i}"}) for i in range(3)]
+    scheduler = AIScheduler(requests_per_minute=60_000, tokens_per_minute=10**9, max_retries=0, base_delay=0)
+    enricher = enrich.AIEnricher(StubModel(), db, scheduler=scheduler, batch_size=1)
+    monkeypatch.setattr(enrich, 'MAX_RETRIES', 0)
+
+    asyncio.run(enricher.enrich_exercises([db.obtener_ejercicio_por_id(i) for i in ids]))
+
+    assert db.obtener_estadisticas()['por_estado_ia'] == {'ERROR': 3}
+    db.pool.close_all()
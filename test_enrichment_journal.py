@@ -0,0 +1,116 @@
+"""
+Tests de las corridas reanudables del enriquecimiento con IA
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.db_manager import DatabaseManager
+from utils.ai_scheduler import AIScheduler
+from utils.enrichment_journal import EnrichmentRun
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    for i in range(5):
+        manager.agregar_ejercicio({'titulo': f"Ejercicio {i}", 'unidad_tematica': "Transformada Z",
+                                   'enunciado': f"Enunciado {i}"})
+    yield manager
+    manager.pool.close_all()
+
+
+def _ids(run):
+    return [exercise['id'] for exercise, _phases in run.iter_pending()]
+
+
+def _terminar(db, run, ids):
+    """Lo que hace el escritor del enriquecedor: resultado y bitácora en un COMMIT"""
+    with db.pool.transaction() as conn:
+        db.actualizar_ejercicios([(i, {'estado_ia': 'COMPLETADO', 'hints': ["h"]}) for i in ids], conn)
+        run.record(conn, [(i, 'OK') for i in ids])
+
+
+def test_recorre_por_paginas_solo_pendientes(db):
+    db.actualizar_estado_ia(3, 'COMPLETADO')
+    run = EnrichmentRun(db, 'pendientes', page_size=2)
+    run.start()
+
+    assert _ids(run) == [1, 2, 4, 5]
+    assert run.pending_count() == 4
+
+
+def test_reanuda_donde_quedo(db):
+    run = EnrichmentRun(db, 'forzado', version="v1", page_size=2)
+    corrida = run.start()
+    _terminar(db, run, [1, 4])
+    # El proceso se interrumpe sin llamar a finish()
+
+    retomada = EnrichmentRun(db, 'forzado', version="v1", page_size=2)
+    assert retomada.start() == corrida
+    assert retomada.resumed
+    assert retomada.done_count() == 2
+    assert _ids(retomada) == [2, 3, 5]
+    assert db.obtener_ejercicio_por_id(4)['hints'] == ["h"]
+
+
+def test_no_reanuda_corridas_terminadas_ni_de_otra_version(db):
+    run = EnrichmentRun(db, 'forzado', version="v1")
+    primera = run.start()
+    _terminar(db, run, [1])
+
+    assert EnrichmentRun(db, 'forzado', version="v2").start() != primera
+
+    run.finish()
+    nueva = EnrichmentRun(db, 'forzado', version="v1")
+    assert nueva.start() != primera
+    assert not nueva.resumed
+    assert len(_ids(nueva)) == 5
+
+
+def test_nueva_corrida_descarta_la_abierta(db):
+    run = EnrichmentRun(db, 'forzado')
+    primera = run.start()
+    _terminar(db, run, [1, 2])
+
+    otra = EnrichmentRun(db, 'forzado')
+    assert otra.start(nueva=True) != primera
+    assert len(_ids(otra)) == 5
+
+
+def test_actualizar_ejercicios_en_lote(db):
+    assert db.actualizar_ejercicios([(1, {'subtemas': ["ROC"]}), (2, {'estado_ia': 'ERROR'}), (99, {'estado_ia': 'X'})]) == 2
+    assert db.obtener_ejercicio_por_id(1)['subtemas'] == ["ROC"]
+    assert db.obtener_ejercicio_por_id(2)['estado_ia'] == 'ERROR'
+
+
+def test_enriquecimiento_streaming_guarda_y_cierra_la_corrida(db):
+    enrich = pytest.importorskip("enrich_db_with_ai")
+
+    class StubModel:
+        async def generate_content_async(self, prompt):
+            class Respuesta:
+                text = json.dumps({"enunciado_corregido": "x", "unidad_tematica": "Transformada Z",
+                                   "nivel_dificultad": "Básico", "objetivos_curso": [], "prerrequisitos": "",
+                                   "errores_comunes": [], "hints": [], "extensiones_posibles": ""})
+            return Respuesta()
+
+    scheduler = AIScheduler(requests_per_minute=60_000, tokens_per_minute=10**9, rng=random.Random(0))
+    enricher = enrich.AIEnricher(StubModel(), db, scheduler=scheduler, batch_size=1)
+    run = EnrichmentRun(db, 'pendientes', page_size=2)
+    run.start()
+
+    asyncio.run(enricher.enrich_streaming(run, window=2))
+
+    assert db.obtener_estadisticas()['por_estado_ia'] == {'COMPLETADO': 5}
+    assert run.done_count() == 5
+    assert EnrichmentRun(db, 'pendientes').start() != run.corrida_id
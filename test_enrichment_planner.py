@@ -0,0 +1,92 @@
+"""
+Tests del planificador incremental del enriquecimiento con IA
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.db_manager import DatabaseManager
+from utils.enrichment_planner import (adopt_fingerprints, fingerprint_columns, plan_enrichment,
+                                      prepare_exercise)
+
+VERSIONS = {1: "1:aaa", 2: "1:bbb", 3: "1:ccc"}
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    yield manager
+    manager.pool.close_all()
+
+
+def _agregar(db, **extra):
+    data = {'titulo': "Convolución", 'unidad_tematica': "Sistemas Continuos",
+            'nivel_dificultad': "Intermedio", 'enunciado': "Calcule $x(t) * h(t)$.",
+            'solucion_completa': "Se integra por tramos."}
+    data.update(extra)
+    return db.agregar_ejercicio(data)
+
+
+def _enriquecer(db, ejercicio_id, versions=VERSIONS):
+    """Simula el guardado de un enriquecimiento completo"""
+    row = prepare_exercise(db.obtener_ejercicio_por_id(ejercicio_id))
+    db.actualizar_ejercicio(ejercicio_id, {'estado_ia': 'COMPLETADO', **fingerprint_columns(row, versions, "1")})
+
+
+def _fases(db, versions=VERSIONS):
+    return {exercise['id']: phases for exercise, phases in plan_enrichment(db, versions)}
+
+
+def test_ejercicio_sin_huella_corre_todas_las_fases(db):
+    ejercicio_id = _agregar(db)
+    assert _fases(db) == {ejercicio_id: {1, 2, 3}}
+
+
+def test_ejercicio_al_dia_no_genera_trabajo(db):
+    _enriquecer(db, _agregar(db))
+    assert _fases(db) == {}
+
+
+def test_cambio_de_clasificacion_solo_rehace_fases_2_y_3(db):
+    ejercicio_id = _agregar(db)
+    _enriquecer(db, ejercicio_id)
+    db.actualizar_ejercicio(ejercicio_id, {'nivel_dificultad': "Avanzado"})
+    assert _fases(db) == {ejercicio_id: {2, 3}}
+
+
+def test_cambio_de_enunciado_rehace_todo(db):
+    ejercicio_id = _agregar(db)
+    otro_id = _agregar(db, titulo="Otro")
+    _enriquecer(db, ejercicio_id)
+    _enriquecer(db, otro_id)
+    db.actualizar_ejercicio(ejercicio_id, {'solucion_completa': "Nueva solución."})
+    assert _fases(db) == {ejercicio_id: {1, 2, 3}}
+
+
+def test_cambio_de_prompt_solo_rehace_esa_fase(db):
+    ejercicio_id = _agregar(db)
+    _enriquecer(db, ejercicio_id)
+    assert _fases(db, {**VERSIONS, 3: "1:ddd"}) == {ejercicio_id: {3}}
+
+
+def test_huella_usa_el_texto_limpio(db):
+    # Los textos se limpian igual al planificar que al enviarlos a la IA
+    ejercicio_id = _agregar(db, enunciado="  Calcule \\u00e1rea  ")
+    _enriquecer(db, ejercicio_id)
+    assert _fases(db) == {}
+
+
+def test_adoptar_huellas_de_ejercicios_ya_enriquecidos(db):
+    completado = _agregar(db)
+    pendiente = _agregar(db, titulo="Pendiente")
+    db.actualizar_estado_ia(completado, 'COMPLETADO')
+
+    assert adopt_fingerprints(db, VERSIONS, "1") == 1
+    assert _fases(db) == {pendiente: {1, 2, 3}}
+    assert db.obtener_ejercicio_por_id(completado)['ia_version_prompt'] == "1"
@@ -0,0 +1,98 @@
+"""
+Tests del planificador de importaciones incrementales
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.db_manager import DatabaseManager
+from database.migrations import content_fingerprint
+from utils.import_planner import apply_import_plan, plan_import
+
+FUENTE = "guia_convolucion.tex"
+
+
+def _guia(n: int = 200):
+    return [{'titulo': f"Ejercicio {i}", 'unidad_tematica': "Convolución", 'fuente': FUENTE,
+             'enunciado': f"Calcule la convolución número {i} de $x(t)$ con $h(t)$.",
+             'solucion_completa': f"Se obtiene $y_{i}(t)$."} for i in range(n)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    yield db
+    db.pool.close_all()
+
+
+def _fechas(db):
+    with db.pool.connection() as conn:
+        return dict(conn.execute("SELECT id, fecha_modificacion FROM ejercicios").fetchall())
+
+
+def test_huella_normaliza_espacios_y_unicode():
+    base = content_fingerprint("Calcule  la convolución\n de x(t)", None)
+    assert content_fingerprint("Calcule la convolución de x(t) ", "") == base
+    assert content_fingerprint("Calcule la convolución de x(t)", "y(t)") != base
+
+
+def test_reimportar_con_tres_cambios_toca_tres_filas(db):
+    original = _guia()
+    primera = apply_import_plan(db, plan_import(db, original), original)
+    assert primera['imported'] == 200
+    with db.pool.connection() as conn:
+        conn.execute("UPDATE ejercicios SET estado_ia = 'COMPLETADO', fecha_modificacion = '2020-01-01'")
+        conn.commit()
+    antes = _fechas(db)
+
+    revisada = _guia()
+    for i in (3, 100, 150):
+        revisada[i]['enunciado'] += " Considere $t > 0$."
+    revisada[150]['solucion_completa'] = None
+    plan = plan_import(db, revisada)
+    assert plan.summary() == {'sin_cambios': 197, 'modificados': 3, 'nuevos': 0, 'ausentes': 0}
+    assert plan.delta_indices() == [3, 100, 150]
+
+    resultado = apply_import_plan(db, plan, revisada)
+    assert (resultado['imported'], resultado['updated'], resultado['unchanged']) == (0, 3, 197)
+    despues = _fechas(db)
+    tocados = sorted(i for i in despues if despues[i] != antes[i])
+    assert tocados == sorted(resultado['ids_actualizados'])
+    assert db.contar_ejercicios() == 200
+
+    ejercicio = db.obtener_ejercicio_por_id(plan.modified[2][1])
+    assert ejercicio['titulo'] == "Ejercicio 150"       # Los metadatos se conservan
+    assert ejercicio['solucion_completa'] is None and ejercicio['estado_ia'] == 'PENDIENTE'
+
+    # Una segunda re-importación idéntica ya no escribe nada
+    assert plan_import(db, revisada).delta_indices() == []
+
+
+def test_items_insertados_y_quitados(db):
+    original = _guia(10)
+    apply_import_plan(db, plan_import(db, original), original)
+
+    revisada = _guia(10)
+    nuevo = dict(revisada[0], enunciado="Demuestre que la convolución es conmutativa.")
+    del revisada[7]
+    revisada.insert(4, nuevo)
+    plan = plan_import(db, revisada)
+    assert plan.new == [4]
+    assert len(plan.unchanged) == 9 and plan.modified == [] and len(plan.missing) == 1
+
+    # Un item ya guardado desde otra fuente tampoco se duplica
+    copia = [dict(original[0], fuente="otra_guia.tex")]
+    assert plan_import(db, copia).summary()['sin_cambios'] == 1
+
+
+def test_texto_pegado_no_se_empareja_como_modificado(db):
+    pegado = [dict(ex, fuente="Importación manual") for ex in _guia(3)]
+    apply_import_plan(db, plan_import(db, pegado), pegado)
+    otro = [dict(ex, enunciado=ex['enunciado'] + " (otra guía)") for ex in pegado]
+    assert plan_import(db, otro).summary() == {'sin_cambios': 0, 'modificados': 0, 'nuevos': 3, 'ausentes': 0}
@@ -0,0 +1,46 @@
+"""
+Tests del clasificador de metadatos del parser LaTeX
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from utils.latex_parser import LaTeXParser
+
+
+def test_clasifica_todas_las_caracteristicas_en_una_llamada():
+    parser = LaTeXParser()
+    texto = r"Demuestre que la convolución de $x(t)$ con $h(t)$ es lineal. \textbf{Implemente} en Python."
+    features = parser.classifier.classify(texto, "Convolución")
+
+    assert features.unidad_tematica == "Sistemas Lineales y Convolución"
+    assert features.tipo_ejercicio == "Demostración"
+    # Empate Intermedio/Avanzado (2 puntos): gana el primero del diccionario, como antes
+    assert features.nivel_dificultad == "Intermedio"
+    assert features.modalidad == "Computacional"
+    assert features.palabras_clave == ["convolución", "lineal"]
+    assert features.math_density == 3 and features.word_count == 13
+    # Intermedio (18) + 2 expresiones matemáticas (4) + demostración (12)
+    assert features.tiempo_estimado == 34
+
+
+def test_titulos_en_cache_y_modalidad_por_titulo():
+    classifier = LaTeXParser().classifier
+    assert classifier.classify_title("Implementación computacional") == ('General', 'Computacional')
+    assert classifier.classify_title("Transformada Z") == ('Transformada Z', 'Teórico')
+    assert "Transformada Z" in classifier._title_cache
+    assert classifier.classify("Grafique la señal", "Transformada Z").modalidad == 'Mixto'
+
+
+def test_metodos_anteriores_usan_el_clasificador():
+    parser = LaTeXParser()
+    texto = "Calcule y grafique la transformada de Fourier de la señal"
+    features = parser.classifier.classify(texto)
+    assert parser._detect_difficulty_v4_fixed(texto) == features.nivel_dificultad == "Básico"
+    assert parser._detect_exercise_type(texto) == features.tipo_ejercicio
+    assert parser._extract_keywords(texto) == ["fourier", "transformada", "señal"]
+    assert parser._detect_modality(texto) == "Mixto"
@@ -0,0 +1,90 @@
+"""
+Tests del tokenizador LaTeX del parser de ejercicios
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import io
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from utils.latex_parser import LaTeXParser, tokenize_latex
+
+GUIA = r"""\section*{Problemas}
+\begin{enumerate}
+\item Calcule $x(t) * h(t)$.
+\begin{enumerate}
+\item Grafique $x(t)$. \item Determine $y(t)$.
+\end{enumerate}
+\ifanswers{\color{red}\textbf{Solución:} Se obtiene {y(t)} \includegraphics[width=3cm]{sol.png}}\fi
+\item Demuestre la propiedad. \begin{figure}\includegraphics{fig/a.png}\end{figure}
+\item Resuelva \ifanswers{ Resuelta en ayudantía }\fi
+\end{enumerate}
+"""
+
+
+def test_tokens_con_profundidad():
+    tokens = tokenize_latex(GUIA)
+    items = [t.depth for t in tokens if t.kind == 'item']
+    assert items == [1, 2, 2, 1, 1]
+    assert [t.value for t in tokens if t.kind == 'graphics'] == ["sol.png", "fig/a.png"]
+    begins = [(t.value, t.depth) for t in tokens if t.kind == 'begin']
+    assert begins == [('enumerate', 0), ('enumerate', 1), ('figure', 1)]
+    # \fi no se confunde con \figure ni \fill
+    assert [GUIA[t.start:t.end] for t in tokens if t.kind == 'fi'] == ["\\fi", "\\fi"]
+
+
+def test_end_sin_begin_se_ignora_y_cierra_el_ultimo_del_mismo_tipo():
+    tokens = tokenize_latex(r"\end{itemize}\begin{enumerate}\begin{itemize}\end{enumerate}\item x")
+    assert [(t.kind, t.depth) for t in tokens] == [('begin', 0), ('begin', 1), ('end', 0), ('item', 1)]
+
+
+def test_extractores_consumen_los_tokens_del_item():
+    parser = LaTeXParser()
+    items = parser._split_items_with_tokens(GUIA, tokenize_latex(GUIA))
+    assert len(items) == 3
+
+    texto, tokens = items[0]
+    # Los tokens quedan relativos al texto del item
+    assert all(texto[t.start:t.start + 1] == "\\" for t in tokens)
+    enunciado, _tok, solucion, solucion_tokens = parser._split_statement_and_solution(texto, tokens)
+    assert "ifanswers" not in enunciado
+    assert solucion.startswith("Se obtiene {y(t)}")
+    assert parser._extract_image_and_clean_content(solucion, solucion_tokens) == ("Se obtiene {y(t)}", "sol.png")
+
+
+def test_parse_file_guia():
+    ejercicios = LaTeXParser().parse_file(GUIA)
+    assert len(ejercicios) == 3
+    assert ejercicios[0].solucion_image_filename == "sol.png"
+    assert ejercicios[1].image_filename == "fig/a.png" and "figure" not in ejercicios[1].enunciado
+    assert ejercicios[2].solucion_completa is None
+
+
+def test_parse_stream_igual_a_parse_file():
+    parser = LaTeXParser()
+    guia = "\\section*{Instrucciones}\n\\item No es ejercicio.\n" + GUIA.replace(
+        "\\section*{Problemas}", "\\section*{Problemas\nde convolución}") + "\\end{document}\n"
+    esperados = parser.parse_file(guia)
+    assert len(esperados) == 3
+
+    flujo = parser.parse_stream(io.BytesIO(guia.encode('utf-8')))
+    # Entrega el primer ejercicio antes de terminar de leer el archivo
+    assert next(flujo) == esperados[0]
+    assert [esperados[0]] + list(flujo) == esperados
+
+
+def test_parse_stream_formato_subseccion_sin_seek():
+    class SoloLectura:
+        def __init__(self, texto): self._f = io.StringIO(texto)
+        def seekable(self): return False
+        def __iter__(self): return iter(self._f)
+
+    guia = "\\subsection*{Transformada Z}\n\\begin{enumerate}\n\\item Calcule $X(z)$.\n\\item Grafique.\n\\end{enumerate}\n"
+    parser = LaTeXParser()
+    esperados = parser.parse_file(guia)
+    assert len(esperados) == 2
+    assert list(parser.parse_stream(SoloLectura(guia))) == esperados
+    assert list(parser.parse_stream(io.StringIO(guia))) == esperados
@@ -0,0 +1,90 @@
+"""
+Tests de la detección de ejercicios casi duplicados (MinHash + LSH)
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from database.db_manager import DatabaseManager
+from database.near_duplicates import BANDS, estimate_similarity, minhash_signature
+
+BASE = ("Considere el sistema LTI con respuesta al impulso h[n] = (0.5)^n u[n]. Calcule la salida y[n] "
+        "cuando la entrada es x[n] = u[n] - u[n-4] y grafique el resultado obtenido.")
+
+
+def _relleno(n: int):
+    return [{'titulo': f"Otro {i}", 'unidad_tematica': 'Fourier',
+             'enunciado': f"Encuentre la transformada de Fourier de la señal número {i}: x(t) = e^(-{i}t) u(t)."}
+            for i in range(n)]
+
+
+def test_firma_estima_jaccard():
+    firma = minhash_signature(BASE)
+    assert len(firma) == 64 and minhash_signature(BASE.upper()) == firma
+    assert estimate_similarity(firma, minhash_signature(BASE.replace("grafique", "dibuje"))) > 0.7
+    assert estimate_similarity(firma, minhash_signature("Demuestre el teorema de muestreo de Nyquist.")) < 0.2
+    assert minhash_signature("  ") is None
+
+
+def test_similares_se_mantienen_al_insertar_editar_y_borrar(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    db.batch_import_exercises(_relleno(30))
+    original = db.agregar_ejercicio({'titulo': 'Original', 'enunciado': BASE, 'unidad_tematica': 'LTI'})
+    copia = db.batch_import_exercises([{'titulo': 'Copia', 'enunciado': BASE + " Justifique.",
+                                        'unidad_tematica': 'LTI'}])['ids_insertados'][0]
+
+    similares = db.buscar_similares(original)
+    assert [e['id'] for e in similares] == [copia] and similares[0]['similitud'] > 0.8
+
+    db.actualizar_ejercicio(copia, {'enunciado': "Demuestre el teorema de muestreo de Nyquist."})
+    assert db.buscar_similares(original) == []
+    db.actualizar_ejercicios([(copia, {'enunciado': BASE})])
+    assert [e['id'] for e in db.buscar_similares(original)] == [copia]
+
+    db.eliminar_ejercicio(copia)
+    with db.pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM minhash_bandas WHERE ejercicio_id = ?", (copia,)).fetchone()[0] == 0
+    assert db.buscar_similares(original) == []
+    db.pool.close_all()
+
+
+def test_reporte_agrupa_y_repone_firmas_escritas_por_fuera(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    db.batch_import_exercises(_relleno(20) + [
+        {'titulo': 'A', 'enunciado': BASE, 'unidad_tematica': 'LTI'},
+        {'titulo': 'B', 'enunciado': BASE.replace("grafique", "dibuje"), 'unidad_tematica': 'LTI'},
+    ])
+    # Un script que escribe directo en la tabla deja el ejercicio sin firma
+    with db.pool.transaction() as conn:
+        conn.execute("INSERT INTO ejercicios (titulo, enunciado, unidad_tematica) VALUES ('C', ?, 'LTI')",
+                     (BASE + " Justifique.",))
+
+    grupos = db.reporte_duplicados(0.6)
+    assert [[e['titulo'] for e in g['ejercicios']] for g in grupos] == [['A', 'B', 'C']]
+    assert all(similitud >= 0.6 for _, _, similitud in grupos[0]['pares'])
+    with db.pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM minhash_bandas").fetchone()[0] == 23 * BANDS
+    db.pool.close_all()
+
+
+def test_migracion_indexa_base_existente(tmp_path):
+    path = tmp_path / "vieja.db"
+    DatabaseManager(str(path)).pool.close_all()
+    # Base en la versión 8, anterior al índice MinHash, con ejercicios ya guardados
+    conn = sqlite3.connect(path)
+    for objeto in ("TRIGGER minhash_ad", "TRIGGER minhash_au", "TABLE minhash_bandas", "TABLE minhash_firmas"):
+        conn.execute(f"DROP {objeto}")
+    conn.executemany("INSERT INTO ejercicios (titulo, enunciado, unidad_tematica) VALUES (?, ?, 'LTI')",
+                     [('A', BASE), ('B', BASE + " Justifique.")])
+    conn.execute("PRAGMA user_version = 8")
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(str(path))
+    assert [e['titulo'] for e in db.buscar_similares(1)] == ['B']
+    db.pool.close_all()
@@ -0,0 +1,89 @@
+"""
+Tests de la caché de resultados del parser LaTeX
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+from utils.batch_import import parse_directory
+from utils.latex_parser import LaTeXParser, ParsedExercise
+from utils.parse_cache import ParseResultCache, content_key
+
+GUIA = ("\\section*{Convolución}\n\\begin{enumerate}\n"
+        "\\item Calcule $x(t) * h(t)$. \\ifanswers{Solución: $y(t)$}\\fi\n"
+        "\\item Demuestre que es lineal.\nConsidere $t > 0$.\n\\end{enumerate}\n")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ParseResultCache(str(tmp_path / "parse_cache.db"))
+    yield cache
+    cache.pool.close_all()
+
+
+def test_clave_ignora_comentarios_y_acepta_archivos(tmp_path):
+    base = content_key(GUIA)
+    assert content_key(GUIA.replace("$t > 0$.", "$t > 0$.% revisar")) == base
+    assert content_key(GUIA.replace("lineal", "causal")) != base
+    path = tmp_path / "guia.tex"
+    path.write_text(GUIA, encoding='utf-8')
+    with open(path, 'rb') as f:
+        assert content_key(f) == base
+
+
+def test_parse_devuelve_lo_mismo_desde_la_cache(cache):
+    parser = LaTeXParser()
+    esperados = parser.parse_file(GUIA)
+    assert cache.parse(GUIA, parser) == esperados
+    assert cache.parse(GUIA, parser) == esperados
+    assert all(isinstance(ex, ParsedExercise) for ex in cache.parse(GUIA, parser))
+    assert (cache.stats()['hits'], cache.stats()['misses'], cache.stats()['writes']) == (2, 1, 1)
+
+
+def test_persiste_y_no_vuelve_a_parsear(tmp_path, monkeypatch):
+    path = str(tmp_path / "parse_cache.db")
+    guia = GUIA * 200
+    ParseResultCache(path).parse(guia)
+
+    def sin_parsear(self, content):
+        raise AssertionError("el acierto de caché no debe volver a parsear")
+
+    monkeypatch.setattr(LaTeXParser, 'parse_file', sin_parsear)
+    cache = ParseResultCache(path)
+    assert len(cache.parse(guia)) == 400
+    assert cache.stats()['hits'] == 1
+    cache.pool.close_all()
+
+
+def test_expulsa_por_entradas_y_por_tamano(tmp_path):
+    cache = ParseResultCache(str(tmp_path / "lru.db"), max_entries=3)
+    for clave in "abc":
+        cache.put(clave, [ParsedExercise(titulo=clave, enunciado="x" * 100)])
+    cache.get("a")  # 'a' pasa a ser la más reciente
+    cache.put("d", [])
+    assert cache.stats()['entries'] <= 3
+    assert cache.get("b") is None and cache.get("a") is not None
+
+    cache.max_bytes = cache.stats()['bytes'] // 2
+    cache.put("e", [])
+    assert cache.stats()['bytes'] <= cache.max_bytes
+    assert cache.get("e") == []
+    cache.pool.close_all()
+
+
+def test_importacion_en_lote_usa_la_cache(tmp_path, cache):
+    (tmp_path / "curso").mkdir()
+    (tmp_path / "curso" / "guia1.tex").write_text(GUIA, encoding='utf-8')
+    (tmp_path / "curso" / "guia2.tex").write_text(GUIA.replace("Convolución", "Fourier"), encoding='utf-8')
+
+    primera = parse_directory(tmp_path / "curso", max_workers=1, cache=cache)
+    segunda = parse_directory(tmp_path / "curso", max_workers=1, cache=cache)
+    assert [r.cached for r in primera] == [False, False]
+    assert [r.cached for r in segunda] == [True, True]
+    assert [r.exercises for r in segunda] == [r.exercises for r in primera]
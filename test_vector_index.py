@@ -0,0 +1,96 @@
+"""
+Tests del índice vectorial de búsqueda semántica
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(str(Path(__file__).parent))
+
+pytest.importorskip("numpy")
+
+from database.db_manager import DatabaseManager
+from database.migrations import rotate_vector_token
+from database.vector_index import VectorIndex
+
+
+def _banco(db: DatabaseManager):
+    return db.batch_import_exercises([
+        {'titulo': 'Aliasing', 'unidad_tematica': 'Muestreo', 'subtemas': ['muestreo', 'aliasing'],
+         'enunciado': "Una señal de 3 kHz se muestrea a 4 kHz. Determine la frecuencia aparente."},
+        {'titulo': 'Nyquist', 'unidad_tematica': 'Muestreo', 'palabras_clave': ['muestreo', 'Nyquist'],
+         'enunciado': "Indique la tasa mínima de muestreo para reconstruir la señal sin aliasing."},
+        {'titulo': 'Convolución', 'unidad_tematica': 'LTI', 'subtemas': ['convolución'],
+         'enunciado': "Calcule la convolución de dos pulsos rectangulares de distinto ancho."},
+        {'titulo': 'Región ROC', 'unidad_tematica': 'Transformada Z', 'palabras_clave': ['región de convergencia'],
+         'enunciado': "Encuentre la transformada Z y su región de convergencia."},
+    ])['ids_insertados']
+
+
+def test_consultas_top_k_por_coseno(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    aliasing, nyquist, convolucion, _ = _banco(db)
+    index = VectorIndex(db)
+    assert index.sync() == 4 and index.path == tmp_path / "ejercicios.vec"
+
+    resultados = index.search("aliasing al muestrear", k=2)
+    assert [i for i, _ in resultados] == [aliasing, nyquist]
+    assert 0 < resultados[1][1] <= resultados[0][1] <= 1.0
+    lote = index.search_batch(["convolución de pulsos", "aliasing al muestrear"], k=2)
+    assert lote[0][0][0] == convolucion and lote[1] == resultados
+    assert [i for i, _ in index.similar(aliasing, k=1)] == [nyquist]
+    db.pool.close_all()
+
+
+def test_sync_incremental_y_persistencia(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    aliasing, nyquist, _, _ = _banco(db)
+    index = VectorIndex(db)
+    index.sync()
+
+    nuevo = db.agregar_ejercicio({'titulo': 'Estabilidad', 'unidad_tematica': 'Laplace',
+                                  'enunciado': "Analice la estabilidad BIBO a partir de los polos."})
+    db.actualizar_ejercicio(aliasing, {'palabras_clave': ['estabilidad', 'polos']})
+    db.eliminar_ejercicio(nyquist)
+    # Solo se vectorizan los 3 ejercicios en cola; las filas anteriores no se tocan
+    assert index.sync() == 3 and index.sync() == 0
+    assert index.stats()['rows'] == 7 and index.stats()['live'] == 4
+    assert [i for i, _ in index.search("estabilidad de los polos", k=2)] == [nuevo, aliasing]
+    assert nyquist not in [i for i, _ in index.search("tasa mínima de muestreo Nyquist", k=5)]
+
+    # Otra instancia lee la misma matriz en disco sin reconstruir
+    reabierto = VectorIndex(db)
+    assert reabierto.sync() == 0 and reabierto.stats() == index.stats()
+    db.pool.close_all()
+
+
+def test_token_distinto_reconstruye(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    _banco(db)
+    index = VectorIndex(db)
+    index.sync()
+    with db.pool.transaction() as conn:
+        rotate_vector_token(conn)
+    assert index.sync() == 4 and index.stats()['rows'] == 4
+    db.pool.close_all()
+
+
+def test_filtros_acotan_el_top_k_antes_de_cortar(tmp_path):
+    db = DatabaseManager(str(tmp_path / "ejercicios.db"))
+    ids = _banco(db)
+    convolucion = ids[2]
+    index = VectorIndex(db)
+    index.sync()
+
+    consulta = "muestreo de la señal sin aliasing y pulsos"
+    # Sin filtro la convolución queda fuera del top-1; con el filtro de unidad es el único candidato
+    assert [i for i, _ in index.search(consulta, k=1)] != [convolucion]
+    permitidos = [e['id'] for e in db.obtener_ejercicios({'unidad_tematica': ['LTI']}, columns=['id'])]
+    assert [i for i, _ in index.search(consulta, k=1, allowed=permitidos)] == [convolucion]
+    assert index.search("aliasing al muestrear", k=5, allowed=permitidos) == []
+    assert index.search("aliasing al muestrear", k=5, allowed=[]) == []
+    db.pool.close_all()
@@ -0,0 +1,185 @@
+"""
+Backends de modelos generativos para el enriquecimiento y el OCR
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+``ModelBackend`` define las tres operaciones que usa el sistema: generar
+(síncrono), generar asíncrono y generar a partir de varias partes (texto,
+PDF o imágenes). ``GeminiBackend`` importa ``google.generativeai`` solo al
+crearse, y ``FakeBackend`` responde localmente con latencia, errores y
+límites de cuota simulados y reproducibles, para pruebas y benchmarks sin
+conexión.
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.ai_scheduler import RateLimitError
+
+DEFAULT_GEMINI_MODEL = 'gemini-1.5-pro-latest'
+
+
+@dataclass
+class BackendResponse:
+    """Respuesta mínima de un backend: el texto generado"""
+    text: str
+
+
+class BackendError(Exception):
+    """Error del servicio con código HTTP (p. ej. 503)"""
+
+    def __init__(self, message: str, code: int = 500):
+        super().__init__(message)
+        self.code = code
+
+
+class ModelBackend(ABC):
+    """Interfaz de los backends de modelos generativos"""
+
+    model_name = 'backend'
+
+    @abstractmethod
+    def generate(self, prompt: str) -> Any:
+        ...
+
+    async def generate_async(self, prompt: str) -> Any:
+        return await asyncio.to_thread(self.generate, prompt)
+
+    @abstractmethod
+    def generate_multimodal(self, parts: Sequence[Any]) -> Any:
+        """``parts`` mezcla texto y dicts ``{'mime_type': ..., 'data': bytes}``"""
+
+
+class GeminiBackend(ModelBackend):
+    """Modelos de Google Gemini (``google.generativeai``)"""
+
+    def __init__(self, model_name: str = DEFAULT_GEMINI_MODEL, api_key: Optional[str] = None,
+                 safety_settings: Optional[List[Dict]] = None, generation_config: Optional[Dict] = None):
+        import google.generativeai as genai
+
+        if api_key:
+            genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(model_name, safety_settings=safety_settings,
+                                            generation_config=generation_config)
+        # Se conserva el nombre que reporta la librería (forma parte de las claves de la caché)
+        self.model_name = getattr(self._model, 'model_name', model_name)
+
+    def generate(self, prompt: str) -> Any:
+        return self._model.generate_content(prompt)
+
+    async def generate_async(self, prompt: str) -> Any:
+        return await self._model.generate_content_async(prompt)
+
+    def generate_multimodal(self, parts: Sequence[Any]) -> Any:
+        return self._model.generate_content(list(parts))
+
+
+class GenerativeModelAdapter(ModelBackend):
+    """Adapta un objeto con la API de ``GenerativeModel`` (``generate_content[_async]``)"""
+
+    def __init__(self, model):
+        self._model = model
+        self.model_name = getattr(model, 'model_name', type(model).__name__)
+
+    def generate(self, prompt: str) -> Any:
+        return self._model.generate_content(prompt)
+
+    async def generate_async(self, prompt: str) -> Any:
+        if hasattr(self._model, 'generate_content_async'):
+            return await self._model.generate_content_async(prompt)
+        return await asyncio.to_thread(self._model.generate_content, prompt)
+
+    def generate_multimodal(self, parts: Sequence[Any]) -> Any:
+        return self._model.generate_content(list(parts))
+
+
+class FakeBackend(ModelBackend):
+    """Modelo local con latencia, errores y límites de cuota simulados.
+
+    Cada intento se decide con un generador seeded por ``(seed, prompt,
+    número de intento)``, así el resultado no depende del orden en que lleguen
+    las llamadas concurrentes. ``responder(prompt)`` arma el texto de la
+    respuesta; ``rate_limit_rate`` y ``error_rate`` son probabilidades por
+    llamada de devolver un 429 (con ``retry_after``) o un 503.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: Optional[float] = 1.0, seed: int = 0,
+                 responder: Optional[Callable[[str], str]] = None, model_name: str = 'fake'):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.responder = responder or (lambda prompt: '{}')
+        self.model_name = model_name
+        self._attempts: Dict[str, int] = {}
+        self.latencies: List[float] = []
+        self.counters = {'calls': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0}
+
+    def _draw(self, prompt: str):
+        """Latencia y resultado (None, 'error' o 'rate_limit') del próximo intento"""
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        attempt = self._attempts.get(digest, 0)
+        self._attempts[digest] = attempt + 1
+        rng = random.Random(f"{self.seed}:{digest}:{attempt}")
+        latency = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            return latency, 'rate_limit'
+        if roll < self.rate_limit_rate + self.error_rate:
+            return latency, 'error'
+        return latency, None
+
+    def _finish(self, prompt: str, latency: float, outcome: Optional[str]) -> BackendResponse:
+        self.counters['calls'] += 1
+        self.latencies.append(latency)
+        if outcome == 'rate_limit':
+            self.counters['rate_limited'] += 1
+            raise RateLimitError("429 Resource exhausted (simulado)", retry_after=self.retry_after)
+        if outcome == 'error':
+            self.counters['errors'] += 1
+            raise BackendError("503 Service unavailable (simulado)", code=503)
+        self.counters['ok'] += 1
+        return BackendResponse(self.responder(prompt))
+
+    def generate(self, prompt: str) -> BackendResponse:
+        latency, outcome = self._draw(prompt)
+        time.sleep(latency)
+        return self._finish(prompt, latency, outcome)
+
+    async def generate_async(self, prompt: str) -> BackendResponse:
+        latency, outcome = self._draw(prompt)
+        await asyncio.sleep(latency)
+        return self._finish(prompt, latency, outcome)
+
+    def generate_multimodal(self, parts: Sequence[Any]) -> BackendResponse:
+        # Las partes binarias entran en la semilla por su hash, no por su contenido
+        prompt = '\n'.join(part if isinstance(part, str)
+                           else hashlib.sha256(part.get('data', b'')).hexdigest()
+                           for part in parts)
+        return self.generate(prompt)
+
+
+BACKENDS = {'gemini': GeminiBackend, 'fake': FakeBackend}
+
+
+def create_backend(name: str, **kwargs) -> ModelBackend:
+    """Crea el backend ``name`` ('gemini' o 'fake') con sus opciones"""
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend de IA desconocido: {name}. Opciones: {', '.join(BACKENDS)}")
+    return backend_cls(**kwargs)
+
+
+def as_backend(model) -> ModelBackend:
+    """Devuelve ``model`` como ``ModelBackend``, adaptándolo si es un modelo de la librería"""
+    if isinstance(model, ModelBackend):
+        return model
+    return GenerativeModelAdapter(model)
@@ -0,0 +1,132 @@
+"""
+Agrupación de ejercicios en una sola llamada a la IA
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+``MicroBatcher`` junta las solicitudes que llegan casi al mismo tiempo y las
+procesa en un solo lote cuando se llena o cuando vence la espera máxima.
+``parse_batch_response`` interpreta la respuesta del modelo (un arreglo JSON
+con un objeto por ejercicio) y descarta los elementos incompletos, para que
+solo esos se reintenten por separado.
+"""
+
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+try:
+    import demjson3
+except ImportError:  # el parser permisivo es opcional
+    demjson3 = None
+
+_ARRAY = re.compile(r'\[.*\]', re.DOTALL)
+_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+_BAD_ESCAPE = re.compile(r'(?<!\\)\\(?!["\\/bfnrtu])')
+
+
+def _loads(json_str: str) -> Any:
+    repaired = _BAD_ESCAPE.sub(r'\\\\', json_str)
+    try:
+        return json.loads(repaired)
+    except json.JSONDecodeError:
+        if demjson3 is None:
+            raise
+        return demjson3.decode(repaired)
+
+
+def parse_batch_response(text: str, required_keys: Iterable[str]) -> Dict[str, Dict]:
+    """Resultados válidos de una respuesta por lotes, indexados por ``str(id)``.
+
+    Acepta un arreglo ``[{"id": ..., ...}]``, un único objeto con ``id``, un
+    objeto que envuelve ese arreglo o un objeto ``{"<id>": {...}}``. Los
+    elementos sin id o sin alguna de ``required_keys`` se omiten.
+    """
+    required = set(required_keys)
+    data = None
+    text = text or ''
+    # Se prueba primero el delimitador que aparece antes en el texto
+    brackets = [i for i in (text.find('['), text.find('{')) if i >= 0]
+    patterns = (_OBJECT, _ARRAY) if brackets and text[min(brackets)] == '{' else (_ARRAY, _OBJECT)
+    for pattern in patterns:
+        match = pattern.search(text)
+        if not match:
+            continue
+        try:
+            data = _loads(match.group(0))
+            break
+        except Exception:
+            continue
+
+    if isinstance(data, dict) and 'id' in data:
+        # Lote de un solo elemento respondido sin el arreglo
+        data = [data]
+    elif isinstance(data, dict):
+        arrays = [v for v in data.values() if isinstance(v, list)]
+        if len(arrays) == 1:
+            data = arrays[0]
+        else:
+            data = [dict(v, id=k) for k, v in data.items() if isinstance(v, dict)]
+    if not isinstance(data, list):
+        return {}
+
+    results = {}
+    for item in data:
+        if not isinstance(item, dict) or item.get('id') is None:
+            continue
+        if not required.issubset(item):
+            continue
+        result = {k: v for k, v in item.items() if k != 'id'}
+        results[str(item['id'])] = result
+    return results
+
+
+class MicroBatcher:
+    """Agrupa ``submit(clave, elemento)`` en llamadas a ``process_batch``.
+
+    ``process_batch`` recibe una lista de ``(clave, elemento)`` y devuelve un
+    dict ``clave -> resultado``; las claves ausentes resuelven en ``None``.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Tuple[Hashable, Any]]], Awaitable[Dict]],
+                 max_batch_size: int = 8, max_wait: float = 2.0):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Hashable, Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.counters = {'batches': 0, 'items': 0}
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        """Encola un elemento y espera su resultado (o None si no vino)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((key, item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Hashable, Any, asyncio.Future]]):
+        self.counters['batches'] += 1
+        self.counters['items'] += len(batch)
+        try:
+            results = await self.process_batch([(key, item) for key, item, _ in batch]) or {}
+        except Exception:
+            # Un lote fallido no pierde los elementos: cada uno se reintenta solo
+            results = {}
+        for key, _, future in batch:
+            if not future.done():
+                future.set_result(results.get(key))
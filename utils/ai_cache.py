@@ -0,0 +1,133 @@
+"""
+Caché en disco de respuestas de la IA direccionada por contenido
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+La clave es un hash de la versión del prompt, el nombre del modelo y el
+prompt ya formateado y normalizado, así que un ejercicio cuyo texto no
+cambió reutiliza la respuesta anterior aunque se fuerce el re-proceso.
+"""
+
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from typing import Dict, Optional
+
+from database.connection_pool import get_pool
+
+DEFAULT_CACHE_PATH = "database/ai_cache.db"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normaliza Unicode (NFC) y colapsa espacios para que el hash sea estable"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', prompt)).strip()
+
+
+def template_version(template: str) -> str:
+    """Versión corta derivada del texto de una plantilla de prompt"""
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:12]
+
+
+def cache_key(prompt_version: str, model_name: str, prompt: str) -> str:
+    """Clave de caché: sha256 de versión, modelo y prompt normalizado"""
+    h = hashlib.sha256()
+    for part in (prompt_version, model_name, normalize_prompt(prompt)):
+        h.update(part.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class AIResponseCache:
+    """Caché LRU de respuestas en un archivo SQLite acotado por tamaño.
+
+    ``bypass=True`` ignora las lecturas (todo es un fallo) pero sigue
+    guardando las respuestas nuevas, para refrescar la caché.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 bypass: bool = False):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.counters = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.pool = get_pool(db_path)
+        with self.pool.connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                modelo TEXT,
+                respuesta TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                creado REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas (ultimo_acceso)")
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        """Respuesta guardada para ``key`` o None"""
+        if self.bypass:
+            self.counters['misses'] += 1
+            return None
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT respuesta FROM respuestas WHERE clave = ?", (key,)).fetchone()
+            if row is None:
+                self.counters['misses'] += 1
+                return None
+            conn.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (time.time(), key))
+        self.counters['hits'] += 1
+        return row[0]
+
+    def put(self, key: str, response: str, model_name: str = ''):
+        """Guarda una respuesta y expulsa las menos usadas si se excede el tamaño"""
+        size = len(response.encode('utf-8'))
+        now = time.time()
+        with self.pool.transaction() as conn:
+            previous = conn.execute("SELECT bytes FROM respuestas WHERE clave = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, modelo, respuesta, bytes, creado, ultimo_acceso) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, size, now, now),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(conn)
+        self.counters['writes'] += 1
+
+    def _evict(self, conn):
+        # Se libera hasta el 90% del límite para no expulsar en cada escritura
+        objetivo = int(self.max_bytes * 0.9)
+        cursor = conn.execute("SELECT clave, bytes FROM respuestas ORDER BY ultimo_acceso, creado")
+        expulsadas = []
+        for clave, size in cursor:
+            if self._total_bytes <= objetivo:
+                break
+            expulsadas.append((clave,))
+            self._total_bytes -= size
+        cursor.close()
+        conn.executemany("DELETE FROM respuestas WHERE clave = ?", expulsadas)
+        self.counters['evictions'] += len(expulsadas)
+
+    def clear(self):
+        """Vacía la caché"""
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM respuestas")
+        self._total_bytes = 0
+
+    def stats(self) -> Dict:
+        """Contadores de aciertos/fallos y tamaño actual"""
+        lookups = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'hit_rate': self.counters['hits'] / lookups if lookups else 0.0,
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,255 @@
+"""
+Planificador de llamadas a la IA con límites de cuota
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+Combina un token bucket de solicitudes/minuto y otro de tokens/minuto,
+reintentos con backoff exponencial con jitter que respetan el tiempo de
+espera que indica el servidor, y una concurrencia adaptativa (AIMD) que
+baja ante respuestas 429 y sube mientras las llamadas salen bien.
+"""
+
+import asyncio
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Códigos HTTP que indican saturación o un fallo transitorio del servidor
+RATE_LIMIT_CODES = {429}
+TRANSIENT_CODES = {500, 502, 503, 504}
+
+_RATE_LIMIT_NAMES = ('ResourceExhausted', 'TooManyRequests', 'RateLimit')
+_RATE_LIMIT_TEXT = re.compile(r'\b429\b|rate.?limit|quota|resource.?exhausted', re.IGNORECASE)
+_RETRY_DELAY_TEXT = re.compile(
+    r'retry[_ ]?(?:delay|after|in)\D{0,20}?(\d+(?:\.\d+)?)\s*(ms|s)?', re.IGNORECASE)
+
+
+class RateLimitError(Exception):
+    """Respuesta 429 del modelo, opcionalmente con el tiempo de espera sugerido"""
+
+    def __init__(self, message: str = "429 Resource exhausted", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.code = 429
+
+
+def _error_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, 'code', None)
+    if callable(code):
+        # google.api_core expone code como propiedad; grpc como método
+        try:
+            code = code()
+        except Exception:
+            return None
+    code = getattr(code, 'value', code)
+    if isinstance(code, tuple):
+        code = code[0]
+    return code if isinstance(code, int) else None
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """True si la excepción corresponde a un límite de cuota (HTTP 429)"""
+    if _error_code(exc) in RATE_LIMIT_CODES:
+        return True
+    if any(name in type(exc).__name__ for name in _RATE_LIMIT_NAMES):
+        return True
+    return bool(_RATE_LIMIT_TEXT.search(str(exc)))
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """Errores que vale la pena reintentar: cuota, timeouts y fallos 5xx"""
+    if is_rate_limit_error(exc):
+        return True
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return _error_code(exc) in TRANSIENT_CODES
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Tiempo de espera que pide el servidor, si viene en la excepción"""
+    value = getattr(exc, 'retry_after', None)
+    if value is not None:
+        return float(value)
+    match = _RETRY_DELAY_TEXT.search(str(exc))
+    if match:
+        seconds = float(match.group(1))
+        return seconds / 1000 if match.group(2) == 'ms' else seconds
+    return None
+
+
+class TokenBucket:
+    """Token bucket asíncrono que se rellena a ``rate_per_minute`` por minuto.
+
+    ``pause(seconds)`` detiene la entrega hasta que pase la espera indicada
+    por el servidor, aunque queden tokens en el balde.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute debe ser positivo")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Espera hasta poder consumir ``amount`` tokens"""
+        # Una solicitud más grande que el balde se deja pasar con el balde lleno
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Corrige el consumo (positivo cobra más, negativo devuelve tokens)"""
+        self._refill(self._clock())
+        self._tokens = min(self.capacity, self._tokens - amount)
+
+    def pause(self, seconds: float):
+        """Detiene la entrega de tokens durante ``seconds`` (back-pressure)"""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+class AdaptiveLimiter:
+    """Semáforo de límite variable con control AIMD.
+
+    Sube el límite en 1 tras ``limit`` éxitos seguidos y lo reduce a la
+    mitad ante un límite de cuota, entre ``min_limit`` y ``max_limit``.
+    """
+
+    def __init__(self, initial: int = 2, min_limit: int = 1, max_limit: int = 8):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_backpressure(self):
+        self.limit = max(self.min_limit, self.limit // 2)
+        self._successes = 0
+
+
+def estimate_tokens(prompt: Any, expected_output_tokens: int = 1024) -> int:
+    """Estimación gruesa: ~4 caracteres por token más la respuesta esperada"""
+    return len(str(prompt)) // 4 + expected_output_tokens
+
+
+def _response_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, 'usage_metadata', None)
+    total = getattr(usage, 'total_token_count', None)
+    return total if isinstance(total, int) else None
+
+
+class AIScheduler:
+    """Ejecuta llamadas al modelo respetando cuotas y reintentando con backoff.
+
+    ``call(fn, prompt)`` espera turno en los dos token buckets y en el
+    limitador de concurrencia, ejecuta ``await fn(prompt)`` con timeout y,
+    si el error es reintentable, vuelve a intentarlo tras
+    ``backoff_delay(intento)`` o el ``retry_after`` del servidor si es mayor.
+    """
+
+    def __init__(self, requests_per_minute: float = 60, tokens_per_minute: float = 1_000_000,
+                 initial_concurrency: int = 2, max_concurrency: int = 8,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 request_timeout: Optional[float] = None, expected_output_tokens: int = 1024,
+                 rng: Optional[random.Random] = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.limiter = AdaptiveLimiter(initial_concurrency, 1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.request_timeout = request_timeout
+        self.expected_output_tokens = expected_output_tokens
+        self._rng = rng or random.Random()
+        self.counters = {'calls': 0, 'ok': 0, 'retries': 0, 'rate_limited': 0, 'failed': 0}
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Backoff exponencial con jitter completo; nunca menor que ``retry_after``"""
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    async def call(self, fn: Callable[[Any], Awaitable[Any]], prompt: Any,
+                   output_tokens: Optional[int] = None) -> Any:
+        """Ejecuta ``await fn(prompt)`` bajo las cuotas configuradas.
+
+        ``output_tokens`` reemplaza la estimación de tokens de respuesta
+        (p. ej. en prompts por lotes, que responden varios ejercicios).
+        """
+        if output_tokens is None:
+            output_tokens = self.expected_output_tokens
+        estimated = estimate_tokens(prompt, output_tokens)
+        attempt = 0
+        while True:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated)
+            self.counters['calls'] += 1
+            try:
+                async with self.limiter:
+                    if self.request_timeout:
+                        response = await asyncio.wait_for(fn(prompt), self.request_timeout)
+                    else:
+                        response = await fn(prompt)
+            except Exception as e:
+                if not is_retryable_error(e) or attempt >= self.max_retries:
+                    self.counters['failed'] += 1
+                    raise
+                retry_after = retry_after_seconds(e)
+                if is_rate_limit_error(e):
+                    self.counters['rate_limited'] += 1
+                    self.limiter.on_backpressure()
+                    if retry_after:
+                        self.requests.pause(retry_after)
+                        self.tokens.pause(retry_after)
+                self.counters['retries'] += 1
+                await asyncio.sleep(self.backoff_delay(attempt, retry_after))
+                attempt += 1
+                continue
+
+            self.limiter.on_success()
+            self.counters['ok'] += 1
+            actual = _response_tokens(response)
+            if actual is not None:
+                self.tokens.adjust(actual - estimated)
+            return response
+
+    def stats(self) -> Dict:
+        """Contadores y concurrencia actual (para la barra de progreso)"""
+        return {**self.counters, 'concurrency': self.limiter.limit}
@@ -0,0 +1,143 @@
+"""
+Importación en lote de archivos LaTeX
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+Busca todos los ``.tex`` de un ZIP o directorio y los parsea en paralelo con
+un ``ProcessPoolExecutor``; cada proceso crea su propio ``LaTeXParser`` una
+sola vez. Los resultados conservan el archivo de origen y el tiempo de
+parseo de cada uno, en el mismo orden en que se encontraron los archivos.
+Con una ``ParseResultCache`` los archivos ya parseados no llegan a los procesos.
+"""
+
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+from utils.latex_parser import LaTeXParser, ParsedExercise
+from utils.parse_cache import ParseResultCache, content_key
+
+logger = logging.getLogger(__name__)
+
+# Carpetas que agregan algunos compresores y que no contienen guías
+IGNORED_DIRS = {'__MACOSX', '.git'}
+
+_worker_parser: Optional[LaTeXParser] = None
+
+
+@dataclass
+class FileParseResult:
+    """Resultado del parseo de un archivo .tex"""
+    source: str                      # Ruta relativa a la raíz del ZIP/directorio
+    path: str                        # Ruta absoluta del archivo
+    exercises: List[ParsedExercise] = field(default_factory=list)
+    seconds: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False             # Resultado tomado de la caché de parseo
+
+
+def find_tex_files(root: Union[str, Path]) -> List[Path]:
+    """Todos los .tex bajo ``root``, en orden estable"""
+    root = Path(root)
+    return sorted(p for p in root.rglob('*.tex')
+                  if p.is_file() and not IGNORED_DIRS.intersection(p.relative_to(root).parts))
+
+
+def _source(path: str, root: str) -> str:
+    return Path(path).relative_to(root).as_posix()
+
+
+def _init_worker():
+    global _worker_parser
+    # Los logs INFO del parser por cada ejercicio solo agregan ruido en los procesos
+    logging.getLogger('utils.latex_parser').setLevel(logging.WARNING)
+    _worker_parser = LaTeXParser()
+
+
+def _parse_one(path: str, root: str) -> FileParseResult:
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = LaTeXParser()
+    result = FileParseResult(source=_source(path, root), path=path)
+    inicio = time.perf_counter()
+    try:
+        with open(path, encoding='utf-8') as f:
+            result.exercises = list(_worker_parser.parse_stream(f))
+    except Exception as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - inicio
+    return result
+
+
+def parse_files(paths: Iterable[Union[str, Path]], root: Union[str, Path],
+                max_workers: Optional[int] = None, executor: Optional[Executor] = None,
+                cache: Optional[ParseResultCache] = None) -> List[FileParseResult]:
+    """Parsea ``paths`` en paralelo; un archivo con error no detiene a los demás"""
+    paths = [str(Path(p).resolve()) for p in paths]
+    root = str(Path(root).resolve())
+    results: List[Optional[FileParseResult]] = [None] * len(paths)
+    keys = {}
+    if cache is not None:
+        parser = LaTeXParser()
+        for index, path in enumerate(paths):
+            inicio = time.perf_counter()
+            try:
+                with open(path, encoding='utf-8') as f:
+                    key = content_key(f, parser)
+            except (OSError, UnicodeDecodeError):
+                continue  # El proceso que lo parsee reporta el error
+            exercises = cache.get(key)
+            if exercises is None:
+                keys[index] = key
+            else:
+                results[index] = FileParseResult(_source(path, root), path, exercises,
+                                                 time.perf_counter() - inicio, cached=True)
+
+    pending = [index for index, result in enumerate(results) if result is None]
+    parsed = _parse_pending([paths[index] for index in pending], root, max_workers, executor)
+    for index, result in zip(pending, parsed):
+        results[index] = result
+        if index in keys and not result.error:
+            cache.put(keys[index], result.exercises)
+    return results
+
+
+def _parse_pending(paths: List[str], root: str, max_workers: Optional[int],
+                   executor: Optional[Executor]) -> List[FileParseResult]:
+    if not paths:
+        return []
+    workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    if executor is None and workers == 1:
+        # Sin procesos extra para un solo archivo
+        return [_parse_one(path, root) for path in paths]
+
+    own_executor = executor is None
+    executor = executor or ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        return list(executor.map(_parse_one, paths, [root] * len(paths)))
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def parse_directory(root: Union[str, Path], max_workers: Optional[int] = None,
+                    cache: Optional[ParseResultCache] = None) -> List[FileParseResult]:
+    """Parsea todos los .tex de un directorio"""
+    return parse_files(find_tex_files(root), root, max_workers=max_workers, cache=cache)
+
+
+def parse_zip(zip_file, dest_dir: Union[str, Path], max_workers: Optional[int] = None,
+              cache: Optional[ParseResultCache] = None) -> List[FileParseResult]:
+    """Extrae un ZIP (ruta o archivo abierto) en ``dest_dir`` y parsea todos sus .tex"""
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        zip_ref.extractall(dest_dir)
+    return parse_directory(dest_dir, max_workers=max_workers, cache=cache)
+
+
+def merge_results(results: List[FileParseResult]) -> List[Tuple[FileParseResult, ParsedExercise]]:
+    """Ejercicios de todos los archivos, cada uno con el resultado de su archivo de origen"""
+    return [(result, exercise) for result in results for exercise in result.exercises]
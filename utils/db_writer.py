@@ -0,0 +1,108 @@
+"""
+Escritor de base de datos en un hilo dedicado
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+Los resultados se encolan sin bloquear el event loop de asyncio y un hilo
+aparte los guarda por grupos: cada grupo se confirma en una transacción
+cuando junta ``max_batch`` elementos o cuando pasan ``max_delay_ms`` desde
+el primero, lo que ocurra antes.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_STOP = object()
+
+
+class AsyncDBWriter:
+    """Cola de escritura con commit agrupado en un hilo propio.
+
+    ``commit(grupo)`` se ejecuta en el hilo escritor y debe guardar todo el
+    grupo en una transacción. Si falla, los elementos se reintentan de a uno
+    para que un solo elemento problemático no haga perder el grupo entero.
+    """
+
+    def __init__(self, commit: Callable[[List[Any]], None], max_batch: int = 50,
+                 max_delay_ms: float = 200.0, on_error: Optional[Callable[[Any, Exception], None]] = None):
+        self.commit = commit
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay_ms / 1000.0
+        self.on_error = on_error
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._started_at: Optional[float] = None
+        self.counters = {'queued': 0, 'written': 0, 'commits': 0, 'errors': 0, 'commit_seconds': 0.0}
+
+    def start(self) -> 'AsyncDBWriter':
+        self._started_at = time.monotonic()
+        self._thread.start()
+        return self
+
+    def submit(self, item: Any):
+        """Encola un elemento; no bloquea (se puede llamar desde el event loop)"""
+        self.counters['queued'] += 1
+        self._queue.put_nowait(item)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch: List[Any]):
+        inicio = time.perf_counter()
+        try:
+            self.commit(batch)
+            self.counters['commits'] += 1
+            self.counters['written'] += len(batch)
+        except Exception:
+            for item in batch:
+                try:
+                    self.commit([item])
+                    self.counters['commits'] += 1
+                    self.counters['written'] += 1
+                except Exception as e:
+                    self.counters['errors'] += 1
+                    if self.on_error is not None:
+                        self.on_error(item, e)
+        self.counters['commit_seconds'] += time.perf_counter() - inicio
+
+    def close(self):
+        """Guarda lo pendiente y detiene el hilo (bloqueante)"""
+        if self._thread.is_alive():
+            self._queue.put_nowait(_STOP)
+            self._thread.join()
+
+    async def aclose(self):
+        """Versión asíncrona de ``close`` que no bloquea el event loop"""
+        await asyncio.to_thread(self.close)
+
+    def stats(self) -> Dict:
+        """Contadores de throughput para la barra de progreso"""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        commits = self.counters['commits']
+        return {
+            **self.counters,
+            'pending': self._queue.qsize(),
+            'avg_batch': self.counters['written'] / commits if commits else 0.0,
+            'rows_per_second': self.counters['written'] / elapsed if elapsed else 0.0,
+        }
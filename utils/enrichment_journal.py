@@ -0,0 +1,122 @@
+"""
+Corridas reanudables del enriquecimiento con IA
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+Una corrida recorre la tabla ejercicios por páginas (keyset sobre id) en
+lugar de cargarla entera, y anota en ``enriquecimiento_bitacora`` cada
+ejercicio terminado en la misma transacción que guarda su resultado. Si el
+proceso se interrumpe, la siguiente corrida del mismo modo y versión de
+prompts retoma la corrida abierta y salta los ejercicios ya anotados.
+"""
+
+import sqlite3
+from typing import Dict, Iterator, Mapping, Optional, Sequence, Set, Tuple
+
+from utils.enrichment_planner import ALL_PHASES, PLANNER_COLUMNS, prepare_exercise, stale_phases
+
+MODES = ('pendientes', 'forzado', 'incremental')
+
+# Condición de cada modo sobre la tabla ejercicios (alias e)
+_MODE_CONDITIONS = {
+    'pendientes': "(e.estado_ia IS NULL OR e.estado_ia IN ('PENDIENTE', 'ERROR'))",
+    'forzado': "1",
+    # El modo incremental compara huellas en Python: se leen todas las filas
+    'incremental': "1",
+}
+
+
+class EnrichmentRun:
+    """Corrida de enriquecimiento con bitácora en la base de datos.
+
+    ``start()`` abre una corrida nueva o retoma la última sin terminar del
+    mismo modo y versión. ``iter_pending()`` entrega ``(ejercicio, fases)``
+    página a página y ``record(conn, ...)`` anota los terminados dentro de la
+    transacción del llamador.
+    """
+
+    def __init__(self, db_manager, modo: str, version: str = '',
+                 versions: Optional[Mapping[int, str]] = None, page_size: int = 200):
+        if modo not in MODES:
+            raise ValueError(f"Modo de corrida desconocido: {modo}")
+        if modo == 'incremental' and not versions:
+            raise ValueError("El modo incremental necesita las versiones de cada fase")
+        self.db_manager = db_manager
+        self.modo = modo
+        self.version = version
+        self.versions = versions
+        self.page_size = page_size
+        self.corrida_id: Optional[int] = None
+        self.resumed = False
+
+    def start(self, nueva: bool = False) -> int:
+        """Abre o retoma la corrida; ``nueva=True`` descarta las abiertas"""
+        with self.db_manager.pool.transaction() as conn:
+            if nueva:
+                conn.execute(
+                    "UPDATE enriquecimiento_corridas SET terminada = CURRENT_TIMESTAMP "
+                    "WHERE terminada IS NULL AND modo = ?", (self.modo,))
+            row = conn.execute(
+                "SELECT id FROM enriquecimiento_corridas "
+                "WHERE terminada IS NULL AND modo = ? AND version_prompt IS ? "
+                "ORDER BY id DESC LIMIT 1", (self.modo, self.version)).fetchone()
+            if row:
+                self.corrida_id, self.resumed = row[0], True
+            else:
+                cursor = conn.execute(
+                    "INSERT INTO enriquecimiento_corridas (modo, version_prompt) VALUES (?, ?)",
+                    (self.modo, self.version))
+                self.corrida_id, self.resumed = cursor.lastrowid, False
+        return self.corrida_id
+
+    def _where(self) -> str:
+        return (f"{_MODE_CONDITIONS[self.modo]} AND NOT EXISTS ("
+                f"SELECT 1 FROM enriquecimiento_bitacora b "
+                f"WHERE b.corrida_id = ? AND b.ejercicio_id = e.id)")
+
+    def done_count(self) -> int:
+        """Ejercicios ya anotados en la bitácora de esta corrida"""
+        with self.db_manager.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM enriquecimiento_bitacora WHERE corrida_id = ?",
+                                (self.corrida_id,)).fetchone()[0]
+
+    def pending_count(self) -> Optional[int]:
+        """Ejercicios por procesar, o None si depende de comparar huellas"""
+        if self.modo == 'incremental':
+            return None
+        with self.db_manager.pool.connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM ejercicios e WHERE {self._where()}",
+                                (self.corrida_id,)).fetchone()[0]
+
+    def iter_pending(self) -> Iterator[Tuple[Dict, Set[int]]]:
+        """Ejercicios pendientes de la corrida, leídos de a ``page_size`` filas"""
+        columns = ', '.join(f"e.{c}" for c in PLANNER_COLUMNS)
+        sql = f"SELECT {columns} FROM ejercicios e WHERE e.id > ? AND {self._where()} ORDER BY e.id LIMIT ?"
+        last_id = 0
+        while True:
+            # La conexión se devuelve al pool antes de entregar la página
+            with self.db_manager.pool.connection() as conn:
+                rows = conn.execute(sql, (last_id, self.corrida_id, self.page_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for row in rows:
+                exercise = prepare_exercise(dict(zip(PLANNER_COLUMNS, row)))
+                if self.modo == 'incremental':
+                    phases = stale_phases(exercise, self.versions)
+                    if not phases:
+                        continue
+                else:
+                    phases = set(ALL_PHASES)
+                yield exercise, phases
+
+    def record(self, conn: sqlite3.Connection, resultados: Sequence[Tuple[int, str]]):
+        """Anota ``(ejercicio_id, estado)`` en la bitácora usando la transacción ``conn``"""
+        conn.executemany(
+            "INSERT OR REPLACE INTO enriquecimiento_bitacora (corrida_id, ejercicio_id, estado) VALUES (?, ?, ?)",
+            [(self.corrida_id, ejercicio_id, estado) for ejercicio_id, estado in resultados])
+
+    def finish(self):
+        """Marca la corrida como terminada"""
+        with self.db_manager.pool.transaction() as conn:
+            conn.execute("UPDATE enriquecimiento_corridas SET terminada = CURRENT_TIMESTAMP WHERE id = ?",
+                         (self.corrida_id,))
@@ -0,0 +1,119 @@
+"""
+Planificador incremental del enriquecimiento con IA
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+Cada ejercicio enriquecido guarda una huella (hash) de las entradas de cada
+fase junto con la versión del prompt que la produjo. El planificador vuelve
+a calcular las huellas con el contenido actual y solo propone las fases
+cuyas entradas o prompt cambiaron: si cambia la fase 1 se rehacen las tres,
+porque las fases 2 y 3 dependen de su resultado.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from database.migrations import IA_FINGERPRINT_COLUMNS
+
+ALL_PHASES = frozenset({1, 2, 3})
+
+# Campos del ejercicio que entran en el prompt de cada fase
+PHASE_INPUTS = {
+    1: ('titulo', 'enunciado', 'solucion_completa'),
+    2: ('titulo', 'enunciado', 'unidad_tematica', 'nivel_dificultad'),
+    3: ('titulo', 'enunciado', 'unidad_tematica', 'nivel_dificultad'),
+}
+HASH_COLUMNS = {1: 'ia_hash_fase1', 2: 'ia_hash_fase2', 3: 'ia_hash_fase3'}
+VERSION_COLUMN = 'ia_version_prompt'
+
+# Campos de texto que se limpian antes de enviarlos a la IA
+TEXT_FIELDS = ('titulo', 'enunciado', 'solucion_completa')
+
+PLANNER_COLUMNS = ['id', 'estado_ia', 'titulo', 'enunciado', 'solucion_completa',
+                   'unidad_tematica', 'nivel_dificultad'] + IA_FINGERPRINT_COLUMNS
+
+
+def clean_text_for_ai(text: str) -> str:
+    """
+    Limpia y normaliza una cadena de texto antes de enviarla a la IA.
+    """
+    if not text:
+        return ""
+    try:
+        repaired_text = text.encode('latin1').decode('utf-8')
+        if 'Ã' not in repaired_text: text = repaired_text
+    except (UnicodeEncodeError, UnicodeDecodeError): pass
+    try:
+        text = re.sub(r'\\U([0-9a-fA-F]{8})', lambda m: chr(int(m.group(1), 16)), text)
+        text = re.sub(r'\\u([0-9a-fA-F]{4})', lambda m: chr(int(m.group(1), 16)), text)
+        text = re.sub(r'\\x([0-9a-fA-F]{2})', lambda m: chr(int(m.group(1), 16)), text)
+    except (ValueError, TypeError): pass
+    text = text.replace('\b', '').replace('\f', '').replace('\\\\', '\\')
+    return text.strip()
+
+
+def prepare_exercise(row: Mapping) -> Dict:
+    """Copia del ejercicio con los campos de texto limpios para la IA"""
+    exercise = dict(row)
+    for key in TEXT_FIELDS:
+        if exercise.get(key):
+            exercise[key] = clean_text_for_ai(exercise[key])
+    return exercise
+
+
+def phase_fingerprint(exercise: Mapping, phase: int, version: str) -> str:
+    """Hash de la versión del prompt y de los campos que usa la fase"""
+    h = hashlib.sha256(version.encode('utf-8'))
+    for field in PHASE_INPUTS[phase]:
+        value = exercise.get(field)
+        h.update(b'\0')
+        h.update(('' if value is None else str(value)).encode('utf-8'))
+    return h.hexdigest()[:32]
+
+
+def fingerprint_columns(exercise: Mapping, versions: Mapping[int, str], prompt_version: str) -> Dict[str, str]:
+    """Valores de las columnas de huella para guardar junto al enriquecimiento"""
+    columns = {HASH_COLUMNS[phase]: phase_fingerprint(exercise, phase, versions[phase])
+               for phase in sorted(ALL_PHASES)}
+    columns[VERSION_COLUMN] = prompt_version
+    return columns
+
+
+def stale_phases(exercise: Mapping, versions: Mapping[int, str]) -> Set[int]:
+    """Fases cuya huella guardada no coincide con el contenido actual"""
+    if exercise.get(HASH_COLUMNS[1]) != phase_fingerprint(exercise, 1, versions[1]):
+        return set(ALL_PHASES)
+    return {phase for phase in (2, 3)
+            if exercise.get(HASH_COLUMNS[phase]) != phase_fingerprint(exercise, phase, versions[phase])}
+
+
+def plan_enrichment(db_manager, versions: Mapping[int, str]) -> List[Tuple[Dict, Set[int]]]:
+    """Ejercicios con trabajo pendiente y las fases que hay que volver a correr"""
+    plan = []
+    for row in db_manager.obtener_ejercicios(columns=PLANNER_COLUMNS):
+        exercise = prepare_exercise(row)
+        phases = stale_phases(exercise, versions)
+        if phases:
+            plan.append((exercise, phases))
+    return plan
+
+
+def adopt_fingerprints(db_manager, versions: Mapping[int, str], prompt_version: str,
+                       estado: Optional[str] = 'COMPLETADO') -> int:
+    """Registra las huellas actuales de ejercicios ya enriquecidos sin huella.
+
+    Sirve para la primera corrida incremental sobre una base enriquecida antes
+    de que existieran las huellas, sin volver a llamar a la IA.
+    """
+    filtros = {'estado_ia': estado} if estado else None
+    updates = []
+    for row in db_manager.obtener_ejercicios(filtros, columns=PLANNER_COLUMNS):
+        if row.get(HASH_COLUMNS[1]):
+            continue
+        columns = fingerprint_columns(prepare_exercise(row), versions, prompt_version)
+        updates.append([columns[c] for c in IA_FINGERPRINT_COLUMNS] + [row['id']])
+    if updates:
+        assignments = ', '.join(f"{c} = ?" for c in IA_FINGERPRINT_COLUMNS)
+        with db_manager.pool.transaction() as conn:
+            conn.executemany(f"UPDATE ejercicios SET {assignments} WHERE id = ?", updates)
+    return len(updates)
@@ -0,0 +1,119 @@
+"""
+Planificador de importaciones incrementales
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+Cada ejercicio importado guarda una huella de su enunciado y solución
+normalizados (columna ``huella_contenido``). Al volver a importar una guía,
+los items cuya huella ya está en la base no se escriben; los que cambiaron se
+emparejan con los ejercicios de la misma fuente alineando ambas secuencias
+de huellas, y solo los que no tienen pareja se insertan como nuevos.
+"""
+
+import difflib
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from database.migrations import CONTENT_FINGERPRINT_COLUMN, content_fingerprint
+
+# Campos que se reemplazan en un ejercicio modificado; el resto (título,
+# metadatos, enriquecimiento) se conserva
+MODIFIED_FIELDS = ('enunciado', 'solucion_completa')
+IMAGE_FIELDS = ('imagen_path', 'solucion_imagen_path')
+
+# Fuentes que no identifican un documento (texto pegado): sus items nunca se
+# emparejan como modificados, solo se detectan los que no cambiaron
+GENERIC_SOURCES = {'', 'Importación manual', 'Importación LaTeX'}
+
+
+@dataclass
+class ImportPlan:
+    """Clasificación de los items a importar (índices de la lista original)"""
+    fingerprints: List[str]
+    unchanged: List[Tuple[int, int]] = field(default_factory=list)   # (índice, id existente)
+    modified: List[Tuple[int, int]] = field(default_factory=list)    # (índice, id a actualizar)
+    new: List[int] = field(default_factory=list)
+    missing: List[int] = field(default_factory=list)                 # Ids de la fuente que ya no aparecen
+
+    def delta_indices(self) -> List[int]:
+        """Índices que hay que escribir, en el orden original"""
+        return sorted(self.new + [index for index, _ in self.modified])
+
+    def summary(self) -> Dict[str, int]:
+        return {'sin_cambios': len(self.unchanged), 'modificados': len(self.modified),
+                'nuevos': len(self.new), 'ausentes': len(self.missing)}
+
+
+def plan_import(db_manager, exercises: Sequence[Mapping], default_fuente: str = '') -> ImportPlan:
+    """Clasifica cada ejercicio como sin cambios, modificado o nuevo respecto de la base"""
+    plan = ImportPlan([content_fingerprint(ex.get('enunciado'), ex.get('solucion_completa')) for ex in exercises])
+    existentes = db_manager.obtener_ids_por_huella(plan.fingerprints)
+
+    por_fuente: Dict[str, List[int]] = {}
+    for index, exercise in enumerate(exercises):
+        por_fuente.setdefault(exercise.get('fuente') or default_fuente, []).append(index)
+
+    for fuente, indices in por_fuente.items():
+        filas = [] if fuente in GENERIC_SOURCES else db_manager.obtener_huellas_por_fuente(fuente)
+        _classify_source(plan, indices, filas, existentes)
+    plan.unchanged.sort()
+    plan.modified.sort()
+    plan.new.sort()
+    return plan
+
+
+def _classify_source(plan: ImportPlan, indices: List[int], filas: List[tuple], existentes: Mapping[str, int]):
+    """Alinea los items de una fuente con sus ejercicios ya guardados"""
+    importadas = set(plan.fingerprints[index] for index in indices)
+    huellas_filas = [huella for _id, huella in filas]
+    matcher = difflib.SequenceMatcher(None, huellas_filas, [plan.fingerprints[i] for i in indices], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        candidatos = [indices[j] for j in range(j1, j2)]
+        pendientes = []
+        for index in candidatos:
+            huella = plan.fingerprints[index]
+            if huella in existentes:
+                plan.unchanged.append((index, existentes[huella]))
+            else:
+                pendientes.append(index)
+        if tag not in ('replace', 'delete'):
+            plan.new.extend(pendientes)
+            continue
+        # Ejercicios de la fuente que ya no aparecen: pareja del item editado en su lugar
+        libres = [ejercicio_id for ejercicio_id, huella in filas[i1:i2] if huella not in importadas]
+        for index, ejercicio_id in zip(pendientes, libres):
+            plan.modified.append((index, ejercicio_id))
+        plan.new.extend(pendientes[len(libres):])
+        plan.missing.extend(libres[len(pendientes):])
+
+
+def apply_import_plan(db_manager, plan: ImportPlan, exercises: Sequence[Optional[Mapping]]) -> Dict:
+    """Escribe solo los nuevos y modificados en una transacción.
+
+    ``exercises`` sigue los índices del plan; las posiciones sin cambios pueden
+    ser None (no se leen). Los modificados vuelven a quedar pendientes de IA.
+    """
+    nuevos = []
+    for index in plan.new:
+        ejercicio = dict(exercises[index])
+        ejercicio[CONTENT_FINGERPRINT_COLUMN] = plan.fingerprints[index]
+        nuevos.append(ejercicio)
+
+    actualizaciones = []
+    for index, ejercicio_id in plan.modified:
+        exercise = exercises[index]
+        datos = {campo: exercise.get(campo) for campo in MODIFIED_FIELDS}
+        datos.update({campo: exercise[campo] for campo in IMAGE_FIELDS if exercise.get(campo)})
+        datos[CONTENT_FINGERPRINT_COLUMN] = plan.fingerprints[index]
+        datos['estado_ia'] = 'PENDIENTE'
+        actualizaciones.append((ejercicio_id, datos))
+
+    with db_manager.pool.transaction() as conn:
+        resultado = db_manager.batch_import_exercises(nuevos, conn=conn) if nuevos else \
+            {'imported': 0, 'errors': [], 'ids_insertados': []}
+        actualizados = db_manager.actualizar_ejercicios(actualizaciones, conn) if actualizaciones else 0
+    return {
+        **resultado,
+        'updated': actualizados,
+        'ids_actualizados': [ejercicio_id for _, ejercicio_id in plan.modified],
+        'unchanged': len(plan.unchanged),
+    }
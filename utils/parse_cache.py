@@ -0,0 +1,162 @@
+"""
+Caché en disco de resultados del parser LaTeX
+Sistema de Gestión de Ejercicios - Señales y Sistemas
+
+La clave es un hash de la versión del parser y del contenido ya
+preprocesado (sin comentarios), así que volver a subir la misma guía, o un
+rerun de Streamlit, devuelve los ejercicios sin volver a parsear. Cualquier
+cambio en ``utils/latex_parser.py`` cambia la versión e invalida la caché.
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+from dataclasses import asdict
+from functools import lru_cache
+from typing import IO, Dict, List, Optional, Union
+
+from database.connection_pool import get_pool
+from utils import latex_parser
+from utils.latex_parser import LaTeXParser, ParsedExercise
+
+DEFAULT_CACHE_PATH = "database/parse_cache.db"
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 500
+
+
+@lru_cache(maxsize=1)
+def parser_version() -> str:
+    """Versión corta derivada del código fuente del parser"""
+    with open(latex_parser.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def content_key(source: Union[str, IO], parser: Optional[LaTeXParser] = None) -> str:
+    """Clave de caché: sha256 de la versión del parser y del contenido preprocesado.
+
+    ``source`` es el texto o un archivo abierto (texto o binario), que se lee por
+    líneas sin cargarlo completo.
+    """
+    parser = parser or LaTeXParser()
+    file_obj = io.StringIO(source) if isinstance(source, str) else source
+    h = hashlib.sha256(parser_version().encode('utf-8'))
+    h.update(b'\0')
+    for line in parser._iter_preprocessed_lines(file_obj, 'utf-8'):
+        h.update(line.encode('utf-8'))
+    return h.hexdigest()
+
+
+class ParseResultCache:
+    """Caché LRU de listas de ``ParsedExercise`` en SQLite, acotada por tamaño y entradas"""
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.counters = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.pool = get_pool(db_path)
+        with self.pool.connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                clave TEXT PRIMARY KEY,
+                ejercicios TEXT NOT NULL,
+                n_ejercicios INTEGER NOT NULL,
+                bytes INTEGER NOT NULL,
+                creado REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_acceso ON resultados (ultimo_acceso)")
+            self._total_bytes, self._entries = conn.execute(
+                "SELECT COALESCE(SUM(bytes), 0), COUNT(*) FROM resultados").fetchone()
+
+    def get(self, key: str) -> Optional[List[ParsedExercise]]:
+        """Ejercicios guardados para ``key`` o None"""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT ejercicios FROM resultados WHERE clave = ?", (key,)).fetchone()
+            if row is None:
+                self.counters['misses'] += 1
+                return None
+            conn.execute("UPDATE resultados SET ultimo_acceso = ? WHERE clave = ?", (time.time(), key))
+        self.counters['hits'] += 1
+        return [ParsedExercise(**data) for data in json.loads(row[0])]
+
+    def put(self, key: str, exercises: List[ParsedExercise]):
+        """Guarda el resultado de un parseo y expulsa los menos usados si se exceden los límites"""
+        payload = json.dumps([asdict(exercise) for exercise in exercises], ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        now = time.time()
+        with self.pool.transaction() as conn:
+            previous = conn.execute("SELECT bytes FROM resultados WHERE clave = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO resultados (clave, ejercicios, n_ejercicios, bytes, creado, ultimo_acceso) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, payload, len(exercises), size, now, now),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._entries += 0 if previous else 1
+            if self._total_bytes > self.max_bytes or self._entries > self.max_entries:
+                self._evict(conn)
+        self.counters['writes'] += 1
+
+    def _evict(self, conn):
+        # Se libera hasta el 90% de los límites para no expulsar en cada escritura
+        objetivo_bytes = int(self.max_bytes * 0.9)
+        objetivo_entradas = int(self.max_entries * 0.9)
+        cursor = conn.execute("SELECT clave, bytes FROM resultados ORDER BY ultimo_acceso, creado")
+        expulsadas = []
+        for clave, size in cursor:
+            if self._total_bytes <= objetivo_bytes and self._entries <= objetivo_entradas:
+                break
+            expulsadas.append((clave,))
+            self._total_bytes -= size
+            self._entries -= 1
+        cursor.close()
+        conn.executemany("DELETE FROM resultados WHERE clave = ?", expulsadas)
+        self.counters['evictions'] += len(expulsadas)
+
+    def parse(self, content: str, parser: Optional[LaTeXParser] = None) -> List[ParsedExercise]:
+        """``parser.parse_file(content)`` usando la caché"""
+        parser = parser or LaTeXParser()
+        key = content_key(content, parser)
+        exercises = self.get(key)
+        if exercises is None:
+            exercises = parser.parse_file(content)
+            self.put(key, exercises)
+        return exercises
+
+    def parse_path(self, path: str, parser: Optional[LaTeXParser] = None) -> List[ParsedExercise]:
+        """Parsea un archivo .tex por flujo usando la caché"""
+        parser = parser or LaTeXParser()
+        with open(path, encoding='utf-8') as f:
+            key = content_key(f, parser)
+            exercises = self.get(key)
+            if exercises is None:
+                f.seek(0)
+                exercises = list(parser.parse_stream(f))
+                self.put(key, exercises)
+        return exercises
+
+    def clear(self):
+        """Vacía la caché"""
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM resultados")
+        self._total_bytes = self._entries = 0
+
+    def stats(self) -> Dict:
+        """Contadores de aciertos/fallos y tamaño actual"""
+        lookups = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'hit_rate': self.counters['hits'] / lookups if lookups else 0.0,
+            'bytes': self._total_bytes,
+            'entries': self._entries,
+            'max_bytes': self.max_bytes,
+            'max_entries': self.max_entries,
+        }